@@ -47,11 +47,13 @@ def main():
         interface = Simulator(loop, simulator)
     else:
         from gspc.hw.instrument import Instrument
-        interface = Instrument(loop)
+        interface = Instrument(loop, stream="--stream" in app.arguments())
         enable_pfp = interface.has_pfp
         loop.call_soon_threadsafe(lambda: background_task(interface.initialization()))
 
-    window = Window(loop, interface, enable_pfp=enable_pfp)
+    window = Window(loop, interface, enable_pfp=enable_pfp, compact="--compact" in app.arguments(),
+                    dependency_mode="--dependencies" in app.arguments(), repeat="--repeat" in app.arguments(),
+                    requeue="--requeue" in app.arguments(), resume="--resume" in app.arguments())
     window.show()
 
     install_output_log_handler()
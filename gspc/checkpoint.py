@@ -0,0 +1,226 @@
+import importlib
+import json
+import logging
+import os
+import threading
+import typing
+from gspc.output import CycleData
+
+if typing.TYPE_CHECKING:
+    from gspc.schedule import Execute, Runnable
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# Records held before the writer is woken, so completions are written in batches
+DEFAULT_BATCH = 64
+# Seconds a record can wait for its batch before it is written anyway
+DEFAULT_INTERVAL = 1.0
+
+
+def _cycle_fields(data: CycleData) -> typing.Dict[str, typing.Any]:
+    """Get the plain fields of cycle data, leaving out the raw readings"""
+    return {name: value for name, value in vars(data).items()
+            if value is None or isinstance(value, (bool, int, float, str))}
+
+
+class CheckpointJournal:
+    """An append-only journal of schedule progress, written in batches from a background thread so a run can
+    be resumed after the process dies.  Cycle boundaries are written (and synced) as soon as they happen, while
+    runnable completions are batched."""
+
+    def __init__(self, file_name: str, append: bool = False,
+                 batch: int = DEFAULT_BATCH, interval: float = DEFAULT_INTERVAL):
+        self.file_name = file_name
+        self.batch = batch
+        self.interval = interval
+        self._append = append
+        self._lock = threading.Lock()
+        self._pending: typing.List[typing.Dict[str, typing.Any]] = list()
+        self._wake = threading.Event()
+        self._closing = False
+        self._thread: typing.Optional[threading.Thread] = None
+        # Written records, for diagnostics
+        self.written = 0
+
+    def _record(self, record: typing.Dict[str, typing.Any], urgent: bool = False) -> None:
+        with self._lock:
+            self._pending.append(record)
+            wake = urgent or len(self._pending) >= self.batch
+        if wake:
+            self._wake.set()
+
+    def _write_pending(self, output: typing.TextIO) -> None:
+        with self._lock:
+            records = self._pending
+            self._pending = list()
+        if not records:
+            return
+        output.write("".join(json.dumps(record, separators=(',', ':')) + "\n" for record in records))
+        output.flush()
+        os.fsync(output.fileno())
+        self.written += len(records)
+
+    def _ends_line(self) -> bool:
+        try:
+            with open(self.file_name, "rb") as existing:
+                if existing.seek(0, os.SEEK_END) == 0:
+                    return True
+                existing.seek(-1, os.SEEK_END)
+                return existing.read(1) == b"\n"
+        except FileNotFoundError:
+            return True
+
+    def _run(self) -> None:
+        try:
+            with open(self.file_name, "a" if self._append else "w") as output:
+                if self._append and not self._ends_line():
+                    # The record cut short by a crash is skipped as a line of its own
+                    output.write("\n")
+                while True:
+                    self._wake.wait(self.interval)
+                    self._wake.clear()
+                    closing = self._closing
+                    self._write_pending(output)
+                    if closing:
+                        return
+        except OSError:
+            _LOGGER.warning(f"Unable to write the schedule checkpoint {self.file_name}", exc_info=True)
+
+    def start(self, schedule: 'Execute', zero_time: float, resumed: int = 0) -> None:
+        """Begin the journal of a schedule run"""
+        if self._thread is None:
+            self._thread = threading.Thread(name="Checkpoint", target=self._run, daemon=True)
+            self._thread.start()
+        self._record({"e": "start", "zero": zero_time, "resumed": resumed})
+        self.plan(schedule)
+
+    def plan(self, schedule: 'Execute') -> None:
+        """Record the names of the scheduled tasks after the schedule changed"""
+        self._record({"e": "plan", "names": [context.task_name for context in schedule.contexts]}, urgent=True)
+
+    def zero(self, zero_time: float) -> None:
+        """Record a change of the real time the schedule origins are relative to"""
+        self._record({"e": "zero", "zero": zero_time})
+
+    def completed(self, runnable: 'Runnable', data: typing.Optional[CycleData]) -> None:
+        """Record the completion of a runnable, along with the data of the cycle it is part of"""
+        record = {"e": "run", "i": runnable.context.task_index, "r": type(runnable).__name__}
+        if data is not None:
+            record["d"] = _cycle_fields(data)
+        self._record(record)
+
+    def cycle_begin(self, task_index: int, data: typing.Optional[CycleData]) -> None:
+        record = {"e": "begin", "i": task_index}
+        if data is not None:
+            record["c"] = f"{type(data).__module__}:{type(data).__qualname__}"
+            record["d"] = _cycle_fields(data)
+        self._record(record, urgent=True)
+
+    def cycle_end(self, task_index: int) -> None:
+        self._record({"e": "end", "i": task_index}, urgent=True)
+
+    def skipped(self, task_index: int) -> None:
+        self._record({"e": "skip", "i": task_index}, urgent=True)
+
+    def finish(self, completed: bool) -> None:
+        """Close the journal at the end of the run, so it is not resumed"""
+        self._record({"e": "finish", "completed": completed})
+        self.close()
+
+    def close(self) -> None:
+        """Write everything pending and stop the writer"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._closing = True
+        self._wake.set()
+        thread.join()
+        self._thread = None
+        self._closing = False
+
+
+class Checkpoint:
+    """The state of a schedule run recovered from its journal"""
+
+    def __init__(self):
+        self.task_names: typing.List[typing.Optional[str]] = list()
+        # Real time the schedule origins were relative to when the journal ended
+        self.zero_time: typing.Optional[float] = None
+        self.completed: typing.Set[int] = set()
+        self.skipped: typing.Set[int] = set()
+        self.started: typing.Set[int] = set()
+        # Set when the run ended normally, so there is nothing to resume
+        self.finished = False
+        # Cycle data class and fields of each started task, as of its latest recorded runnable
+        self.data: typing.Dict[int, typing.Tuple[str, typing.Dict[str, typing.Any]]] = dict()
+
+    @property
+    def resume_index(self) -> int:
+        """The index of the task at the next boundary, after everything started"""
+        return max(self.started | self.completed | self.skipped, default=-1) + 1
+
+    @property
+    def interrupted(self) -> typing.List[int]:
+        """Tasks started but neither completed nor skipped"""
+        return sorted(self.started - self.completed - self.skipped)
+
+    def abort_interrupted(self, message: str = "interrupted before completion") -> None:
+        """Write the partial data of the interrupted cycles as aborted"""
+        for task_index in self.interrupted:
+            recorded = self.data.get(task_index)
+            if recorded is None:
+                continue
+            class_name, fields = recorded
+            module_name, _, qualified_name = class_name.partition(":")
+            try:
+                data_class = importlib.import_module(module_name)
+                for part in qualified_name.split("."):
+                    data_class = getattr(data_class, part)
+                data = data_class()
+            except Exception:
+                _LOGGER.warning(f"Unable to restore the data of task {task_index + 1}", exc_info=True)
+                continue
+            vars(data).update(fields)
+            data.abort(message)
+
+
+def load_checkpoint(file_name: str) -> typing.Optional[Checkpoint]:
+    """Read the latest run from a checkpoint journal, ignoring a record cut short by a crash"""
+    checkpoint = None
+    try:
+        with open(file_name, "r") as input_file:
+            for line in input_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                event = record.get("e")
+                if event == "start":
+                    checkpoint = Checkpoint()
+                    checkpoint.zero_time = record.get("zero")
+                    # Tasks before a resumed run were already done in the ones it continued
+                    checkpoint.completed.update(range(record.get("resumed", 0)))
+                if checkpoint is None:
+                    continue
+                if event == "plan":
+                    checkpoint.task_names = record.get("names", [])
+                elif event == "zero":
+                    checkpoint.zero_time = record.get("zero")
+                elif event == "begin":
+                    checkpoint.started.add(record["i"])
+                    if "c" in record:
+                        checkpoint.data[record["i"]] = (record["c"], record.get("d", {}))
+                elif event == "run":
+                    recorded = checkpoint.data.get(record["i"])
+                    if recorded is not None and "d" in record:
+                        checkpoint.data[record["i"]] = (recorded[0], record["d"])
+                elif event == "end":
+                    checkpoint.completed.add(record["i"])
+                elif event == "skip":
+                    checkpoint.skipped.add(record["i"])
+                elif event == "finish":
+                    checkpoint.finished = True
+    except OSError:
+        return None
+    return checkpoint
@@ -0,0 +1,76 @@
+import asyncio
+import selectors
+import time
+import typing
+
+
+class Clock:
+    """The time source used by the schedule and the runnables it executes"""
+
+    def time(self) -> float:
+        """Get the current wall clock time in seconds since the epoch"""
+        return time.time()
+
+    def monotonic(self) -> float:
+        """Get the current monotonic time in seconds"""
+        return time.monotonic()
+
+    async def sleep(self, seconds: float) -> None:
+        """Sleep for the specified number of seconds"""
+        await asyncio.sleep(seconds)
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """A selector that advances virtual time instead of blocking when only timers are pending"""
+
+    def __init__(self):
+        selectors.DefaultSelector.__init__(self)
+        self.advance: typing.Callable[[float], None] = lambda seconds: None
+
+    def select(self, timeout=None):
+        if timeout is None:
+            # Nothing scheduled, so only real I/O (e.g. a call from another thread) can wake the loop
+            return selectors.DefaultSelector.select(self, None)
+        ready = selectors.DefaultSelector.select(self, 0)
+        if ready:
+            return ready
+        if timeout > 0:
+            self.advance(timeout)
+        return ready
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """An event loop whose time only advances when it would otherwise be idle, jumping directly to the next
+    scheduled deadline.  Everything built on the loop timers (sleeps, timeouts, call_later) runs in virtual
+    time, while work done in other threads takes no virtual time at all."""
+
+    def __init__(self):
+        selector = _VirtualSelector()
+        asyncio.SelectorEventLoop.__init__(self, selector)
+        self._virtual_time = 0.0
+        selector.advance = self._advance
+
+    def _advance(self, seconds: float) -> None:
+        self._virtual_time += seconds
+
+    def time(self) -> float:
+        return self._virtual_time
+
+
+class VirtualClock(Clock):
+    """A clock that runs in virtual time on its own event loop, so a schedule can be executed without waiting
+    for real time to pass."""
+
+    def __init__(self, start: typing.Optional[float] = None):
+        self.loop = VirtualTimeEventLoop()
+        self._epoch = time.time() if start is None else start
+
+    def time(self) -> float:
+        return self._epoch + self.loop.time()
+
+    def monotonic(self) -> float:
+        return self.loop.time()
+
+    def run(self, coro: typing.Awaitable) -> typing.Any:
+        """Run a coroutine to completion on the virtual time loop"""
+        return self.loop.run_until_complete(coro)
@@ -0,0 +1,282 @@
+import hashlib
+import logging
+import typing
+import weakref
+from array import array
+from collections import namedtuple
+from gspc.schedule import Task, Runnable, Execute, known_tasks
+
+_LOGGER = logging.getLogger(__name__)
+
+
+TimelineEntry = namedtuple("TimelineEntry", ["origin", "end", "task_index", "task_name",
+                                             "runnable", "actuator", "value", "sequence"])
+Conflict = namedtuple("Conflict", ["actuator", "first", "second"])
+
+DEFAULT_CONFLICT_WINDOW = 5.0
+
+# Templates for tasks that are not first are built at this origin, so that it is always positive
+_TEMPLATE_REFERENCE = 1.0E6
+
+_event_bits: typing.Dict[str, int] = dict()
+_action_ids: typing.Dict[type, int] = dict()
+actions: typing.List[type] = list()
+
+
+def event_bit(event: str) -> int:
+    """Get the mask bit assigned to an event"""
+    bit = _event_bits.get(event)
+    if bit is None:
+        if len(_event_bits) >= 64:
+            raise ValueError(f"Too many events to assign {event} a mask bit")
+        bit = 1 << len(_event_bits)
+        _event_bits[event] = bit
+    return bit
+
+
+def event_mask(events: typing.Iterable[str]) -> int:
+    """Get the mask of a set of events"""
+    mask = 0
+    for event in events:
+        mask |= event_bit(event)
+    return mask
+
+
+def action_id(action: type) -> int:
+    """Get the identifier assigned to a runnable type, as an index into the actions"""
+    result = _action_ids.get(action)
+    if result is None:
+        result = len(actions)
+        _action_ids[action] = result
+        actions.append(action)
+    return result
+
+
+class TaskTemplate:
+    """The runnables a task schedules, as read only arrays of offsets from the task origin along with the action
+    and event masks of each.  Templates are shared by every placement of a task with the same prior task gap,
+    so the runnables a task schedules must only depend on its parameters, whether it is first and that gap."""
+
+    def __init__(self, task: Task, first: bool, prior_offset: typing.Optional[float]):
+        reference = 0.0 if first else _TEMPLATE_REFERENCE
+        prior_origin = None if prior_offset is None else reference + prior_offset
+        context = Execute.Context(None, Execute([task]), reference, 0, None, prior_origin)
+        runnables = task.schedule(context)
+
+        self.prototypes: typing.Tuple[Runnable, ...] = tuple(runnables)
+        self.actuators: typing.Tuple[typing.Tuple[typing.Tuple[str, typing.Any], ...], ...] = tuple(
+            tuple(runnable.actuators().items()) for runnable in runnables)
+        self.offsets = memoryview(array('d', [runnable.origin - reference for runnable in runnables])).toreadonly()
+        self.durations = memoryview(array('d', [runnable.duration for runnable in runnables])).toreadonly()
+        self.actions = memoryview(array('H', [action_id(type(runnable)) for runnable in runnables])).toreadonly()
+        self.set_masks = memoryview(array('Q', [event_mask(runnable.set_events)
+                                                 for runnable in runnables])).toreadonly()
+        self.clear_masks = memoryview(array('Q', [event_mask(runnable.clear_events)
+                                                   for runnable in runnables])).toreadonly()
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def origins(self, origin: float) -> array:
+        """Get the runnable origins for the task placed at an origin"""
+        return array('d', [origin + offset for offset in self.offsets])
+
+    def event_offsets(self, event: str, clear: bool = False) -> array:
+        """Get the offsets of the runnables that set (or clear) an event"""
+        bit = event_bit(event)
+        masks = self.clear_masks if clear else self.set_masks
+        return array('d', [self.offsets[i] for i in range(len(masks)) if masks[i] & bit])
+
+
+_templates: 'weakref.WeakKeyDictionary[Task, typing.Dict[tuple, TaskTemplate]]' = weakref.WeakKeyDictionary()
+
+
+def task_template(task: Task, first: bool = False, prior_offset: typing.Optional[float] = None) -> TaskTemplate:
+    """Get the shared template of a task, with the prior offset being the prior task origin relative to it"""
+    by_placement = _templates.get(task)
+    if by_placement is None:
+        by_placement = dict()
+        _templates[task] = by_placement
+    key = (first, prior_offset, task.origin_advance)
+    template = by_placement.get(key)
+    if template is None:
+        template = TaskTemplate(task, first, prior_offset)
+        by_placement[key] = template
+    return template
+
+
+def parse_task_file(contents: typing.Iterable[str],
+                    tasks: typing.Container[str] = known_tasks) -> typing.List[typing.Tuple[str, typing.Optional[str]]]:
+    """Parse the contents (or lines) of a task file into a list of the task names and their optional data, with
+    each name required to be one of the tasks"""
+    if isinstance(contents, str):
+        contents = contents.splitlines()
+    result = list()
+    line_number = 0
+    for line in contents:
+        line_number += 1
+        parts = line.split(',', 2)
+        if len(parts) <= 0:
+            continue
+        task_name = parts[0].strip()
+        if len(task_name) <= 0:
+            continue
+        if task_name not in tasks:
+            raise ValueError(f"Unknown task {task_name} at line {line_number}")
+        task_data = None
+        if len(parts) > 1:
+            task_data = parts[1]
+        result.append((task_name, task_data))
+    return result
+
+
+class CompiledSchedule:
+    """A flat timeline of the runnables in a schedule, with each one tagged by the actuators it drives"""
+
+    def __init__(self, tasks: typing.Sequence[Task], task_names: typing.Optional[typing.Sequence[str]] = None):
+        self.task_names: typing.List[typing.Optional[str]] = list(task_names) if task_names is not None else list()
+        self.timeline: typing.List[TimelineEntry] = list()
+        self.duration: float = 0.0
+        self._conflicts: typing.Dict[float, typing.List[Conflict]] = dict()
+        self.templates: typing.List[TaskTemplate] = list()
+        self.origins = array('d')
+
+        # Runnables are never executed, so the template prototypes stand in for them in the timeline
+        origin = 0.0
+        prior_origin = None
+        for i in range(len(tasks)):
+            task = tasks[i]
+            task_name = None
+            if i < len(self.task_names):
+                task_name = self.task_names[i]
+            template = task_template(task, not (origin > 0.0),
+                                     None if prior_origin is None else prior_origin - origin)
+            self.templates.append(template)
+            self.origins.append(origin)
+            self._add(template, origin, i, task_name)
+            prior_origin = origin
+            origin += task.origin_advance
+        self.duration = origin
+
+        self.timeline.sort(key=lambda entry: entry.origin)
+
+    def _add(self, template: TaskTemplate, origin: float, index: int, task_name: typing.Optional[str]) -> None:
+        offsets = template.offsets
+        durations = template.durations
+        for sequence in range(len(template)):
+            runnable = template.prototypes[sequence]
+            begin = origin + offsets[sequence]
+            end = begin + durations[sequence]
+            actuators = template.actuators[sequence]
+            if not actuators:
+                self.timeline.append(TimelineEntry(begin, end, index, task_name, runnable,
+                                                   None, None, sequence))
+                continue
+            for actuator, value in actuators:
+                self.timeline.append(TimelineEntry(begin, end, index, task_name, runnable,
+                                                   actuator, value, sequence))
+
+    def event_origins(self, event: str, clear: bool = False) -> array:
+        """Get the origins of every runnable that sets (or clears) an event"""
+        result = array('d')
+        for i in range(len(self.templates)):
+            origin = self.origins[i]
+            result.extend([origin + offset for offset in self.templates[i].event_offsets(event, clear)])
+        return result
+
+    def actuator_timeline(self, actuator: str) -> typing.List[TimelineEntry]:
+        """Get the timeline entries that drive an actuator"""
+        return [entry for entry in self.timeline if entry.actuator == actuator]
+
+    @staticmethod
+    def _is_conflict(first: TimelineEntry, second: TimelineEntry) -> bool:
+        if first.value == second.value:
+            return False
+        # Commands within a task are sequenced deliberately, unless they leave the order ambiguous
+        if first.task_index == second.task_index:
+            return first.origin == second.origin
+        return True
+
+    def conflicts(self, window: float = DEFAULT_CONFLICT_WINDOW) -> typing.List[Conflict]:
+        """Get conflicting commands on the same actuator issued within the window (seconds) of each other or
+        while a prior command is still active"""
+        result = self._conflicts.get(window)
+        if result is not None:
+            return result
+
+        result = list()
+        by_actuator: typing.Dict[str, typing.List[TimelineEntry]] = dict()
+        for entry in self.timeline:
+            if entry.actuator is None:
+                continue
+            by_actuator.setdefault(entry.actuator, list()).append(entry)
+
+        for actuator, entries in by_actuator.items():
+            # Entries are in origin order, so each only needs comparing with the ones that follow within reach
+            for i in range(len(entries)):
+                first = entries[i]
+                reach = max(first.end, first.origin + window)
+                for j in range(i + 1, len(entries)):
+                    second = entries[j]
+                    if second.origin > reach:
+                        break
+                    if self._is_conflict(first, second):
+                        result.append(Conflict(actuator, first, second))
+
+        self._conflicts[window] = result
+        return result
+
+
+_compiled_cache: typing.Dict[bytes, CompiledSchedule] = dict()
+
+
+def compile_tasks(task_names: typing.Sequence[str]) -> CompiledSchedule:
+    """Compile a schedule of known tasks"""
+    return CompiledSchedule([known_tasks[name] for name in task_names], task_names)
+
+
+def compile_task_file(file_name: str) -> CompiledSchedule:
+    """Compile a task file, reusing the result as long as the file contents are unchanged"""
+    with open(file_name, "rb") as input_file:
+        contents = input_file.read()
+    key = hashlib.sha256(contents).digest()
+    compiled = _compiled_cache.get(key)
+    if compiled is not None:
+        return compiled
+
+    task_names = [name for name, _ in parse_task_file(contents.decode("utf-8"))]
+    compiled = compile_tasks(task_names)
+    _compiled_cache[key] = compiled
+    _LOGGER.debug(f"Compiled {file_name} with {len(task_names)} tasks and {len(compiled.timeline)} entries")
+    return compiled
+
+
+def _describe(entry: TimelineEntry) -> str:
+    return f"#{entry.task_index + 1} {entry.task_name or ''} {type(entry.runnable).__name__}={entry.value}"
+
+
+if __name__ == '__main__':
+    import argparse
+    import gspc.tasks
+
+    opt = argparse.ArgumentParser(
+        description='Compile a task file into a timeline and check it for actuator conflicts'
+    )
+    opt.add_argument('file', help='Task file to compile.')
+    opt.add_argument('--window', type=float, default=DEFAULT_CONFLICT_WINDOW,
+                     help='Seconds between commands on the same actuator that conflict.')
+    opt.add_argument('--timeline', action='store_true',
+                     help='Print the full timeline.')
+
+    options = opt.parse_args()
+
+    compiled = compile_task_file(options.file)
+    if options.timeline:
+        for entry in compiled.timeline:
+            print(f"{entry.origin:10.1f} {entry.actuator or '-':>14} {_describe(entry)}")
+
+    conflicts = compiled.conflicts(options.window)
+    for conflict in conflicts:
+        print(f"CONFLICT {conflict.actuator} at {conflict.first.origin:.1f}/{conflict.second.origin:.1f}: "
+              f"{_describe(conflict.first)} vs {_describe(conflict.second)}")
+    print(f"{len(compiled.task_names)} tasks, {compiled.duration / 3600.0:.2f} hours, {len(conflicts)} conflicts")
@@ -5,11 +5,15 @@ import logging
 import enum
 import threading
 import os
+import itertools
 from gspc.ui.window import Main
 from gspc.schedule import Execute, Task, known_tasks
+from gspc.optimize import Compactor
 from gspc.hw.interface import Interface
+from gspc.tasks.recovery import SafeState
 from gspc.util import call_on_ui, LogHandler, background_task
-from gspc.output import set_output_name, CycleData, set_lock_alert_handler
+from gspc.output import set_output_name, CycleData, set_lock_alert_handler, checkpoint_file_name
+from gspc.checkpoint import CheckpointJournal, load_checkpoint
 from PyQt5 import QtCore, QtGui, QtWidgets
 
 if typing.TYPE_CHECKING:
@@ -25,10 +29,18 @@ class Window(Main):
     _schedule_complete = QtCore.pyqtSignal()
     _THERMOCOUPLE_POLL_SECONDS = 10.0
 
-    def __init__(self, loop: asyncio.AbstractEventLoop, interface: Interface, enable_pfp: bool = True):
+    def __init__(self, loop: asyncio.AbstractEventLoop, interface: Interface, enable_pfp: bool = True,
+                 compact: bool = False, dependency_mode: bool = False, repeat: bool = False,
+                 requeue: bool = False, resume: bool = False):
         Main.__init__(self, enable_pfp=enable_pfp)
         self._loop = loop
         self._interface = interface
+        self._compactor: typing.Optional[Compactor] = Compactor() if compact else None
+        self._dependency_mode = dependency_mode
+        self._repeat = repeat
+        self._requeue = requeue
+        # Set until the first schedule started, which continues an interrupted run from its checkpoint
+        self._resume = resume
         self._active_schedule: typing.Optional["_Schedule"] = None
         self._temp_log_stop: typing.Optional[asyncio.Event] = None
         self._temp_log_task: typing.Optional[asyncio.Task] = None
@@ -51,33 +63,14 @@ class Window(Main):
             self.sample_flow.setText(f"{value:8.3f}")
             self.output_flow_feedback.setText(f"{value:.3f}")
 
-        self._loop.call_soon_threadsafe(lambda: background_task(self._repeat_ui_with_result(
-            self._interface.get_flow_signal, update_sample_flow_signal
-        )))
-
-        self._loop.call_soon_threadsafe(lambda: background_task(self._repeat_ui_with_result(
-            self._interface.get_pressure, lambda value: self.sample_pressure.setText(f"{value:8.3f}")
-        )))
-        self._loop.call_soon_threadsafe(lambda: background_task(self._repeat_ui_with_result(
-            self._interface.get_thermocouple_temperature_0,
-            lambda value: self.thermocouple_0.setText(f"{value:8.3f}"),
-            interval=self._THERMOCOUPLE_POLL_SECONDS
-        )))
-        self._loop.call_soon_threadsafe(lambda: background_task(self._repeat_ui_with_result(
-            self._interface.get_thermocouple_temperature_1,
-            lambda value: self.thermocouple_1.setText(f"{value:8.3f}"),
-            interval=self._THERMOCOUPLE_POLL_SECONDS
-        )))
-        self._loop.call_soon_threadsafe(lambda: background_task(self._repeat_ui_with_result(
-            self._interface.get_oven_temperature_signal,
-            lambda value: self.oven_temperature.setText(f"{value:8.3f}")
-        )))
+        self._subscribe_ui("flow", update_sample_flow_signal)
+        self._subscribe_ui("pressure", lambda value: self.sample_pressure.setText(f"{value:8.3f}"))
+        self._subscribe_ui("thermocouple_0", lambda value: self.thermocouple_0.setText(f"{value:8.3f}"))
+        self._subscribe_ui("thermocouple_1", lambda value: self.thermocouple_1.setText(f"{value:8.3f}"))
+        self._subscribe_ui("oven_temperature", lambda value: self.oven_temperature.setText(f"{value:8.3f}"))
         # calling get_pfp_pressure too often interfears with other pfp comms. GSD
         if self.pfp_pressure is not None:
-            self._loop.call_soon_threadsafe(lambda: background_task(self._repeat_ui_with_result(
-                self._interface.get_display_pfp_pressure,
-                lambda value: self.pfp_pressure.setText(f"{value:8.3f}")
-            )))
+            self._subscribe_ui("display_pfp_pressure", lambda value: self.pfp_pressure.setText(f"{value:8.3f}"))
 
         self._log_handler = LogHandler(self._log_message)
         log_format = logging.Formatter('%(message)s')
@@ -142,16 +135,10 @@ class Window(Main):
 
         call_on_ui(call_gui)
 
-    @staticmethod
-    async def _repeat_ui_with_result(reader: typing.Callable[[], typing.Awaitable[typing.Any]],
-                                     ui_update: typing.Callable[[typing.Any], None],
-                                     interval: float = 1.0) -> None:
-        while True:
-            try:
-                await Window._call_ui_with_result(reader, ui_update)
-            except Exception:
-                _LOGGER.warning("UI update failed", exc_info=True)
-            await asyncio.sleep(interval)
+    def _subscribe_ui(self, name: str, ui_update: typing.Callable[[typing.Any], None]) -> None:
+        """Show the readings of a signal, shared with the running tasks through the sensor hub"""
+        signal = self._interface.sensors.signal(name)
+        self._loop.call_soon_threadsafe(lambda: signal.subscribe(lambda value: call_on_ui(lambda: ui_update(value))))
 
     def _temp_log_path(self) -> typing.Optional[str]:
         data_file = CycleData.current_file_name()
@@ -170,15 +157,15 @@ class Window(Main):
                 while True:
                     now = time.localtime()
                     therm0 = None
-                    try:
-                        therm0 = await self._interface.get_thermocouple_temperature_0()
-                    except Exception:
-                        _LOGGER.warning("Therm0 read failed; writing NA.", exc_info=True)
                     therm1 = None
                     try:
-                        therm1 = await self._interface.get_thermocouple_temperature_1()
+                        # Both thermocouples in one read, published to the display as well
+                        snapshot = await self._interface.read_snapshot(("thermocouple_0", "thermocouple_1"))
+                        now = time.localtime(snapshot.time)
+                        therm0 = snapshot["thermocouple_0"]
+                        therm1 = snapshot["thermocouple_1"]
                     except Exception:
-                        _LOGGER.warning("Therm1 read failed; writing NA.", exc_info=True)
+                        _LOGGER.warning("Thermocouple read failed; writing NA.", exc_info=True)
                     therm0_text = f"{therm0:.3f}" if therm0 is not None else "NA"
                     therm1_text = f"{therm1:.3f}" if therm1 is not None else "NA"
                     file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S', now)},{therm0_text},{therm1_text}\n")
@@ -216,12 +203,16 @@ class Window(Main):
 
     async def _execute_schedule(self):
         abort_message = None
+        abort_latency = None
+        skipped = list()
         if self._temp_log_enabled:
             await self._start_temp_log()
         try:
             if not await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(
                     self._active_schedule.execute(self._interface), self._loop)):
                 abort_message = self._active_schedule.abort_message
+                abort_latency = self._active_schedule.abort_latency
+            skipped = list(self._active_schedule.skipped)
         finally:
             if self._temp_log_enabled:
                 await self._stop_temp_log()
@@ -231,9 +222,14 @@ class Window(Main):
             self.set_stopped()
             self._active_schedule = None
             self.log_event("Tasks completed")
+            if abort_latency is not None:
+                self.log_event(f"Outputs safe {abort_latency:.2f} seconds after the abort")
             self._schedule_complete.emit()
             if abort_message is not None:
                 QtWidgets.QMessageBox.warning(self, "Schedule Aborted", f"Task execution aborted: {abort_message}")
+            elif skipped:
+                QtWidgets.QMessageBox.warning(self, "Tasks Skipped", "\n".join(
+                    f"#{s.task_index + 1} {s.task_name or ''}: {s.message}" for s in skipped))
 
         call_on_ui(message_gui)
         await self._interface.shutdown()    # put instrument in idle state
@@ -241,7 +237,7 @@ class Window(Main):
     def _run_manual_task(self, task: Task, name: str):
         if self._active_schedule is not None:
             return
-        self._active_schedule = _Schedule([task], self, task_names=[name])
+        self._active_schedule = _Schedule([task], self, task_names=[name], dependency_mode=self._dependency_mode)
         self._temp_log_enabled = False
         self.set_running(time.time())
         self.current_task.setText(name)
@@ -252,7 +248,33 @@ class Window(Main):
         if self._active_schedule is not None:
             return
 
-        self._active_schedule = _Schedule(tasks, self, task_names=task_names)
+        if self._compactor is not None:
+            tasks = self._compactor.compact(tasks, repeat=self._repeat)
+        if self._repeat:
+            # Run the list until stopped, streaming it so memory use stays constant
+            self._active_schedule = _Schedule(itertools.cycle(tasks), self,
+                                              task_names=itertools.cycle(task_names) if task_names else None,
+                                              dependency_mode=self._dependency_mode, cycle_length=len(tasks))
+        else:
+            checkpoint_name = checkpoint_file_name()
+            resume_from = 0
+            if self._resume and checkpoint_name:
+                checkpoint = load_checkpoint(checkpoint_name)
+                if checkpoint is not None and not checkpoint.finished:
+                    if task_names is None or checkpoint.task_names != list(task_names):
+                        QtWidgets.QMessageBox.warning(self, "Unable to Resume",
+                                                      "The task list does not match the interrupted schedule.")
+                        return
+                    checkpoint.abort_interrupted()
+                    resume_from = checkpoint.resume_index
+                    _LOGGER.info(f"Resuming the interrupted schedule at task {resume_from + 1}")
+                self._resume = False
+            journal = None
+            if checkpoint_name:
+                journal = CheckpointJournal(checkpoint_name, append=resume_from > 0)
+            self._active_schedule = _Schedule(tasks, self, task_names=task_names,
+                                              dependency_mode=self._dependency_mode, requeue_failed=self._requeue,
+                                              checkpoint=journal, resume_from=resume_from)
         self._temp_log_enabled = True
         self.set_running(time.time())
         self._loop.call_soon_threadsafe(lambda: background_task(self._execute_schedule()))
@@ -281,30 +303,28 @@ class Window(Main):
 
         self._loop.call_soon_threadsafe(lambda: background_task(loop_call()))
 
-    def modify_active_list(self, modified_index: int) -> bool:
-        if self._active_schedule is None:
-            return True
+    def _active_task(self, index: int) -> typing.Optional[Task]:
+        """Get the task to schedule for an index of the active list, compacted for the task that follows it"""
         task_list = self.current_task_list
-        if task_list is None:
-            return True
-
-        _LOGGER.debug(f"Attempting reschedule after {modified_index}")
+        if task_list is None or index >= task_list.count():
+            return None
+        tasks = [task_list.item(i).data(QtCore.Qt.UserRole).task
+                 for i in range(index, min(index + 2, task_list.count()))]
+        if self._compactor is not None:
+            tasks = self._compactor.compact(tasks)
+        return tasks[0]
 
+    def _modify_active_schedule(self, modify: typing.Callable[[_Schedule], typing.Awaitable]) -> bool:
         completed = threading.Event()
         result: typing.Optional[_Schedule.RescheduleFailure] = None
 
-        append_tasks = list()
-        for i in range(modified_index, task_list.count()):
-            task_item: QtWidgets.QListWidgetItem = task_list.item(i)
-            append_tasks.append(task_item.data(QtCore.Qt.UserRole).task)
-
         async def loop_call():
             nonlocal result
             if self._active_schedule is None:
                 completed.set()
                 return
             try:
-                await self._active_schedule.reschedule(remove=modified_index, append=append_tasks)
+                await modify(self._active_schedule)
             except _Schedule.RescheduleFailure as e:
                 result = e
             completed.set()
@@ -325,6 +345,67 @@ class Window(Main):
 
         return True
 
+    def modify_active_list(self, modified_index: int) -> bool:
+        if self._active_schedule is None:
+            return True
+        task_list = self.current_task_list
+        if task_list is None:
+            return True
+
+        _LOGGER.debug(f"Attempting reschedule after {modified_index}")
+
+        append_tasks = list()
+        for i in range(modified_index, task_list.count()):
+            task_item: QtWidgets.QListWidgetItem = task_list.item(i)
+            append_tasks.append(task_item.data(QtCore.Qt.UserRole).task)
+        if self._compactor is not None:
+            append_tasks = self._compactor.compact(append_tasks)
+
+        return self._modify_active_schedule(
+            lambda schedule: schedule.reschedule(remove=modified_index, append=append_tasks))
+
+    def _recompact_active_tasks(self, *indices: int) -> typing.Optional[typing.Dict[int, Task]]:
+        """Get the tasks at indices of the active list compacted again for their neighbours after an edit"""
+        if self._compactor is None:
+            return None
+        replace = dict()
+        for index in indices:
+            if index < 0:
+                continue
+            task = self._active_task(index)
+            if task is not None:
+                replace[index] = task
+        return replace
+
+    def insert_active_task(self, index: int) -> bool:
+        if self._active_schedule is None:
+            return True
+        task = self._active_task(index)
+        if task is None:
+            return True
+        name = self.current_task_list.item(index).data(QtCore.Qt.UserRole).name
+        # Compacted advances depend on the following task, so the one before the insert changes too
+        replace = self._recompact_active_tasks(index - 1)
+        _LOGGER.debug(f"Attempting task insert at {index}")
+        return self._modify_active_schedule(lambda schedule: schedule.insert_task(index, task, name, replace))
+
+    def remove_active_task(self, index: int) -> bool:
+        if self._active_schedule is None:
+            return True
+        replace = self._recompact_active_tasks(index - 1)
+        _LOGGER.debug(f"Attempting task removal at {index}")
+        return self._modify_active_schedule(lambda schedule: schedule.delete_task(index, replace))
+
+    def move_active_task(self, index: int, to: int) -> bool:
+        if self._active_schedule is None:
+            return True
+        # Compacted advances depend on the following task, so the moved one is compacted for its new position
+        # along with the ones now before it and before where it was
+        task = self._active_task(to) if self._compactor is not None else None
+        replace = self._recompact_active_tasks(to - 1, index if index > to else index - 1)
+        _LOGGER.debug(f"Attempting task move from {index} to {to}")
+        return self._modify_active_schedule(lambda schedule: schedule.move_task(index, to, task, replace))
+
     def _log_message(self, msg: str, record: logging.LogRecord):
         self.log_event(msg)
 
@@ -455,32 +536,41 @@ class Window(Main):
 class _Schedule(Execute):
     """The schedule execution class for the main control window."""
 
-    def __init__(self, task_sequence: typing.Sequence[Task], window: Window,
-                 task_names: typing.Optional[typing.Sequence[str]] = None):
-        Execute.__init__(self, task_sequence, task_names=task_names)
+    def __init__(self, task_sequence: typing.Iterable[Task], window: Window,
+                 task_names: typing.Optional[typing.Iterable[str]] = None, dependency_mode: bool = False,
+                 cycle_length: typing.Optional[int] = None, requeue_failed: bool = False,
+                 checkpoint: typing.Optional[CheckpointJournal] = None, resume_from: int = 0):
+        Execute.__init__(self, task_sequence, task_names=task_names, dependency_mode=dependency_mode,
+                         recovery=SafeState(), requeue_failed=requeue_failed, checkpoint=checkpoint,
+                         resume_from=resume_from)
         self._window = window
+        self._cycle_length = cycle_length
 
     async def state_update(self):
         is_paused = await self.is_paused()
-        events = dict()
-        for key, event in self.events.items():
-            events[key] = event
+        events = dict(self.events.items())
 
         class State(enum.Enum):
             COMPLETE = enum.auto()
             ACTIVE = enum.auto()
             PREPARING = enum.auto()
+            SKIPPED = enum.auto()
 
         task_state = dict()
         current_task = None
         for context in self.contexts:
-            if context.task_completed:
-                task_state[context.task_index] = State.COMPLETE
+            index = context.task_index
+            if self._cycle_length:
+                index = index % self._cycle_length
+            if context.task_skipped:
+                task_state[index] = State.SKIPPED
+            elif context.task_completed:
+                task_state[index] = State.COMPLETE
             elif context.task_started:
-                task_state[context.task_index] = State.ACTIVE
-                current_task = context.task_index
+                task_state[index] = State.ACTIVE
+                current_task = index
             elif context.task_activated:
-                task_state[context.task_index] = State.PREPARING
+                task_state[index] = State.PREPARING
 
         def update():
             if not is_paused:
@@ -506,6 +596,12 @@ class _Schedule(Execute):
                         if task_item.flags() & QtCore.Qt.ItemIsSelectable:
                             task_item.setFlags(task_item.flags() & ~QtCore.Qt.ItemIsSelectable)
                             task_list.clearSelection()
+                    elif state == State.SKIPPED:
+                        task_item.setText(f"{task_data.name} - SKIPPED")
+                        task_item.setFlags(task_item.flags() & ~QtCore.Qt.ItemIsEnabled)
+                        if task_item.flags() & QtCore.Qt.ItemIsSelectable:
+                            task_item.setFlags(task_item.flags() & ~QtCore.Qt.ItemIsSelectable)
+                            task_list.clearSelection()
                     elif state == State.PREPARING:
                         task_item.setText(f"{task_data.name} - PREPARE")
                         task_item.setFlags(task_item.flags() & ~QtCore.Qt.ItemIsEnabled)
@@ -582,6 +678,19 @@ class Simulator(Interface):
 
         self._loop.call_soon_threadsafe(_update)
 
+    async def _read_signals(self, names: typing.Sequence[str]) -> typing.Dict[str, typing.Any]:
+        # The simulated signals are all held here, so they are read at the same instant
+        values = {
+            "flow": self.sample_flow,
+            "flow_control_output": self.sample_flow,
+            "pressure": self.sample_pressure,
+            "oven_temperature": self.oven_temperature,
+            "thermocouple_0": self.thermocouple_0,
+            "thermocouple_1": self.thermocouple_1,
+            "ssv_position": self.ssv_position,
+        }
+        return {name: values[name] for name in names}
+
     async def get_pressure(self) -> float:
         return self.sample_pressure
 
@@ -0,0 +1,126 @@
+import collections
+import math
+import statistics
+import typing
+import weakref
+
+if typing.TYPE_CHECKING:
+    from gspc.hw.interface import Interface
+
+
+# Cycles of cooling history the fit uses
+DEFAULT_HISTORY = 5
+# Seconds the predicted cooling is padded by, before adding the spread of recent cycles
+DEFAULT_MARGIN = 20.0
+# Plateaus tried above the highest reading, as fractions of the range of the readings
+_PLATEAU_STEPS = tuple(0.01 * 1.25 ** i for i in range(32))
+
+
+class ExponentialFit(typing.NamedTuple):
+    """A fit of signal(t) = plateau - amplitude * exp(-t / tau)"""
+    plateau: float
+    amplitude: float
+    tau: float
+    residual: float
+
+    def value(self, t: float) -> float:
+        return self.plateau - self.amplitude * math.exp(-t / self.tau)
+
+    def time_to(self, threshold: float) -> typing.Optional[float]:
+        """Seconds until the signal reaches a threshold, or None if it never does"""
+        if threshold >= self.plateau:
+            return None
+        if self.amplitude <= 0.0:
+            return 0.0
+        return max(0.0, self.tau * math.log(self.amplitude / (self.plateau - threshold)))
+
+
+def fit_exponential(samples: typing.Sequence[typing.Tuple[float, float]]) -> typing.Optional[ExponentialFit]:
+    """Fit a rising exponential approach to (seconds, signal) samples by least squares.  Each trial plateau makes
+    the rest a straight line in log space, so only the plateau is searched."""
+    if len(samples) < 3:
+        return None
+    times = [t for t, _ in samples]
+    values = [v for _, v in samples]
+    highest = max(values)
+    span = highest - min(values)
+    if span <= 0.0:
+        return None
+    count = len(samples)
+    mean_t = sum(times) / count
+    centered = [t - mean_t for t in times]
+    sxx = sum(c * c for c in centered)
+    if sxx <= 0.0:
+        return None
+
+    best = None
+    for step in _PLATEAU_STEPS:
+        plateau = highest + span * step
+        logs = [math.log(plateau - v) for v in values]
+        mean_y = sum(logs) / count
+        slope = sum(c * y for c, y in zip(centered, logs)) / sxx
+        if slope >= 0.0:
+            continue
+        amplitude = math.exp(mean_y - slope * mean_t)
+        tau = -1.0 / slope
+        residual = sum((v - (plateau - amplitude * math.exp(-t / tau))) ** 2 for t, v in zip(times, values))
+        if best is None or residual < best.residual:
+            best = ExponentialFit(plateau, amplitude, tau, residual)
+    return best
+
+
+class CoolingModel:
+    """Predicts the time for the oven to cool once the cryogen is enabled, from the cooling curves of recent
+    cycles"""
+
+    def __init__(self, threshold: float, history: int = DEFAULT_HISTORY, margin: float = DEFAULT_MARGIN):
+        self.threshold = threshold
+        self.margin = margin
+        # Signal readings of each recent cycle, in seconds since the cryogen was enabled
+        self.cycles: typing.Deque[typing.List[typing.Tuple[float, float]]] = collections.deque(maxlen=history)
+        # Seconds each recent cycle took to reach the threshold
+        self.actual: typing.Deque[float] = collections.deque(maxlen=history)
+        self._fit: typing.Optional[ExponentialFit] = None
+
+    def add_cycle(self, samples: typing.Sequence[typing.Tuple[float, float]], actual: typing.Optional[float]):
+        """Add the readings of a cycle and the seconds it took to cool, if it did"""
+        if samples:
+            self.cycles.append(list(samples))
+        if actual is not None:
+            self.actual.append(actual)
+        self._fit = None
+
+    def fit(self) -> typing.Optional[ExponentialFit]:
+        if self._fit is None and self.cycles:
+            self._fit = fit_exponential([sample for cycle in self.cycles for sample in cycle])
+        return self._fit
+
+    def predict(self) -> typing.Optional[float]:
+        """Seconds the oven is expected to take to cool, or None without enough history"""
+        if not self.actual:
+            return None
+        fit = self.fit()
+        if fit is None:
+            return None
+        return fit.time_to(self.threshold)
+
+    def lead(self) -> typing.Optional[float]:
+        """Seconds before the oven has to be cool that the cryogen should be enabled, including a margin for the
+        spread of recent cycles"""
+        predicted = self.predict()
+        if predicted is None:
+            return None
+        spread = statistics.stdev(self.actual) if len(self.actual) > 1 else 0.0
+        return predicted + self.margin + 2.0 * spread
+
+
+_models: 'weakref.WeakKeyDictionary[Interface, CoolingModel]' = weakref.WeakKeyDictionary()
+
+
+def oven_cooling(interface: 'Interface', threshold: float) -> CoolingModel:
+    """Get the cooling model of the oven of an instrument"""
+    model = _models.get(interface)
+    if model is None:
+        model = CoolingModel(threshold)
+        _models[interface] = model
+    return model
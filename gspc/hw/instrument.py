@@ -60,10 +60,17 @@ class Instrument(Interface):
         11: DOT_EVAC_PORT_12,
     }
 
-    def __init__(self, loop: asyncio.AbstractEventLoop):
+    # Hz the streamed analog channels are sampled at
+    STREAM_SCAN_RATE = 100.0
+    # Seconds of streamed flow signal averaged for each reading
+    FLOW_SIGNAL_SECONDS = 0.5
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, stream: bool = False):
         Interface.__init__(self, loop)
 
-        self._lj = LabJack()
+        # Thermocouple readings use the extended features, which the stream does not support
+        self._lj = LabJack(stream=(self.AIN_FLOW, self.AIN_OVEN_TEMPERATURE) if stream else (),
+                           scan_rate=self.STREAM_SCAN_RATE)
         #self._flow = Flow()
         self._pressure = Pressure("COM2")
         self._ssv = SSV("COM1")
@@ -98,8 +105,52 @@ class Instrument(Interface):
         return await self._pressure.read()
 
     async def get_oven_temperature_signal(self) -> float:
+        signal = self._lj.streamed(self.AIN_OVEN_TEMPERATURE)
+        if signal is not None:
+            return signal
         return await self._lj.read_analog(self.AIN_OVEN_TEMPERATURE)
 
+    async def _read_signals(self, names: typing.Sequence[str]) -> typing.Dict[str, typing.Any]:
+        # The LabJack channels are read in one transaction, while the serial devices are read alongside it
+        values = dict()
+        registers: typing.Dict[str, str] = dict()
+        serial = dict()
+        for name in names:
+            if name == "flow":
+                signal = self._lj.streamed(self.AIN_FLOW, self.FLOW_SIGNAL_SECONDS)
+                if signal is None:
+                    registers[name] = f'AIN{self.AIN_FLOW}'
+                else:
+                    values[name] = signal + self.sample_flow_zero_offset
+            elif name == "oven_temperature":
+                signal = self._lj.streamed(self.AIN_OVEN_TEMPERATURE)
+                if signal is None:
+                    registers[name] = f'AIN{self.AIN_OVEN_TEMPERATURE}'
+                else:
+                    values[name] = signal
+            elif name == "thermocouple_0":
+                registers[name] = f'AIN{self.AIN_THERMOCOUPLE_0}_EF_READ_A'
+            elif name == "thermocouple_1":
+                registers[name] = f'AIN{self.AIN_THERMOCOUPLE_1}_EF_READ_A'
+            elif name == "flow_control_output":
+                values[name] = self._flow_control_voltage
+            elif name == "pressure":
+                serial[name] = self._pressure.read()
+            elif name == "ssv_position":
+                serial[name] = self._ssv.read()
+
+        async def read_labjack() -> None:
+            if not registers:
+                return
+            for name, value in zip(registers.keys(), await self._lj.read_names(list(registers.values()))):
+                if name == "flow":
+                    value += self.sample_flow_zero_offset
+                values[name] = value
+
+        results = await asyncio.gather(read_labjack(), *serial.values())
+        values.update(zip(serial.keys(), results[1:]))
+        return {name: values[name] for name in names}
+
     async def get_thermocouple_temperature_0(self) -> float:
         return await self._lj.read_therm(self.AIN_THERMOCOUPLE_0)
 
@@ -152,7 +203,10 @@ class Instrument(Interface):
         return self._flow_control_voltage
 
     async def get_flow_signal(self) -> float:
-        return (await self._lj.read_analog(self.AIN_FLOW)) + self.sample_flow_zero_offset
+        signal = self._lj.streamed(self.AIN_FLOW, self.FLOW_SIGNAL_SECONDS)
+        if signal is None:
+            signal = await self._lj.read_analog(self.AIN_FLOW)
+        return signal + self.sample_flow_zero_offset
 
     @staticmethod
     def _to_flow_control_voltage(flow: float):
@@ -201,9 +255,8 @@ class Instrument(Interface):
         _LOGGER.info(f"Failed to adjust flow {measured_flow:.2f} to target {flow:.2f}")
 
     async def log_flow(self):
-        measured_flow = await self.get_flow_signal()
-        volts = await self.get_flow_control_output()
-        _LOGGER.info(f"Current flow: {measured_flow:.3f}, volts = {volts:.3f}")
+        snapshot = await self.read_snapshot(("flow", "flow_control_output"))
+        _LOGGER.info(f"Current flow: {snapshot['flow']:.3f}, volts = {snapshot['flow_control_output']:.3f}")
 
     async def increment_flow(self, flow: float, multiplier: float):
         if self._flow_control_voltage is None:
@@ -303,22 +356,32 @@ class Instrument(Interface):
     async def get_display_pfp_pressure(self) -> float:
         return self._pfp_pressure
 
+    async def safe_state(self):
+        await self._lj.write_digitals({
+            self.DOT_LN2_FLOW_TO_CRYO_TRAP: False,
+            self.DOT_HEAT_CRYO_TRAP: False,
+            self.DOT_ENABLE_SAMPLE_INTO_VACUUM_CHAMBER: False,
+            self.DOT_CLOSE_OFF_VACUUM_PUMP: False,
+        })
+
     async def initialization(self):
         """ This method is called when gspc starts. Sets al of the digio lines
-            to low (False). """
+            to low (False), in one write before the slow SSV move. """
+        states = {'CIO1': False, 'CIO2': False, 'CIO3': False}
+        for n in range(0, 8):
+            states[f'EIO{n}'] = False
+            states[f'FIO{n}'] = False
+        await self._lj.write_digitals(states)
         await self.set_ssv(2)
         await self.valve_load()
-        await self._lj.write_digital(f'CIO1', False)
-        await self._lj.write_digital(f'CIO2', False)
-        await self._lj.write_digital(f'CIO3', False)
-        for n in range(0, 8):
-            await self._lj.write_digital(f'EIO{n}', False)
-            await self._lj.write_digital(f'FIO{n}', False)
 
     async def shutdown(self):
+        await self.safe_state()
         await self.initialization()
         await self.set_high_pressure_valve(True)
         await self.set_cryo_heater(False)
         await self.set_flow(50)   #changed from 15 (~50% flow) to 50 on 11/06/25 to flush drier with full flow after run completes. 
         await self.set_overflow(True)
         self._flow_control_voltage = None
+        _LOGGER.info(f"LabJack writes combined into {self._lj.write_transactions} transactions, "
+                     f"{self._lj.round_trips_saved} round trips saved")
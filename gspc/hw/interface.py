@@ -1,16 +1,85 @@
 import asyncio
+import logging
+import time
 import typing
 from abc import ABC, abstractmethod
+from gspc.sensors import SensorHub, Signal
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Snapshot:
+    """Readings of several signals taken together"""
+    __slots__ = ("time", "readings")
+
+    def __init__(self, taken: float, readings: typing.Dict[str, typing.Any]):
+        # Wall clock time the readings were requested at
+        self.time = taken
+        self.readings = readings
+
+    def __getitem__(self, name: str) -> typing.Any:
+        return self.readings[name]
 
 
 class Interface(ABC):
     """The abstract interface to the hardware control"""
 
+    # Signals a snapshot can read, and the method that reads each one on its own
+    SNAPSHOT_SIGNALS = {
+        "flow": "get_flow_signal",
+        "flow_control_output": "get_flow_control_output",
+        "pressure": "get_pressure",
+        "oven_temperature": "get_oven_temperature_signal",
+        "thermocouple_0": "get_thermocouple_temperature_0",
+        "thermocouple_1": "get_thermocouple_temperature_1",
+        "ssv_position": "get_ssv_cp",
+    }
+
+    # Seconds between acquisitions of the slow signals while they have subscribers
+    THERMOCOUPLE_PERIOD = 10.0
+    PFP_PRESSURE_PERIOD = 2.0
+
     def __init__(self, loop: asyncio.AbstractEventLoop):
         self._loop = loop
 
         self.sample_flow_zero_offset: float = -1.4
 
+        # Readings shared between the consumers of each signal.  The reads look the methods up when called, so
+        # they go through any wrapper installed on the instance.
+        self.sensors = SensorHub()
+        self.sensors.signal("flow", lambda: self.get_flow_signal())
+        self.sensors.signal("pressure", lambda: self.get_pressure())
+        self.sensors.signal("oven_temperature", lambda: self.get_oven_temperature_signal())
+        self.sensors.signal("thermocouple_0", lambda: self.get_thermocouple_temperature_0(),
+                            self.THERMOCOUPLE_PERIOD)
+        self.sensors.signal("thermocouple_1", lambda: self.get_thermocouple_temperature_1(),
+                            self.THERMOCOUPLE_PERIOD)
+        self.sensors.signal("display_pfp_pressure", lambda: self.get_display_pfp_pressure())
+
+    def pfp_pressure_signal(self, ssv_index: typing.Optional[int] = None) -> Signal:
+        """The shared readings of the PFP pressure of a selector position"""
+        return self.sensors.signal(f"pfp_pressure/{ssv_index}", lambda: self.get_pfp_pressure(ssv_index),
+                                   self.PFP_PRESSURE_PERIOD)
+
+    async def _read_signals(self, names: typing.Sequence[str]) -> typing.Dict[str, typing.Any]:
+        """Read the signals of a snapshot, all at once by default"""
+        values = await asyncio.gather(*[getattr(self, self.SNAPSHOT_SIGNALS[name])() for name in names])
+        return dict(zip(names, values))
+
+    async def read_snapshot(self, signals: typing.Iterable[str]) -> Snapshot:
+        """Read several signals (names in SNAPSHOT_SIGNALS) together, as one timestamped record.  The readings
+        are also shared through the sensor hub."""
+        names = tuple(signals)
+        for name in names:
+            if name not in self.SNAPSHOT_SIGNALS:
+                raise KeyError(name)
+        taken = time.time()
+        snapshot = Snapshot(taken, await self._read_signals(names))
+        for name, value in snapshot.readings.items():
+            if value is not None and name in self.sensors:
+                self.sensors.signal(name).publish(value)
+        return snapshot
+
     @abstractmethod
     async def get_pressure(self) -> float:
         """Read the current pressure"""
@@ -116,6 +185,11 @@ class Interface(ABC):
         """Perform a flow increment in the direction of the multiplier"""
         pass
 
+    async def log_flow(self):
+        """Log the current flow and control output"""
+        snapshot = await self.read_snapshot(("flow", "flow_control_output"))
+        _LOGGER.info(f"Current flow: {snapshot['flow']}, control = {snapshot['flow_control_output']}")
+
     @abstractmethod
     async def get_ssv_cp(self) -> int:
         """ Read current SSV position """
@@ -151,6 +225,12 @@ class Interface(ABC):
         """Set the PFP valve (open or close)"""
         pass
 
+    async def safe_state(self):
+        """Turn off the outputs that are unsafe to leave on (cryogen, trap heater, sample and vacuum) as quickly
+        as possible, ahead of the rest of the shutdown"""
+        await asyncio.gather(self.set_cryogen(False), self.set_cryo_heater(False),
+                             self.set_sample(False), self.set_vacuum(False))
+
     async def shutdown(self):
         """Perform a shutdown, putting the hardware into a safe mode"""
-        pass
+        await self.safe_state()
@@ -1,18 +1,65 @@
+import array
 import asyncio
 import logging
+import time
 import typing
-from threading import Thread
+from threading import Thread, Lock
 from labjack import ljm
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class LabJack:
-    """A simple interface to a LabJack device that wraps the vendor library in an asyncio friendly interface."""
+class _Ring:
+    """A preallocated ring of the latest samples of a channel"""
+
+    def __init__(self, capacity: int):
+        self._samples = array.array('d', bytes(8 * capacity))
+        self._next = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self._samples[self._next] = value
+        self._next = (self._next + 1) % len(self._samples)
+        self.count = min(self.count + 1, len(self._samples))
 
-    def __init__(self):
+    def latest(self, count: int = 1) -> typing.List[float]:
+        count = min(count, self.count)
+        start = self._next - count
+        if start >= 0:
+            return self._samples[start:self._next].tolist()
+        return self._samples[start:].tolist() + self._samples[:self._next].tolist()
+
+
+class LabJack:
+    """A simple interface to a LabJack device that wraps the vendor library in an asyncio friendly interface.
+    Writes issued within a short window of each other are combined into a single transaction."""
+
+    # Seconds a write waits for others to combine with
+    WRITE_WINDOW = 0.002
+    # Seconds of samples kept for each streamed channel
+    STREAM_HISTORY = 10.0
+    # Seconds without a streamed sample before reads go to the device again
+    STREAM_STALE = 1.0
+
+    def __init__(self, stream: typing.Sequence[int] = (), scan_rate: float = 100.0):
+        """Create the interface, streaming the analog channels given at the scan rate (Hz) when there are any.
+        Streamed channels are read from the latest samples instead of a round trip to the device."""
         self._loop = asyncio.new_event_loop()
         self._handle = None
+        self._stream_channels = tuple(stream)
+        self._scan_rate = scan_rate
+        self._stream_lock = Lock()
+        self._stream: typing.Dict[int, _Ring] = dict()
+        self._stream_time: typing.Optional[float] = None
+        # Register address and data type of each name written, resolved once
+        self._addresses: typing.Dict[str, typing.Tuple[int, int]] = dict()
+        # Writes waiting for the window to close, by register address in the order issued
+        self._pending: typing.Dict[int, typing.Tuple[int, float]] = dict()
+        self._pending_done: typing.List[asyncio.Future] = list()
+        self._flush_handle: typing.Optional[asyncio.TimerHandle] = None
+        # Writes requested and the transactions they were sent in
+        self.writes = 0
+        self.write_transactions = 0
         # Use a dedicated thread, since we have no idea how the vendor library handles concurrency
         self._thread = Thread(target=self._run, daemon=True)
         self._thread.start()
@@ -23,13 +70,118 @@ class LabJack:
         _LOGGER.debug(
             f'Opened a LabJack with Device type: {info[0]}, Connection type: {info[1]}, Serial number: {info[2]}')
 
+        if self._stream_channels:
+            self._start_stream()
+
         asyncio.set_event_loop(self._loop)
         self._loop.run_forever()
 
+    def _start_stream(self):
+        names = [f'AIN{channel}' for channel in self._stream_channels]
+        addresses, _ = ljm.namesToAddresses(len(names), names)
+        # Read about ten times a second, so samples are never more than that old
+        scans_per_read = max(1, int(self._scan_rate / 10))
+        try:
+            self._scan_rate = ljm.eStreamStart(self._handle, scans_per_read, len(addresses), addresses,
+                                               self._scan_rate)
+        except ljm.LJMError:
+            _LOGGER.warning("Unable to start the LabJack stream, reading channels on demand", exc_info=True)
+            return
+        capacity = max(1, int(self._scan_rate * self.STREAM_HISTORY))
+        self._stream = {channel: _Ring(capacity) for channel in self._stream_channels}
+        _LOGGER.debug(f'Streaming LabJack channels {names} at {self._scan_rate:.1f} Hz')
+        Thread(name="LabJackStream", target=self._read_stream, args=(scans_per_read,), daemon=True).start()
+
+    def _read_stream(self, scans_per_read: int):
+        channels = self._stream_channels
+        while self._handle is not None:
+            try:
+                data, _, _ = ljm.eStreamRead(self._handle)
+            except ljm.LJMError:
+                _LOGGER.warning("LabJack stream stopped", exc_info=True)
+                break
+            with self._stream_lock:
+                # Scans are interleaved, one sample of each channel in turn
+                for i, value in enumerate(data):
+                    self._stream[channels[i % len(channels)]].add(value)
+                self._stream_time = time.monotonic()
+        with self._stream_lock:
+            self._stream_time = None
+
+    def streamed(self, channel: int, seconds: float = 0.0) -> typing.Optional[float]:
+        """Get the mean of the streamed samples of a channel over the latest seconds (or the latest sample), or
+        None if the channel is not streamed or the stream has stalled"""
+        ring = self._stream.get(channel)
+        if ring is None:
+            return None
+        with self._stream_lock:
+            if self._stream_time is None or time.monotonic() - self._stream_time > self.STREAM_STALE:
+                return None
+            samples = ring.latest(max(1, int(seconds * self._scan_rate)))
+        if not samples:
+            return None
+        return sum(samples) / len(samples)
+
+    @property
+    def round_trips_saved(self) -> int:
+        """Round trips avoided by combining writes"""
+        return self.writes - self.write_transactions
+
+    def _resolve(self, names: typing.Sequence[str]) -> typing.List[typing.Tuple[int, int]]:
+        unknown = [name for name in names if name not in self._addresses]
+        if unknown:
+            addresses, data_types = ljm.namesToAddresses(len(unknown), unknown)
+            for name, address, data_type in zip(unknown, addresses, data_types):
+                self._addresses[name] = (address, data_type)
+        return [self._addresses[name] for name in names]
+
+    def _flush(self) -> None:
+        """Send the pending writes as one transaction, called in the LabJack thread"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        pending = self._pending
+        done = self._pending_done
+        self._pending = dict()
+        self._pending_done = list()
+        addresses = list(pending.keys())
+        data_types = [data_type for data_type, _ in pending.values()]
+        values = [value for _, value in pending.values()]
+        self.write_transactions += 1
+        try:
+            ljm.eWriteAddresses(self._handle, len(addresses), addresses, data_types, values)
+        except Exception as e:
+            for future in done:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        _LOGGER.debug(f'Write LabJack registers {dict(zip(addresses, values))}, '
+                      f'{self.round_trips_saved} round trips saved')
+        for future in done:
+            if not future.done():
+                future.set_result(None)
+
+    async def _write(self, writes: typing.Mapping[str, float]) -> None:
+        """Queue writes in the LabJack thread, completing once the transaction they are combined into is sent"""
+        for (address, data_type), value in zip(self._resolve(list(writes.keys())), writes.values()):
+            if address in self._pending:
+                # A second write to the same register must follow the first, not replace it
+                self._flush()
+            self._pending[address] = (data_type, value)
+        self.writes += len(writes)
+        done = self._loop.create_future()
+        self._pending_done.append(done)
+        if self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.WRITE_WINDOW, self._flush)
+        await done
+
     async def read_analog(self, *addresses: int) -> float:
         """Read one or more analog values from the specified addresses."""
 
         async def execute_read() -> typing.Tuple[float, ...]:
+            self._flush()
             if len(addresses) > 1:
                 names = []
                 for add in addresses:
@@ -45,6 +197,17 @@ class LabJack:
 
         return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(execute_read(), self._loop))
 
+    async def read_names(self, names: typing.Sequence[str]) -> typing.Tuple[float, ...]:
+        """Read several registers by name in a single transaction"""
+
+        async def execute_read() -> typing.Tuple[float, ...]:
+            self._flush()
+            result = ljm.eReadNames(self._handle, len(names), list(names))
+            _LOGGER.debug(f'Read LabJack registers {names}: {result}')
+            return tuple(result)
+
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(execute_read(), self._loop))
+
     async def read_therm(self, address: int, *, ef_read: str = "A") -> float:
         """Read a thermistor/thermocouple value via AIN EF (e.g., AIN#_EF_READ_A)."""
         ef_read = ef_read.upper()
@@ -52,6 +215,7 @@ class LabJack:
             raise ValueError("ef_read must be 'A' or 'B'")
 
         async def execute_read() -> float:
+            self._flush()
             cmd = f'AIN{address}_EF_READ_{ef_read}'
             result = ljm.eReadName(self._handle, cmd)
             _LOGGER.debug(f'Read LabJack therm value {cmd}: {result}')
@@ -78,6 +242,7 @@ class LabJack:
             values.append(value)
 
         async def execute_write() -> None:
+            self._flush()
             ljm.eWriteNames(self._handle, len(names), names, values)
             _LOGGER.debug(
                 f'Configured LabJack AIN{address} EF index {ef_index} with {config}')
@@ -108,17 +273,15 @@ class LabJack:
     async def write_analog(self, address: int, value: float) -> None:
         """Set a single analog channel."""
 
-        async def execute_write() -> None:
-            cmd = f'DAC{address}'
-            ljm.eWriteName(self._handle, cmd, value)
-            _LOGGER.debug(f'Write LabJack analog channel {address}: {value:.2f}')
-
-        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(execute_write(), self._loop))
+        _LOGGER.debug(f'Write LabJack analog channel {address}: {value:.2f}')
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(
+            self._write({f'DAC{address}': value}), self._loop))
 
     async def read_digital(self, address: str) -> bool:
         """Read a single digital channel."""
 
         async def execute_read() -> bool:
+            self._flush()
             cmd = f'{address}'
             result = ljm.eReadName(self._handle, cmd)
             if result:
@@ -138,22 +301,29 @@ class LabJack:
         else:
             state = 1
 
-        async def execute_write() -> None:
-            cmd = f'{address}'
-            ljm.eWriteName(self._handle, cmd, state)
-            if state != 0:
-                _LOGGER.debug(f'Write LabJack digital channel {address}: HIGH')
-            else:
-                _LOGGER.debug(f'Write LabJack digital channel {address}: LOW')
+        if state != 0:
+            _LOGGER.debug(f'Write LabJack digital channel {address}: HIGH')
+        else:
+            _LOGGER.debug(f'Write LabJack digital channel {address}: LOW')
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(
+            self._write({address: state}), self._loop))
 
-        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(execute_write(), self._loop))
+    async def write_digitals(self, states: typing.Mapping[str, bool]) -> None:
+        """Set several digital channels in a single transaction."""
+        writes = {address: 0 if state else 1 for address, state in states.items()}
+        _LOGGER.debug(f'Write LabJack digital channels {writes}')
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._write(writes), self._loop))
 
     async def disconnect(self) -> None:
         """Disconnect from the LabJack, no further communication is possible"""
 
         async def execute_action():
+            self._flush()
+            if self._stream:
+                ljm.eStreamStop(self._handle)
             ljm.close(self._handle)
-            _LOGGER.debug(f'LabJack disconnected')
+            _LOGGER.debug(f'LabJack disconnected, {self.round_trips_saved} of {self.writes} write round trips '
+                          f'saved by combining')
             self._handle = None
 
         return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(execute_action(), self._loop))
@@ -6,8 +6,9 @@ import time
 import typing
 import logging
 import asyncio
-from threading import Thread
+import re
 from . import claimed_serial_ports
+from .transport import SerialPort, Session
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,27 +16,27 @@ _LOGGER = logging.getLogger(__name__)
 class _Controller:
     OMEGA_WAIT = 0.35  # time to wait after a write and before a read.
     TERMINATOR = '\r'  # Omega terminator string is usually \r
-
-    def __init__(self):
-        self._loop = asyncio.new_event_loop()
-        self._port = None
-        self._thread = Thread(target=self._run, daemon=True)
-        self._thread.start()
-
-    def _run(self):
-        asyncio.set_event_loop(self._loop)
-        self._loop.run_forever()
-
-    def _omega_command(self, cmd: str, noread: bool = False) -> typing.Optional[float]:
-        self._port.flushInput()
-        self._port.write(cmd.encode())
-
-        time.sleep(self.OMEGA_WAIT)
-
-        if noread is True:
+    # A reply, ended by the terminator after the leading byte
+    REPLY = re.compile(rb".[^\r]*\r", re.DOTALL)
+    # Seconds a command waits for its reply
+    DEADLINE = 1.0
+
+    def __init__(self, port: serial.Serial):
+        self._port = SerialPort(port)
+
+    async def _omega_command(self, cmd: str, noread: bool = False) -> typing.Optional[str]:
+        async def execute(session: Session) -> typing.Optional[bytes]:
+            if noread is True:
+                session.discard_input()
+                session.write(cmd.encode())
+                # Hold the port until the controller is ready for the next command
+                await asyncio.sleep(self.OMEGA_WAIT)
+                return None
+            return await session.command(cmd.encode(), self.REPLY, self.DEADLINE)
+
+        sp = await self._port.exchange(execute)
+        if sp is None:
             return None
-
-        sp = self._port.read(1024)
         """ The returned data has an unknown byte at the beginning. This
             byte cannot be decoded using .decode('utf-8'). Currently stripping
             the first byte before decoding byte string.
@@ -54,7 +55,7 @@ class _Controller:
             Typical command *01X01\r
         """
         cmd = f'*{address:02d}X01{self.TERMINATOR}'
-        rt = self._omega_command(cmd)
+        rt = await self._omega_command(cmd)
         try:
             return float(rt)
         except ValueError:
@@ -108,12 +109,9 @@ class _Controller:
             Typical command *01R01\r
         """
 
-        async def execute_read() -> typing.Optional[float]:
-            cmd = f'*{address:02d}R01{self.TERMINATOR}'
-            rt = self._omega_command(cmd)
-            return self._decode_value(rt)
-
-        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(execute_read(), self._loop))
+        cmd = f'*{address:02d}R01{self.TERMINATOR}'
+        rt = await self._omega_command(cmd)
+        return self._decode_value(rt)
 
     async def set_sp1(self, value: float, address: int = 1) -> None:
         """ Sets setpoint1 to value on an Omega with address: add """
@@ -121,25 +119,22 @@ class _Controller:
         address = int(address)
         value = float(value)
 
-        async def execute_write() -> None:
-            hex_sp = self._encode_value(value)
-            cmd = f'*{address:02d}W01{hex_sp}{self.TERMINATOR}'
-            self._omega_command(cmd, noread=True)
-
-        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(execute_write(), self._loop))
+        hex_sp = self._encode_value(value)
+        cmd = f'*{address:02d}W01{hex_sp}{self.TERMINATOR}'
+        await self._omega_command(cmd, noread=True)
 
 
 class Flow(_Controller):
     DELAY = 0.05
 
     def __init__(self, port=None):
-        _Controller.__init__(self)
         if port is None:
-            self._port = self._autodetect()
+            port = self._autodetect()
         else:
-            self._port = serial.Serial(port=port, baudrate=19200, timeout=self.DELAY)
-        claimed_serial_ports.insert(self._port.name)
-        _LOGGER.debug(f'Opened an Omega flow controller on port {self._port.name}')
+            port = serial.Serial(port=port, baudrate=19200, timeout=self.DELAY)
+        _Controller.__init__(self, port)
+        claimed_serial_ports.add(port.name)
+        _LOGGER.debug(f'Opened an Omega flow controller on port {port.name}')
 
     def _is_on_port(self, port: serial.Serial) -> bool:
         port.write('\rA\r'.encode())
@@ -162,13 +157,13 @@ class Temperature(_Controller):
     DELAY = 0.3
 
     def __init__(self, port=None):
-        _Controller.__init__(self)
         if port is None:
-            self._port = self._autodetect()
+            port = self._autodetect()
         else:
-            self._port = serial.Serial(port=port, baudrate=9600, timeout=self.DELAY)
-        claimed_serial_ports.insert(self._port.name)
-        _LOGGER.debug(f'Opened an Omega temperature controller on port {self._port.name}')
+            port = serial.Serial(port=port, baudrate=9600, timeout=self.DELAY)
+        _Controller.__init__(self, port)
+        claimed_serial_ports.add(port.name)
+        _LOGGER.debug(f'Opened an Omega temperature controller on port {port.name}')
 
     def _is_on_port(self, port: serial.Serial) -> bool:
         port.write('*01R01\r'.encode())
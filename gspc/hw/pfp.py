@@ -4,14 +4,24 @@ import typing
 import re
 import serial
 import serial.tools.list_ports
-from threading import Thread
 from . import claimed_serial_ports
+from .transport import SerialPort, Session
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class PFP:
     TIMEOUT = 1
+    # Seconds a menu command waits for the prompt that ends its response
+    PROMPT_DEADLINE = 2.0
+    # Seconds a valve command waits for the prompt, after the valve is selected
+    VALVE_DEADLINE = 6.0
+    # Seconds of further input taken after a prompt, so trailing characters are not left for the next command
+    SETTLE = 0.05
+
+    # Any menu prompt, and the unload menu prompt
+    PROMPT = re.compile(rb">")
+    UNLOAD_PROMPT = re.compile(rb"UNLOAD>")
 
     def __init__(self, port: typing.Optional[typing.Union[str, serial.Serial]] = None):
         if not isinstance(port, serial.Serial):
@@ -21,11 +31,7 @@ class PFP:
                 port = serial.Serial(port=port, baudrate=9600,
                                      timeout=self.TIMEOUT, inter_byte_timeout=0, write_timeout=0)
         claimed_serial_ports.add(port.port)
-        self._port = port
-
-        self._loop = asyncio.new_event_loop()
-        self._thread = Thread(target=self._run, daemon=True)
-        self._thread.start()
+        self._port = SerialPort(port)
 
     @classmethod
     def detect_optional(cls, com: str) -> typing.Optional["PFP"]:
@@ -34,7 +40,7 @@ class PFP:
         except (ValueError, serial.SerialException, IOError):
             return None
         try:
-            if not PFP._get_unload_prompt(port):
+            if not SerialPort(port).exchange_blocking(PFP._get_unload_prompt):
                 port.close()
                 return None
         except IOError:
@@ -47,32 +53,25 @@ class PFP:
         print(f'found pfp on {com}')
         return cls(port)
 
-    def _run(self):
-        asyncio.set_event_loop(self._loop)
-        self._loop.run_forever()
+    @staticmethod
+    async def _menu_command(session: Session, command: bytes) -> str:
+        response = await session.command(command, PFP.PROMPT, PFP.PROMPT_DEADLINE, PFP.SETTLE)
+        return response.decode("utf-8", errors="replace")
 
     @staticmethod
-    def _get_unload_prompt(port: serial.Serial) -> bool:
+    async def _get_unload_prompt(session: Session) -> bool:
         try:
-            port.reset_input_buffer()
-            port.write(b'\r')
-            resp = port.readlines()
-            resp = ''.join(map(str, resp))
+            resp = await PFP._menu_command(session, b'\r')
             if "UNLOAD>" in resp:
                 return True
             for i in range(5):
                 if "AS>" in resp:
                     break
-                port.reset_input_buffer()
-                port.write(b'Q\r')
-                resp = port.readlines()
-                resp = ''.join(map(str, resp))
+                resp = await PFP._menu_command(session, b'Q\r')
             else:
                 _LOGGER.info(f'Failed to reach UNLOAD prompt, AS> not found.')
                 return False
-            port.write(b'U\r')
-            resp = port.readlines()
-            resp = ''.join(map(str, resp))
+            resp = await PFP._menu_command(session, b'U\r')
             if "UNLOAD>" in resp:
                 return True
         except (ValueError, serial.SerialException) as e:
@@ -81,8 +80,8 @@ class PFP:
         _LOGGER.info(f'Failed to reach UNLOAD prompt.')
         return False
 
-    def _prompt_unload(self):
-        if not self._get_unload_prompt(self._port):
+    async def _prompt_unload(self, session: Session):
+        if not await self._get_unload_prompt(session):
             _LOGGER.warning("Failed to get unload prompt from pfp")
             #raise RuntimeError("Failed to get unload prompt")
 
@@ -92,7 +91,7 @@ class PFP:
                 continue
             port = serial.Serial(port=port_info.name, baudrate=9600,
                                  timeout=self.TIMEOUT, inter_byte_timeout=0, write_timeout=0)
-            if not self._get_unload_prompt(port):
+            if not SerialPort(port).exchange_blocking(self._get_unload_prompt):
                 continue
             return port
         raise RuntimeError("PFP not found")
@@ -101,48 +100,37 @@ class PFP:
         """Read the current pressure
            updated with readlines method and regex decoding. GSD """
 
-        async def execute_read() -> float:
-            self._prompt_unload()
-            self._port.write(b"P\r")
-            response = self._port.readlines()
-            response = ''.join([s.decode("utf-8") for s in response])
+        async def execute_read(session: Session) -> float:
+            await self._prompt_unload(session)
+            response = await session.command(b"P\r", self.UNLOAD_PROMPT, self.PROMPT_DEADLINE, self.SETTLE)
+            response = response.decode("utf-8")
             m = re.search(r' (\d+.\d+)', response)
             if m is None:
                 return -1
             return float(m.group(1))
 
-        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(execute_read(), self._loop))
+        return await self._port.exchange(execute_read)
+
+    async def _set_valve(self, command: bytes, action: str, pos: int) -> str:
+        async def execute_write(session: Session) -> str:
+            await self._prompt_unload(session)
+            session.write(command)
+            await asyncio.sleep(0.5)
+            session.write(b"%d\r" % pos)
+            _LOGGER.info(f"Attempting to {action} PFP valve {pos}")
+            # The unload prompt returns once the valve has moved
+            response = await session.read_until(self.UNLOAD_PROMPT, self.VALVE_DEADLINE, self.SETTLE)
+            response = response.decode("utf-8")
+            return response[24:-8].strip()
+
+        return await self._port.exchange(execute_write)
 
     async def open_valve(self, pos: int) -> str:
         """Open a sample valve
            switched to readlines method
            returns valve and status """
-
-        async def execute_write() -> str:
-            self._prompt_unload()
-            self._port.write(b"O\r")
-            await asyncio.sleep(0.5)
-            self._port.write(b"%d\r" % pos)
-            _LOGGER.info(f"Attempting to Open PFP valve {pos}")
-            await asyncio.sleep(5)
-            response = self._port.readlines()
-            response = ''.join([s.decode("utf-8") for s in response])
-            return response[24:-8].strip()
-
-        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(execute_write(), self._loop))
+        return await self._set_valve(b"O\r", "Open", pos)
 
     async def close_valve(self, pos: int) -> str:
         """Close a sample valve"""
-
-        async def execute_write() -> str:
-            self._prompt_unload()
-            self._port.write(b"C\r")
-            await asyncio.sleep(0.5)
-            self._port.write(b"%d\r" % pos)
-            _LOGGER.info(f"Attempting to Close PFP valve {pos}")
-            await asyncio.sleep(5)
-            response = self._port.readlines()
-            response = ''.join([s.decode("utf-8") for s in response])
-            return response[24:-8].strip()
-
-        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(execute_write(), self._loop))
+        return await self._set_valve(b"C\r", "Close", pos)
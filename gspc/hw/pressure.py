@@ -1,10 +1,9 @@
-import asyncio
 import logging
 import typing
 import serial
 import serial.tools.list_ports
-from threading import Thread
 from . import claimed_serial_ports
+from .transport import SerialPort
 
 
 class Pressure:
@@ -17,15 +16,7 @@ class Pressure:
             port = serial.Serial(port=port, baudrate=9600,
                                  timeout=self.TIMEOUT, inter_byte_timeout=0, write_timeout=0)
         claimed_serial_ports.add(port.port)
-        self._port = port
-
-        self._loop = asyncio.new_event_loop()
-        self._thread = Thread(target=self._run, daemon=True)
-        self._thread.start()
-
-    def _run(self):
-        asyncio.set_event_loop(self._loop)
-        self._loop.run_forever()
+        self._port = SerialPort(port)
 
     def _is_on_port(self, port: serial.Serial) -> bool:
         try:
@@ -56,15 +47,11 @@ class Pressure:
     async def read(self) -> float:
         """Read the pressure"""
 
-        async def execute_read() -> float:
-            self._port.write(b"p\r")
-            v = self._port.readline()
-            try:
-                v = v.strip().split()[0]
-            except IndexError:
-                # Added try/except due to an occasional empty read.
-                return None
-            v = float(v)
-            return v
-
-        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(execute_read(), self._loop))
+        v = await self._port.command(b"p\r", deadline=self.TIMEOUT)
+        try:
+            v = v.strip().split()[0]
+        except IndexError:
+            # Added try/except due to an occasional empty read.
+            return None
+        v = float(v)
+        return v
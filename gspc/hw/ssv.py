@@ -4,14 +4,16 @@ import re
 import typing
 import serial
 import serial.tools.list_ports
-from threading import Thread
 from . import claimed_serial_ports
+from .transport import SerialPort, Session
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class SSV:
     TIMEOUT = 2
+    # The position reply, complete once the line with the number ends
+    POSITION = re.compile(rb"= \d+[^\r\n]*[\r\n]")
 
     def __init__(self, port: typing.Optional[str] = None):
         if port is None:
@@ -20,15 +22,7 @@ class SSV:
             port = serial.Serial(port=port, baudrate=9600,
                                  timeout=self.TIMEOUT, inter_byte_timeout=0, write_timeout=0)
         claimed_serial_ports.add(port.port)
-        self._port = port
-
-        self._loop = asyncio.new_event_loop()
-        self._thread = Thread(target=self._run, daemon=True)
-        self._thread.start()
-
-    def _run(self):
-        asyncio.set_event_loop(self._loop)
-        self._loop.run_forever()
+        self._port = SerialPort(port)
 
     def _is_on_port(self, port: serial.Serial) -> bool:
         try:
@@ -61,26 +55,22 @@ class SSV:
     async def read(self) -> int:
         """Read the current position"""
 
-        async def execute_read() -> int:
-            self._port.write(b"CP\r")
-            v = self._port.readline()
-            v = self._parse_cp(v.decode())
-            # handle port 16 differently. If 16 return 0
-            # v = 0 if v == 16 else v
-            # changed this behavior 231113
-            return int(v)
-
-        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(execute_read(), self._loop))
+        v = await self._port.command(b"CP\r", self.POSITION, self.TIMEOUT)
+        v = self._parse_cp(v.decode())
+        # handle port 16 differently. If 16 return 0
+        # v = 0 if v == 16 else v
+        # changed this behavior 231113
+        return int(v)
 
     async def set(self, pos: int) -> None:
         """Set the current position. When pos is 0 send SSV to position 16 """
 
-        async def execute_write() -> None:
-            nonlocal pos
-            pos = 16 if pos == 0 else pos
-            self._port.flushOutput()
-            self._port.write(b"GO%d\r" % pos)
+        pos = 16 if pos == 0 else pos
+
+        async def execute_write(session: Session) -> None:
+            session.discard_output()
+            session.write(b"GO%d\r" % pos)
             await asyncio.sleep(0.1)
-            self._port.flushInput()
+            session.discard_input()
 
-        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(execute_write(), self._loop))
+        await self._port.exchange(execute_write)
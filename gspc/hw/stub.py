@@ -0,0 +1,124 @@
+import asyncio
+import math
+import typing
+
+from .interface import Interface
+
+
+class Stub(Interface):
+    """A hardware interface that performs no I/O, responding with nominal instrument readings.  Used to run
+    schedules offline, such as in virtual time to validate them before loading them on the instrument."""
+
+    SAMPLE_PRESSURE_RISE = 300.0
+
+    def __init__(self, loop: typing.Optional[asyncio.AbstractEventLoop] = None):
+        Interface.__init__(self, loop)
+
+        self.sample_pressure = 10.0
+        self.sample_flow = 1.0
+        self.flow_control = None
+        self.oven_temperature = 1.0
+        self.thermocouple_0 = 20.0
+        self.thermocouple_1 = 20.0
+        self.pfp_pressure = 20.0
+        self.ssv_position = 2
+        self.sample_open = False
+        self.high_pressure_on = False
+        self.cryogen = False
+        self.cryo_heater = False
+
+    async def get_pressure(self) -> float:
+        return self.sample_pressure
+
+    async def get_pfp_pressure(self, ssv_index: typing.Optional[int] = None) -> float:
+        return self.pfp_pressure
+
+    async def get_display_pfp_pressure(self) -> float:
+        return self.pfp_pressure
+
+    async def get_oven_temperature_signal(self) -> float:
+        return self.oven_temperature
+
+    async def get_thermocouple_temperature_0(self) -> float:
+        return self.thermocouple_0
+
+    async def get_thermocouple_temperature_1(self) -> float:
+        return self.thermocouple_1
+
+    async def set_cryogen(self, enable: bool):
+        self.cryogen = enable
+        if enable and self.oven_temperature < 4.0:
+            self.oven_temperature = 4.0
+
+    async def set_gc_cryogen(self, enable: bool):
+        pass
+
+    async def set_vacuum(self, enable: bool):
+        if enable:
+            self.sample_pressure = 10.0
+
+    async def set_sample(self, enable: bool):
+        if self.sample_open and not enable:
+            self.sample_pressure += self.SAMPLE_PRESSURE_RISE
+        self.sample_open = enable
+
+    async def set_cryo_heater(self, enable: bool):
+        self.cryo_heater = enable
+        if enable and self.oven_temperature > 2.0:
+            self.oven_temperature = 2.0
+
+    async def set_overflow(self, enable: bool):
+        pass
+
+    async def valve_load(self):
+        pass
+
+    async def valve_inject(self):
+        pass
+
+    async def precolumn_in(self):
+        pass
+
+    async def precolumn_out(self):
+        pass
+
+    async def get_flow_control_output(self) -> float:
+        return self.flow_control
+
+    async def get_flow_signal(self) -> float:
+        return self.sample_flow
+
+    async def set_flow(self, flow: float):
+        self.flow_control = flow if math.isfinite(flow) else None
+
+    async def adjust_flow(self, flow: float):
+        await self.set_flow(flow)
+
+    async def increment_flow(self, flow: float, multiplier: float):
+        pass
+
+    async def get_ssv_cp(self) -> int:
+        return self.ssv_position
+
+    async def set_ssv(self, index: int, manual: bool = False):
+        self.ssv_position = index
+        if manual:
+            self.high_pressure_on = True
+
+    async def set_high_pressure_valve(self, enable: bool):
+        self.high_pressure_on = enable
+
+    async def set_evacuation_valve(self, enable: bool):
+        if enable:
+            self.pfp_pressure = 1.0
+
+    async def ready_gcms(self):
+        pass
+
+    async def trigger_gcms(self):
+        pass
+
+    async def set_pfp_valve(self, ssv_index: typing.Optional[int], pfp_valve: int, set_open: bool) -> str:
+        if set_open:
+            self.pfp_pressure = 20.0
+        return "OK"
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import re
+import typing
+import serial
+from threading import Thread, Lock
+
+_LOGGER = logging.getLogger(__name__)
+
+# A response line: something other than line endings, up to the end of the line
+LINE = re.compile(rb"[^\r\n]+[\r\n]")
+
+# Seconds a command waits for a complete response when not given
+DEFAULT_DEADLINE = 2.0
+# Seconds between checks of a port for input while a response is incomplete
+POLL_INTERVAL = 0.005
+
+T = typing.TypeVar('T')
+
+
+class _Reactor:
+    """The thread all the serial ports are served from"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = Thread(name="SerialIO", target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+
+_reactor: typing.Optional[_Reactor] = None
+_reactor_lock = Lock()
+
+
+def _get_reactor() -> _Reactor:
+    global _reactor
+    with _reactor_lock:
+        if _reactor is None:
+            _reactor = _Reactor()
+        return _reactor
+
+
+class Session:
+    """A port held by one command, used from the serial thread"""
+
+    def __init__(self, port: serial.Serial):
+        self._port = port
+
+    def write(self, data: bytes) -> None:
+        self._port.write(data)
+
+    def discard_input(self) -> None:
+        self._port.reset_input_buffer()
+
+    def discard_output(self) -> None:
+        self._port.reset_output_buffer()
+
+    async def read_until(self, terminator: typing.Pattern[bytes], deadline: float = DEFAULT_DEADLINE,
+                         settle: float = 0.0) -> bytes:
+        """Read until the response matches the terminator, or until the deadline (seconds) passes and return what
+        arrived so far.  Input arriving within the settle seconds after the terminator is included too."""
+        loop = asyncio.get_running_loop()
+        end = loop.time() + deadline
+        response = bytearray()
+        while True:
+            waiting = self._port.in_waiting
+            if waiting:
+                response += self._port.read(waiting)
+                if terminator.search(response):
+                    break
+            if loop.time() >= end:
+                _LOGGER.debug(f"Incomplete response on {self._port.port} after {deadline} seconds: {bytes(response)}")
+                return bytes(response)
+            await asyncio.sleep(POLL_INTERVAL)
+        if settle > 0.0:
+            await asyncio.sleep(settle)
+            waiting = self._port.in_waiting
+            if waiting:
+                response += self._port.read(waiting)
+        return bytes(response)
+
+    async def command(self, data: bytes, terminator: typing.Pattern[bytes] = LINE,
+                      deadline: float = DEFAULT_DEADLINE, settle: float = 0.0) -> bytes:
+        """Send a command, discarding any stale input first, and read its response"""
+        self.discard_input()
+        self.write(data)
+        return await self.read_until(terminator, deadline, settle)
+
+
+class SerialPort:
+    """A serial port served from the thread shared by all of them.  Exchanges hold the port one at a time, in the
+    order they were issued, and responses are complete as soon as their terminator arrives instead of after the
+    port timeout."""
+
+    def __init__(self, port: serial.Serial):
+        self._port = port
+        self._reactor = _get_reactor()
+        # Created on the serial thread; waiters acquire it in order
+        self._lock: typing.Optional[asyncio.Lock] = None
+
+    @property
+    def port(self) -> str:
+        return self._port.port
+
+    async def _exchange(self, exchange: typing.Callable[[Session], typing.Awaitable[T]]) -> T:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            return await exchange(Session(self._port))
+
+    async def exchange(self, exchange: typing.Callable[[Session], typing.Awaitable[T]]) -> T:
+        """Run an exchange with the device, holding the port until it completes"""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._exchange(exchange),
+                                                                          self._reactor.loop))
+
+    def exchange_blocking(self, exchange: typing.Callable[[Session], typing.Awaitable[T]]) -> T:
+        """Run an exchange and wait for it, for detecting devices before anything is running"""
+        return asyncio.run_coroutine_threadsafe(self._exchange(exchange), self._reactor.loop).result()
+
+    async def command(self, data: bytes, terminator: typing.Pattern[bytes] = LINE,
+                      deadline: float = DEFAULT_DEADLINE, settle: float = 0.0) -> bytes:
+        """Send a command and read its response"""
+        return await self.exchange(lambda session: session.command(data, terminator, deadline, settle))
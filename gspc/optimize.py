@@ -0,0 +1,279 @@
+import copy
+import logging
+import math
+import typing
+from collections import namedtuple
+from gspc.schedule import Task, known_tasks
+from gspc.compiler import CompiledSchedule, TimelineEntry, parse_task_file
+
+_LOGGER = logging.getLogger(__name__)
+
+
+ANY = object()
+
+Match = namedtuple("Match", ["actuator", "value"], defaults=[ANY])
+Separation = namedtuple("Separation", ["name", "first", "second", "minimum", "adjacent"])
+Violation = namedtuple("Violation", ["name", "first", "second", "required"])
+
+DEFAULT_ACTUATOR_SEPARATION = 1.0
+DEFAULT_RESOLUTION = 1.0
+
+# Minimum times for the physical processes.  An adjacent separation runs from the first command in a task to
+# the second in the task that follows it, otherwise both are in the same task and the second is measured from
+# the latest first command before it.
+DEFAULT_SEPARATIONS: typing.List[Separation] = [
+    Separation("sample flush", Match("sample", False), Match("ssv"), 10.0, True),
+    Separation("GC run", Match("gc_start", False), Match("gc_start", True), 1200.0, True),
+    Separation("GC oven cool-down", Match("gc_ln2", False), Match("gc_ln2", True), 60.0, True),
+    Separation("cryo trap bake-out", Match("cryo_heater", True), Match("cryo_heater", False), 300.0, True),
+    Separation("cryo cool-down", Match("cryo_heater", False), Match("sample", True), 300.0, False),
+    Separation("evacuation", Match("evacuation", True), Match("evacuation", False), 300.0, False),
+]
+
+
+def _matches(match: Match, entry: TimelineEntry) -> bool:
+    if entry.actuator != match.actuator:
+        return False
+    return match.value is ANY or entry.value == match.value
+
+
+def _with_advance(task: Task, origin_advance: float) -> Task:
+    compacted = copy.copy(task)
+    compacted.origin_advance = origin_advance
+    return compacted
+
+
+class Compactor:
+    """Find the shortest origin advance for each task that keeps the declared command order on every actuator
+    and satisfies the minimum separations of the physical processes"""
+
+    def __init__(self, separations: typing.Optional[typing.Sequence[Separation]] = None,
+                 actuator_separation: typing.Optional[typing.Dict[str, float]] = None,
+                 default_actuator_separation: float = DEFAULT_ACTUATOR_SEPARATION,
+                 resolution: float = DEFAULT_RESOLUTION):
+        self.separations = list(separations) if separations is not None else list(DEFAULT_SEPARATIONS)
+        self.actuator_separation = dict(actuator_separation) if actuator_separation is not None else dict()
+        self.default_actuator_separation = default_actuator_separation
+        self.resolution = resolution
+        self._pair_advance: typing.Dict[typing.Tuple[Task, Task], float] = dict()
+        self._copies: typing.Dict[typing.Tuple[Task, float], Task] = dict()
+
+    def _with_advance(self, task: Task, origin_advance: float) -> Task:
+        # Reusing the copies lets their compiled templates be reused too
+        key = (task, origin_advance)
+        result = self._copies.get(key)
+        if result is None:
+            result = _with_advance(task, origin_advance)
+            self._copies[key] = result
+        return result
+
+    def _order_violations(self, nominal: CompiledSchedule,
+                          compacted: CompiledSchedule) -> typing.List[Violation]:
+        def key(entry: TimelineEntry):
+            return entry.task_index, entry.sequence, entry.actuator
+
+        nominal_origins = {key(entry): entry.origin for entry in nominal.timeline if entry.actuator is not None}
+        by_actuator: typing.Dict[str, typing.List[TimelineEntry]] = dict()
+        for entry in compacted.timeline:
+            if entry.actuator is None:
+                continue
+            by_actuator.setdefault(entry.actuator, list()).append(entry)
+
+        result = list()
+        for actuator, entries in by_actuator.items():
+            separation = self.actuator_separation.get(actuator, self.default_actuator_separation)
+            for i in range(len(entries)):
+                first = entries[i]
+                for j in range(i + 1, len(entries)):
+                    second = entries[j]
+                    if abs(first.task_index - second.task_index) > 1:
+                        continue
+                    if first.value == second.value:
+                        continue
+                    nominal_gap = nominal_origins[key(second)] - nominal_origins[key(first)]
+                    if nominal_gap == 0.0:
+                        continue
+                    if nominal_gap > 0.0:
+                        before, after = first, second
+                    else:
+                        before, after = second, first
+                        nominal_gap = -nominal_gap
+                    required = min(nominal_gap, separation)
+                    if after.origin - before.origin < required:
+                        result.append(Violation(f"{actuator} order", before, after, required))
+        return result
+
+    def _process_violations(self, compacted: CompiledSchedule) -> typing.List[Violation]:
+        by_task: typing.Dict[int, typing.List[TimelineEntry]] = dict()
+        for entry in compacted.timeline:
+            by_task.setdefault(entry.task_index, list()).append(entry)
+
+        result = list()
+        for separation in self.separations:
+            for task_index, entries in by_task.items():
+                seconds = [entry for entry in entries if _matches(separation.second, entry)]
+                if not seconds:
+                    continue
+                if separation.adjacent:
+                    firsts = [entry for entry in by_task.get(task_index - 1, ()) if _matches(separation.first, entry)]
+                    for second in seconds:
+                        for first in firsts:
+                            if second.origin - first.end < separation.minimum:
+                                result.append(Violation(separation.name, first, second, separation.minimum))
+                    continue
+
+                firsts = [entry for entry in entries if _matches(separation.first, entry)]
+                for second in seconds:
+                    first = None
+                    for check in firsts:
+                        if check.origin > second.origin:
+                            break
+                        first = check
+                    if first is None:
+                        continue
+                    if second.origin - first.end < separation.minimum:
+                        result.append(Violation(separation.name, first, second, separation.minimum))
+        return result
+
+    @staticmethod
+    def _completion_violations(compacted: CompiledSchedule,
+                               tasks: typing.Sequence[Task]) -> typing.List[Violation]:
+        # The cycle ends at the advance, so everything a task does has to be done by then
+        ends: typing.List[float] = list()
+        origin = 0.0
+        for task in tasks:
+            origin += task.origin_advance
+            ends.append(origin)
+
+        result = list()
+        for entry in compacted.timeline:
+            end = entry.end if math.isfinite(entry.end) else entry.origin
+            if end > ends[entry.task_index]:
+                result.append(Violation("task completion", entry, entry, ends[entry.task_index]))
+        return result
+
+    def violations(self, tasks: typing.Sequence[Task],
+                   nominal: typing.Optional[typing.Sequence[Task]] = None) -> typing.List[Violation]:
+        """Get the constraint violations of a schedule, with the command order taken from the nominal schedule
+        of the same tasks"""
+        compacted = CompiledSchedule(tasks)
+        if nominal is None:
+            reference = compacted
+        else:
+            reference = CompiledSchedule(nominal)
+        return (self._order_violations(reference, compacted) +
+                self._process_violations(compacted) +
+                self._completion_violations(compacted, tasks))
+
+    def pair_advance(self, first: Task, second: Task) -> float:
+        """Get the shortest feasible origin advance from the first task to the second task that follows it"""
+        key = (first, second)
+        result = self._pair_advance.get(key)
+        if result is not None:
+            return result
+
+        # The first task is preceded by another copy of itself, so both are scheduled as they would be mid-run
+        nominal = [first, first, second]
+
+        def feasible(advance: float) -> bool:
+            return not self.violations([first, self._with_advance(first, advance), second], nominal)
+
+        upper = first.origin_advance
+        if not feasible(upper):
+            _LOGGER.warning(f"Nominal advance of {upper:.0f} seconds is not feasible, so it is left unchanged")
+            self._pair_advance[key] = upper
+            return upper
+
+        # Shortening the advance only ever moves the second task earlier, so feasibility is monotonic
+        lower = 0.0
+        while upper - lower > self.resolution:
+            advance = math.ceil((lower + upper) / 2.0 / self.resolution) * self.resolution
+            if advance >= upper:
+                break
+            if feasible(advance):
+                upper = advance
+            else:
+                lower = advance
+
+        self._pair_advance[key] = upper
+        return upper
+
+    def task_advance(self, task: Task) -> float:
+        """Get the shortest feasible origin advance for a task repeated back to back"""
+        return self.pair_advance(task, task)
+
+    def compact(self, tasks: typing.Sequence[Task], repeat: bool = False) -> typing.List[Task]:
+        """Get copies of the tasks with their origin advances reduced to the shortest feasible ones, so they can
+        be executed directly.  When repeated, the last task is followed by the first one again."""
+        result = list()
+        for i in range(len(tasks)):
+            task = tasks[i]
+            if i + 1 < len(tasks):
+                advance = self.pair_advance(task, tasks[i + 1])
+            elif repeat:
+                advance = self.pair_advance(task, tasks[0])
+            else:
+                advance = self.task_advance(task)
+            result.append(self._with_advance(task, advance))
+        return result
+
+
+def compact_tasks(tasks: typing.Sequence[Task], compactor: typing.Optional[Compactor] = None) -> typing.List[Task]:
+    """Compact a schedule of tasks with the default constraints"""
+    if compactor is None:
+        compactor = Compactor()
+    return compactor.compact(tasks)
+
+
+def samples_per_day(tasks: typing.Sequence[Task]) -> float:
+    total = sum(task.origin_advance for task in tasks)
+    if total <= 0.0:
+        return 0.0
+    return len(tasks) * 86400.0 / total
+
+
+if __name__ == '__main__':
+    import argparse
+    import gspc.tasks
+
+    opt = argparse.ArgumentParser(
+        description='Compute the shortest feasible cycle for each task and adjacent task pair in a task file'
+    )
+    opt.add_argument('file', help='Task file to compact.')
+    opt.add_argument('--separation', action='append', default=[], metavar='NAME=SECONDS',
+                     help='Override the minimum seconds of a process separation.')
+    opt.add_argument('--actuator', action='append', default=[], metavar='ACTUATOR=SECONDS',
+                     help='Override the minimum seconds between commands on an actuator.')
+    opt.add_argument('--resolution', type=float, default=DEFAULT_RESOLUTION,
+                     help='Resolution of the advance search in seconds.')
+
+    options = opt.parse_args()
+
+    def parse_overrides(values: typing.List[str]) -> typing.Dict[str, float]:
+        result = dict()
+        for value in values:
+            name, seconds = value.rsplit('=', 1)
+            result[name.strip()] = float(seconds)
+        return result
+
+    separation_overrides = parse_overrides(options.separation)
+    separations = [s._replace(minimum=separation_overrides.get(s.name, s.minimum)) for s in DEFAULT_SEPARATIONS]
+    compactor = Compactor(separations, parse_overrides(options.actuator), resolution=options.resolution)
+
+    with open(options.file, "r") as input_file:
+        names = [name for name, _ in parse_task_file(input_file.read())]
+    tasks = [known_tasks[name] for name in names]
+
+    for name in sorted(set(names)):
+        task = known_tasks[name]
+        print(f"{name:>16} {task.origin_advance:8.0f} -> {compactor.task_advance(task):8.0f}")
+    for first, second in sorted(set(zip(names[:-1], names[1:]))):
+        advance = compactor.pair_advance(known_tasks[first], known_tasks[second])
+        print(f"{first:>16} -> {second:<16} {advance:8.0f}")
+
+    compacted = compactor.compact(tasks)
+    for violation in compactor.violations(compacted, tasks):
+        print(f"VIOLATION {violation.name}: #{violation.first.task_index + 1} "
+              f"{type(violation.first.runnable).__name__} -> #{violation.second.task_index + 1} "
+              f"{type(violation.second.runnable).__name__} needs {violation.required:.1f}")
+    print(f"{samples_per_day(tasks):.1f} -> {samples_per_day(compacted):.1f} samples per day")
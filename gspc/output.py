@@ -7,6 +7,8 @@ import atexit
 _lock = threading.Lock()
 _log_file: typing.Optional[str] = None
 _data_file: typing.Optional[str] = None
+_timing_file: typing.Optional[str] = None
+_checkpoint_file: typing.Optional[str] = None
 
 # Buffered cycle data while the data file is locked by another program (the
 # typical Windows case is the operator viewing the .xl file in Excel, which
@@ -101,6 +103,23 @@ def log_message(line: str):
             pass
 
 
+def write_timing(header: str, line: str):
+    """Write a line to the timing summary next to the data file, starting it with the header"""
+    with _lock:
+        if _timing_file is None:
+            return
+        try:
+            with open(_timing_file, "a+") as f:
+                if f.tell() == 0:
+                    f.write(header)
+                    f.write("\n")
+                f.write(line)
+                f.write("\n")
+        except PermissionError:
+            # Timing is diagnostic only, so it is not buffered like the cycle data
+            pass
+
+
 def install_output_log_handler():
     class _Handler(logging.Handler):
         def emit(self, record: logging.LogRecord) -> None:
@@ -177,6 +196,18 @@ def begin_cycle(data: CycleData):
         _active_cycle = data
 
 
+def active_cycle() -> typing.Optional[CycleData]:
+    """Get the data of the cycle in progress"""
+    with _lock:
+        return _active_cycle
+
+
+def checkpoint_file_name() -> typing.Optional[str]:
+    """Get the schedule checkpoint journal next to the data file"""
+    with _lock:
+        return _checkpoint_file
+
+
 def complete_cycle():
     global _active_cycle
     with _lock:
@@ -200,6 +231,8 @@ def abort_cycle(message: typing.Optional[str]):
 def set_output_name(name: str):
     global _log_file
     global _data_file
+    global _timing_file
+    global _checkpoint_file
     global _pending_header, _pending_data, _data_locked_alert_active
     with _lock:
         # Flush any buffered data to the previous file (or its recovery sidecar)
@@ -216,9 +249,13 @@ def set_output_name(name: str):
         if len(name) < 1:
             _log_file = None
             _data_file = None
+            _timing_file = None
+            _checkpoint_file = None
             return
         _log_file = name + ".txt"
         _data_file = name + ".xl"
+        _timing_file = name + ".timing.xl"
+        _checkpoint_file = name + ".checkpoint"
 
 
 def _flush_pending_at_exit() -> None:
@@ -2,27 +2,63 @@ import logging
 import asyncio
 import typing
 import math
-import time
+import heapq
+import itertools
+import weakref
 from collections import namedtuple
+from collections.abc import Mapping, Sequence
+from gspc.clock import Clock
 from gspc.hw.interface import Interface
-from gspc.output import abort_cycle
+from gspc.output import abort_cycle, active_cycle
+from gspc.timing import TimingMonitor
+from gspc.checkpoint import CheckpointJournal
 
 _LOGGER = logging.getLogger(__name__)
 
 
 Event = namedtuple("Event", ["time", "occurred"])
-_Reschedule = namedtuple("_Reschedule", ["remove", "append"])
+Dependency = namedtuple("Dependency", ["runnable", "min_lag", "max_lag"])
+Skipped = namedtuple("Skipped", ["task_index", "task_name", "message"])
+_Skip = namedtuple("_Skip", ["context", "message"])
+_Reschedule = namedtuple("_Reschedule", ["candidates"])
+_TaskEntry = namedtuple("_TaskEntry", ["task", "context", "task_name", "requeued"], defaults=[False])
+_EditPlan = namedtuple("_EditPlan", ["tasks", "contexts", "removed", "shifts", "built"])
+_NO_PREDECESSORS: typing.Tuple = ()
 
 
 class Runnable:
-    """A component of the sequence that is able to be run"""
+    """A component of the sequence that is able to be run.  Subclasses that declare __slots__ have their events
+    fixed by the class, while ones without can add events to the instance."""
+
+    __slots__ = ("context", "origin", "failed", "predecessors")
+
+    # Nominal seconds the runnable remains active after it starts
+    duration: float = 0.0
+    # Set for control loops that are cancelled when a newer runnable claims one of their resources
+    preemptible: bool = False
+    set_events: typing.AbstractSet[str] = frozenset()
+    clear_events: typing.AbstractSet[str] = frozenset()
 
     def __init__(self, context: 'Execute.Context', origin: float = -math.inf):
         """Create the runnable component."""
         self.context = context
         self.origin = origin
-        self.set_events: typing.Set[str] = set()
-        self.clear_events: typing.Set[str] = set()
+        # Set when the runnable did not achieve its result, so anything depending on it is not run
+        self.failed: bool = False
+        # Shared until a predecessor is declared
+        self.predecessors: typing.Sequence[Dependency] = _NO_PREDECESSORS
+        if hasattr(self, "__dict__"):
+            self.set_events = set(self.set_events)
+            self.clear_events = set(self.clear_events)
+
+    def after(self, predecessor: 'Runnable', min_lag: float = 0.0, max_lag: float = math.inf) -> 'Runnable':
+        """Declare that the runnable follows the completion of another one by at least the minimum lag and at
+        most the maximum lag (seconds).  This is only used when the schedule executes in dependency mode, where
+        the runnable is dispatched as soon as all its predecessors allow instead of at its origin."""
+        if self.predecessors is _NO_PREDECESSORS:
+            self.predecessors = list()
+        self.predecessors.append(Dependency(predecessor, min_lag, max_lag))
+        return self
 
     async def execute(self):
         """Execute the action.  This is scheduled for background execution and does not delay the schedule."""
@@ -32,10 +68,26 @@ class Runnable:
         """Execute in blocking context, if true then the time taken delays the schedule."""
         return False
 
+    def actuators(self) -> typing.Dict[str, typing.Any]:
+        """The actuators the runnable drives, mapped to the state it commands (None if not known in advance)"""
+        return dict()
+
+    def resources(self) -> typing.Iterable[str]:
+        """The resources the runnable claims while it executes, superseding any preemptible runnable still
+        executing with them"""
+        return self.actuators().keys()
+
+    def supersedes(self, other: 'Runnable') -> bool:
+        """Test if the runnable replaces a preemptible one still executing with a resource it claims, so only a
+        newer controller of the same kind ends a control loop rather than a one-shot adjustment"""
+        return type(other) is type(self)
+
 
 class Gate(Runnable):
     """A runnable that can be used to gate the schedule advance, waiting until a set of conditions are ready"""
 
+    __slots__ = ("_required_ready", "_futures_waiting", "_total_completed")
+
     def __init__(self, context: 'Execute.Context', origin: float,
                  required_ready: typing.Optional[int] = None):
         Runnable.__init__(self, context, origin)
@@ -80,25 +132,105 @@ class Gate(Runnable):
 class AbortPoint(Runnable):
     """A runnable that serves as a future abort point to allow for a deferred sequence abort"""
 
+    __slots__ = ("_aborted", "_abort_message", "_skip_task")
+
     def __init__(self, context: 'Execute.Context', origin=-math.inf):
         Runnable.__init__(self, context, origin)
         self._aborted = False
         self._abort_message = None
+        self._skip_task = False
 
-    async def abort(self, message: typing.Optional[str] = None) -> None:
-        """Schedule the abort"""
+    async def abort(self, message: typing.Optional[str] = None, skip_task: bool = False) -> None:
+        """Schedule the abort, of only the task when skipping it so the schedule continues"""
         self._aborted = True
         if message is not None:
             self._abort_message = message
+        if skip_task:
+            self._skip_task = True
 
     async def delay(self):
         if not self._aborted:
             return False
+        if self._skip_task:
+            _LOGGER.info(f'GSPC TASK SKIPPED: {self._abort_message}')
+            await self.context.schedule.skip_task(self.context, self._abort_message)
+            return False
         _LOGGER.info(f'GSPC ABORTED: {self._abort_message}')
         await self.context.schedule.abort(self._abort_message)
         return False
 
 
+class SignalGate:
+    """A wait for a threshold condition on a signal that completes as soon as it holds, or fails at a deadline.
+    The condition is the signal being at or above (or below) the threshold.  Once it holds it only stops when
+    the signal moves back past the threshold by the hysteresis, and it must hold for the debounce seconds
+    before the gate completes.  Readings of None are ignored."""
+
+    # Seconds between readings of the signal
+    DEFAULT_INTERVAL = 0.5
+
+    def __init__(self, read: typing.Callable[[], typing.Awaitable[typing.Optional[float]]], threshold: float,
+                 above: bool = True, hysteresis: float = 0.0, debounce: float = 0.0,
+                 interval: float = DEFAULT_INTERVAL,
+                 entered: typing.Optional[typing.Callable[[float], typing.Awaitable[None]]] = None):
+        self._read = read
+        self.threshold = threshold
+        self.above = above
+        self.hysteresis = hysteresis
+        self.debounce = debounce
+        self.interval = interval
+        # Called with the reading each time the condition starts to hold
+        self._entered = entered
+        self._held_since: typing.Optional[float] = None
+        # The latest reading, None if nothing was read
+        self.value: typing.Optional[float] = None
+        self.readings = 0
+        # Seconds from the start of the wait until it completed or failed
+        self.waited = 0.0
+
+    def _holds(self, value: float) -> bool:
+        if self._held_since is not None:
+            # Already holding, so it only stops once past the hysteresis band
+            if self.above:
+                return value >= self.threshold - self.hysteresis
+            return value <= self.threshold + self.hysteresis
+        if self.above:
+            return value >= self.threshold
+        return value <= self.threshold
+
+    async def update(self, value: typing.Optional[float], now: float) -> bool:
+        """Evaluate a reading of the signal at a monotonic time, returning if the gate is complete"""
+        if value is None:
+            return False
+        self.value = value
+        self.readings += 1
+        if not self._holds(value):
+            self._held_since = None
+            return False
+        if self._held_since is None:
+            self._held_since = now
+            if self._entered is not None:
+                await self._entered(value)
+        return now - self._held_since >= self.debounce
+
+    async def wait(self, clock: Clock, timeout: float) -> bool:
+        """Read the signal until the condition has held for the debounce time, returning False if that does not
+        happen within the timeout"""
+        begin = clock.monotonic()
+        deadline = begin + timeout
+        self._held_since = None
+        while True:
+            now = clock.monotonic()
+            if await self.update(await self._read(), now):
+                self.waited = clock.monotonic() - begin
+                return True
+            now = clock.monotonic()
+            if now >= deadline:
+                self.waited = now - begin
+                return False
+            await clock.sleep(min(self.interval, deadline - now))
+
+
 class Task:
     """The base for tasks that can be executed on a schedule."""
 
@@ -118,70 +250,385 @@ def register_task(name: str, task: Task):
     known_tasks[name] = task
 
 
+class _RunQueue:
+    """A priority queue of pending runnables ordered by origin, with ties broken by insertion order"""
+
+    def __init__(self):
+        # Entries are [origin, sequence, runnable], with the runnable cleared once no longer pending
+        self._heap: typing.List[list] = list()
+        # Context -> [pending count, entries]
+        self._contexts: typing.Dict['Execute.Context', list] = dict()
+        self._sequence = 0
+        self._pending = 0
+        self._removed = 0
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def __bool__(self) -> bool:
+        return self._pending != 0
+
+    def push(self, runnable: Runnable, origin: typing.Optional[float] = None) -> list:
+        """Add a runnable to the queue, returning its [origin, sequence, runnable] entry"""
+        if origin is None:
+            origin = runnable.origin
+        entry = [origin, self._sequence, runnable]
+        self._sequence += 1
+        heapq.heappush(self._heap, entry)
+        pending = self._contexts.get(runnable.context)
+        if pending is None:
+            pending = [0, list()]
+            self._contexts[runnable.context] = pending
+        pending[0] += 1
+        pending[1].append(entry)
+        self._pending += 1
+        return entry
+
+    def next_sequence(self) -> int:
+        """Allocate a sequence number for ordering outside the queue"""
+        sequence = self._sequence
+        self._sequence += 1
+        return sequence
+
+    def extend(self, runnables: typing.Iterable[Runnable]) -> None:
+        """Add a sequence of runnables to the queue"""
+        for runnable in runnables:
+            self.push(runnable)
+
+    def _discard_removed(self) -> None:
+        heap = self._heap
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
+            self._removed -= 1
+
+    def peek(self) -> typing.Optional[Runnable]:
+        """Get the next runnable without removing it"""
+        self._discard_removed()
+        if not self._heap:
+            return None
+        return self._heap[0][2]
+
+    def peek_origin(self) -> typing.Optional[float]:
+        """Get the origin the next runnable is queued at"""
+        self._discard_removed()
+        if not self._heap:
+            return None
+        return self._heap[0][0]
+
+    def pop(self) -> Runnable:
+        """Remove and return the next runnable"""
+        self._discard_removed()
+        entry = heapq.heappop(self._heap)
+        runnable = entry[2]
+        entry[2] = None
+        self._pending -= 1
+
+        pending = self._contexts[runnable.context]
+        pending[0] -= 1
+        if pending[0] <= 0:
+            del self._contexts[runnable.context]
+        return runnable
+
+    def remove_context(self, context: 'Execute.Context') -> typing.List[Runnable]:
+        """Remove all pending runnables for a context, returning the ones removed"""
+        pending = self._contexts.pop(context, None)
+        if pending is None:
+            return list()
+        removed = list()
+        for entry in pending[1]:
+            if entry[2] is None:
+                continue
+            removed.append(entry[2])
+            entry[2] = None
+            self._pending -= 1
+            self._removed += 1
+
+        # Compact once most of the heap is dead entries, so removal stays amortized
+        if self._removed > self._pending:
+            self._heap = [entry for entry in self._heap if entry[2] is not None]
+            heapq.heapify(self._heap)
+            self._removed = 0
+        return removed
+
+    def shift_contexts(self, shifts: typing.Sequence[typing.Tuple['Execute.Context', float]]) -> typing.List[list]:
+        """Shift the queued origins of the pending runnables for each context by its delta, returning their
+        entries"""
+        total = sum(self._contexts[context][0] for context, _ in shifts if context in self._contexts)
+        if total * 8 < len(self._heap):
+            # Few enough that queueing them again is cheaper than reordering everything
+            shifted = list()
+            for context, delta in shifts:
+                pending = self._contexts.get(context)
+                if pending is None:
+                    continue
+                queued = [(entry[0], entry[2]) for entry in pending[1] if entry[2] is not None]
+                self.remove_context(context)
+                shifted.extend(self.push(runnable, origin + delta if math.isfinite(origin) else origin)
+                               for origin, runnable in queued)
+            return shifted
+
+        shifted = list()
+        for context, delta in shifts:
+            pending = self._contexts.get(context)
+            if pending is None:
+                continue
+            live = [entry for entry in pending[1] if entry[2] is not None]
+            pending[1] = live
+            for entry in live:
+                if math.isfinite(entry[0]):
+                    entry[0] += delta
+                # Renumbered like a push, so it never ties with the entry it replaces in an event index
+                entry[1] = self._sequence
+                self._sequence += 1
+            shifted.extend(live)
+        self._heap = [entry for entry in self._heap if entry[2] is not None]
+        heapq.heapify(self._heap)
+        self._removed = 0
+        return shifted
+
+    def has_context(self, context: 'Execute.Context') -> bool:
+        """Test if a context has any pending runnables"""
+        return context in self._contexts
+
+    def entries(self) -> typing.Iterator[list]:
+        """Iterate over the pending [origin, sequence, runnable] entries in no particular order"""
+        for entry in self._heap:
+            if entry[2] is None:
+                continue
+            yield entry
+
+
+class _EventTimeline(Mapping):
+    """An index of schedule events, keyed by event name.
+
+    Occurred events are stored directly, while future events are the next pending set of the event that is not
+    preceded by a pending clear of it.  Pending sets and clears are kept in per event heaps, so only the events
+    a runnable touches are updated when it is added, removed or completed.  Future event origins are relative to
+    the zero time, so shifting the schedule is a single offset change.
+    """
+
+    def __init__(self):
+        self.zero_time: float = 0.0
+        self._occurred: typing.Dict[str, Event] = dict()
+        self._future: typing.Dict[str, float] = dict()
+        self._set: typing.Dict[str, typing.List[list]] = dict()
+        self._clear: typing.Dict[str, typing.List[list]] = dict()
+        self._entries: typing.Dict[Runnable, list] = dict()
+
+    def __getitem__(self, event: str) -> Event:
+        occurred = self._occurred.get(event)
+        if occurred is not None:
+            return occurred
+        return Event(self._future[event] + self.zero_time, False)
+
+    def __contains__(self, event) -> bool:
+        return event in self._occurred or event in self._future
+
+    def __iter__(self) -> typing.Iterator[str]:
+        yield from self._occurred
+        for event in self._future:
+            if event in self._occurred:
+                continue
+            yield event
+
+    def __len__(self) -> int:
+        return len(self._occurred) + sum(1 for event in self._future if event not in self._occurred)
+
+    def clear(self) -> None:
+        """Remove all events"""
+        self._occurred.clear()
+        self._future.clear()
+        self._set.clear()
+        self._clear.clear()
+        self._entries.clear()
+
+    @staticmethod
+    def _head(heap: typing.Optional[typing.List[list]]) -> typing.Optional[list]:
+        while heap:
+            if heap[0][2] is not None:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _update(self, event: str) -> None:
+        set_head = self._head(self._set.get(event))
+        if set_head is None:
+            self._set.pop(event, None)
+            self._future.pop(event, None)
+            return
+        clear_head = self._head(self._clear.get(event))
+        if clear_head is None:
+            self._clear.pop(event, None)
+        elif not (set_head < clear_head):
+            self._future.pop(event, None)
+            return
+        self._future[event] = set_head[0]
+
+    def add(self, entry: list) -> None:
+        """Add a pending runnable from its run queue entry"""
+        runnable: Runnable = entry[2]
+        if not runnable.set_events and not runnable.clear_events:
+            return
+        if not math.isfinite(entry[0]):
+            return
+        indexed = [entry[0], entry[1], runnable]
+        self._entries[runnable] = indexed
+        for event in runnable.clear_events:
+            heapq.heappush(self._clear.setdefault(event, list()), indexed)
+        for event in runnable.set_events:
+            heapq.heappush(self._set.setdefault(event, list()), indexed)
+        for event in runnable.clear_events:
+            self._update(event)
+        for event in runnable.set_events:
+            self._update(event)
+
+    def discard(self, runnable: Runnable) -> None:
+        """Remove a pending runnable"""
+        indexed = self._entries.pop(runnable, None)
+        if indexed is None:
+            return
+        indexed[2] = None
+        for event in runnable.clear_events:
+            self._update(event)
+        for event in runnable.set_events:
+            self._update(event)
+
+    def complete(self, runnable: Runnable, completed_time: float) -> None:
+        """Record the events processed by a completed runnable"""
+        self.discard(runnable)
+        for event in runnable.clear_events:
+            self._occurred.pop(event, None)
+        for event in runnable.set_events:
+            self._occurred[event] = Event(completed_time, True)
+
+
 class Execute:
     """The execution handler for a list of tasks"""
 
+    # Seconds an abort waits for the cancelled background tasks before making the outputs safe
+    ABORT_CANCEL_SECONDS = 2.0
+
     class Context:
         """The context identifier for a task scheduled for execution"""
+
+        __slots__ = ("interface", "schedule", "origin", "task_index", "task_name", "prior_origin",
+                     "task_started", "task_completed", "task_activated", "task_skipped", "task_requeued")
+
         def __init__(self, interface: Interface, schedule: 'Execute', origin: float,
-                     task_index: int, task_name: typing.Optional[str] = None):
+                     task_index: int, task_name: typing.Optional[str] = None,
+                     prior_origin: typing.Optional[float] = None):
             self.interface = interface
             self.schedule = schedule
             self.origin = origin
             self.task_index = task_index
             self.task_name = task_name
+            self.prior_origin = prior_origin
             self.task_started: bool = False
             self.task_completed: bool = False
             self.task_activated: bool = False
+            # Set once the rest of the task has been abandoned
+            self.task_skipped: bool = False
+            # Set when the task is a failed one run again, so it is not requeued a second time
+            self.task_requeued: bool = False
+
+        @property
+        def clock(self) -> Clock:
+            """The clock runnables use for timing"""
+            return self.schedule.clock
 
     class RescheduleFailure(Exception):
         """An exception raised when rescheduling fails"""
-        def __init__(self, message: str, *args, **kwargs):
+        def __init__(self, message: str, *args, late: float = 0.0, **kwargs):
             super().__init__(*args, **kwargs)
             self.message = message
-
-    def __init__(self, task_sequence: typing.Sequence[Task],
-                 task_names: typing.Optional[typing.Sequence[str]] = None):
-        self._tasks = task_sequence
-        self._task_names = list(task_names) if task_names is not None else None
+            # Seconds the schedule would have to start later for it to succeed, if that is all that prevented it
+            self.late = late
+
+    DEFAULT_LOOKAHEAD = 3600.0
+
+    def __init__(self, task_sequence: typing.Union[typing.Sequence[Task], typing.Iterable[Task]],
+                 task_names: typing.Optional[typing.Iterable[str]] = None,
+                 clock: typing.Optional[Clock] = None, dependency_mode: bool = False,
+                 lookahead: float = DEFAULT_LOOKAHEAD, recovery: typing.Optional[Task] = None,
+                 requeue_failed: bool = False, checkpoint: typing.Optional[CheckpointJournal] = None,
+                 resume_from: int = 0):
+        """Create the execution handler.  A sequence of tasks is scheduled completely when execution starts, while
+        any other iterable (e.g. a generator) is a streaming source that is only scheduled the lookahead (seconds)
+        in advance, so it can run indefinitely.  A skipped task is replaced by the recovery task, and when
+        requeueing failed tasks it is also run again once at the end of a sequence.  Progress is written to the
+        checkpoint journal if given, and a sequence resumed from one starts at the task index to resume from,
+        with the ones before it treated as already run."""
+        self.clock = clock if clock is not None else Clock()
+        # When set, runnables with predecessors are dispatched once those allow instead of at their origin
+        self.dependency_mode = dependency_mode
+        self.lookahead = lookahead
+        self.recovery = recovery
+        self.requeue_failed = requeue_failed
+        self.checkpoint = checkpoint
+        self.resume_from = resume_from
+        if isinstance(task_sequence, Sequence):
+            self._tasks = task_sequence
+            self._source: typing.Optional[typing.Iterator[Task]] = None
+            self._task_names = list(task_names) if task_names is not None else None
+            self._source_names: typing.Optional[typing.Iterator[str]] = None
+        else:
+            self._tasks = list()
+            self._source = iter(task_sequence)
+            self._task_names = None
+            self._source_names = iter(task_names) if task_names is not None else None
         self._background_tasks: typing.Set[asyncio.Task] = set()
+        # Background tasks cancelled because a newer runnable claimed their resources
+        self._preempted: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+        # Index of the task each background execution belongs to, if it belongs to one
+        self._background_index: "weakref.WeakKeyDictionary[asyncio.Task, int]" = weakref.WeakKeyDictionary()
         self._break_event = None
         self._aborted = False
+        self._abort_requested: typing.Optional[float] = None
+        # Seconds from the abort request until the outputs were safe, once an abort has been processed
+        self.abort_latency: typing.Optional[float] = None
         self._paused = None
         self._reschedule_operation: typing.Optional[_Reschedule] = None
         self._reschedule_result: typing.Optional[asyncio.Future] = None
+        self._skip_requests: typing.List[_Skip] = list()
         self.contexts: typing.List["Execute.Context"] = list()
         self.abort_message = None
-        self.events: typing.Dict[str, Event] = dict()
+        # Tasks abandoned while the rest of the schedule continued
+        self.skipped: typing.List[Skipped] = list()
+        self._timeline = _EventTimeline()
+        self.events: typing.Mapping[str, Event] = self._timeline
+        # Dispatch timing of the runnables executed, with a summary written as each task completes
+        self.timing = TimingMonitor()
 
     async def state_update(self):
         """Called when part of the schedule state has changed"""
         pass
 
-    async def _abort_processing(self):
-        for task in self._background_tasks:
-            if task.done():
-                continue
-            try:
-                task.cancel()
-            except:
-                pass
+    async def _abort_processing(self, interface: typing.Optional[Interface]):
+        pending = [task for task in self._background_tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            # Cancelled together, so one slow to finish does not hold up the rest or the safe state
+            _, unfinished = await asyncio.wait(pending, timeout=self.ABORT_CANCEL_SECONDS)
+            if unfinished:
+                _LOGGER.warning(f"{len(unfinished)} background tasks still running "
+                                f"{self.ABORT_CANCEL_SECONDS} seconds after the abort")
+        self._background_tasks.clear()
+
+        if interface is not None:
             try:
-                await task
+                await interface.safe_state()
             except:
-                pass
-        self._background_tasks.clear()
+                _LOGGER.warning("Error setting the safe state after the abort", exc_info=True)
+        requested = self._abort_requested if self._abort_requested is not None else self.clock.monotonic()
+        self.abort_latency = self.clock.monotonic() - requested
+        _LOGGER.info(f"Outputs safe {self.abort_latency:.3f} seconds after the abort")
 
         _LOGGER.debug("Schedule abort completed")
         abort_cycle(self.abort_message)
 
     async def _complete_processing(self):
-        for task in self._background_tasks:
-            try:
-                await task
-            except:
-                _LOGGER.warning("Error in background task", exc_info=True)
-        self._background_tasks.clear()
+        await self.complete_background()
 
         _LOGGER.debug("Schedule processing completed")
 
@@ -191,35 +638,222 @@ class Execute:
             raise RuntimeError
         self._break_event = asyncio.Event()
 
-        run = list()
-        origin = 0.0
-        for i in range(len(self._tasks)):
-            task = self._tasks[i]
-            task_name = None
-            if self._task_names is not None and i < len(self._task_names):
-                task_name = self._task_names[i]
-            context = self.Context(interface, self, origin, i, task_name)
+        run = _RunQueue()
+        self._timeline.clear()
+
+        # Dependency mode: runnables held for their predecessors as [outstanding count, ready, deadline]
+        waiting: typing.Dict[Runnable, list] = dict()
+        dependents: typing.Dict[Runnable, typing.List[Runnable]] = dict()
+        completed: typing.Dict[Runnable, float] = dict()
+        deadlines: typing.Dict[Runnable, float] = dict()
+        # Predecessors whose background execution finished after their dispatch, with the finish time
+        finishing: typing.List[typing.Tuple[Runnable, asyncio.Task, float]] = list()
+        executing = 0
+
+        # The latest runnable to claim each resource, along with its background execution
+        claims: typing.Dict[str, typing.Tuple[Runnable, asyncio.Task]] = dict()
+        self._preempted.clear()
+        # Background executions still running for each context, so a skipped task can cancel its own
+        backgrounds: typing.Dict["Execute.Context", typing.Set[asyncio.Task]] = dict()
+
+        def background_failed(background: asyncio.Task) -> bool:
+            if background.cancelled():
+                # Cancellation by a newer claimant is not a failure of the runnable
+                return background not in self._preempted
+            return background.exception() is not None
+
+        def claim_resources(running: Runnable) -> typing.List[str]:
+            resources = list(running.resources())
+            for resource in resources:
+                holder = claims.get(resource)
+                if holder is None:
+                    continue
+                superseded, background = holder
+                if superseded is running or not superseded.preemptible or background.done():
+                    continue
+                if not running.supersedes(superseded):
+                    continue
+                _LOGGER.debug(f"{type(running).__name__} preempted {type(superseded).__name__} on {resource}")
+                self._preempted.add(background)
+                background.cancel()
+            return resources
+
+        def release(runnable: Runnable, ready: float, deadline: float):
+            if math.isfinite(deadline):
+                deadlines[runnable] = deadline
+            self._timeline.discard(runnable)
+            self._timeline.add(run.push(runnable, ready))
+
+        def hold(runnable: Runnable):
+            held = [0, -math.inf, math.inf]
+            for dependency in runnable.predecessors:
+                predecessor = dependency.runnable
+                if predecessor.context.task_index < first_live_index:
+                    # No longer tracked, so it completed long ago
+                    continue
+                completed_at = completed.get(predecessor)
+                if completed_at is not None:
+                    held[1] = max(held[1], completed_at + dependency.min_lag)
+                    held[2] = min(held[2], completed_at + dependency.max_lag)
+                    continue
+                dependents.setdefault(predecessor, list()).append(runnable)
+                held[0] += 1
+            if held[0] == 0:
+                release(runnable, held[1], held[2])
+                return
+            waiting[runnable] = held
+            # Event estimates use the declared origin until the runnable is released
+            self._timeline.add([runnable.origin, run.next_sequence(), runnable])
+
+        def drop(runnable: Runnable):
+            waiting.pop(runnable, None)
+            self._timeline.discard(runnable)
+            _LOGGER.info(f"Skipping {type(runnable).__name__} after a failed predecessor")
+            for dependent in dependents.pop(runnable, ()):
+                if dependent in waiting:
+                    drop(dependent)
+
+        def predecessor_completed(predecessor: Runnable, completed_at: float):
+            successors = dependents.pop(predecessor, None)
+            if successors is None:
+                return
+            if predecessor.failed:
+                for dependent in successors:
+                    if dependent in waiting:
+                        drop(dependent)
+                return
+            completed[predecessor] = completed_at
+            for dependent in successors:
+                held = waiting.get(dependent)
+                if held is None:
+                    continue
+                for dependency in dependent.predecessors:
+                    if dependency.runnable is not predecessor:
+                        continue
+                    held[1] = max(held[1], completed_at + dependency.min_lag)
+                    held[2] = min(held[2], completed_at + dependency.max_lag)
+                held[0] -= 1
+                if held[0] > 0:
+                    continue
+                del waiting[dependent]
+                release(dependent, held[1], held[2])
+
+        def schedule_runnables(add: typing.Iterable[Runnable]):
+            for runnable in add:
+                if self.dependency_mode and runnable.predecessors:
+                    hold(runnable)
+                    continue
+                self._timeline.add(run.push(runnable))
+
+        source = self._source
+        source_names = self._source_names
+        streaming = source is not None
+        next_origin = 0.0
+        next_index = 0
+        prior_origin = None
+        first_live_index = 0
+
+        # How far ahead of its origin each task starts, so shifting it only needs the earliest runnable checked
+        leads: typing.Dict["Execute.Context", float] = dict()
+        # Tasks of the streamed contexts, so the ones after a skipped task can be streamed again
+        streamed: typing.Dict["Execute.Context", Task] = dict()
+
+        def set_lead(context: "Execute.Context", add: typing.Iterable[Runnable]):
+            earliest = min((r.origin for r in add if math.isfinite(r.origin)), default=context.origin)
+            leads[context] = context.origin - earliest
+
+        def add_task(task: Task, task_name: typing.Optional[str]) -> typing.Sequence[Runnable]:
+            nonlocal next_origin, next_index, prior_origin
+            context = self.Context(interface, self, next_origin, next_index, task_name, prior_origin)
             self.contexts.append(context)
             add = task.schedule(context)
-            run.extend(add)
-            origin += task.origin_advance
-
-        run.sort(key=lambda runnable: runnable.origin)
+            set_lead(context, add)
+            if source is not None:
+                streamed[context] = task
+            schedule_runnables(add)
+            prior_origin = next_origin
+            next_origin += task.origin_advance
+            next_index += 1
+            return add
+
+        def materialize(horizon: float, now: float):
+            """Schedule streamed tasks that start within the lookahead of the horizon"""
+            nonlocal source, first_live_index
+            while source is not None and next_origin - self.lookahead <= horizon:
+                try:
+                    task = next(source)
+                except StopIteration:
+                    source = None
+                    break
+                task_name = None
+                if source_names is not None:
+                    task_name = next(source_names, None)
+                task_origin = next_origin
+                earliest = min((r.origin for r in add_task(task, task_name) if math.isfinite(r.origin)),
+                               default=task_origin)
+                if earliest < now:
+                    _LOGGER.warning(f"Task {next_index} was scheduled {now - earliest:.0f} seconds after its first "
+                                    f"action was due")
+                if task_origin - earliest > self.lookahead:
+                    _LOGGER.debug(f"Extending the lookahead to {task_origin - earliest:.0f} seconds")
+                    self.lookahead = task_origin - earliest
+
+            # Forget tasks with nothing left pending, so memory use stays constant
+            while len(self.contexts) > 1:
+                context = self.contexts[0]
+                if run.has_context(context) or any(held.context is context for held in waiting):
+                    break
+                del self.contexts[0]
+                leads.pop(context, None)
+                streamed.pop(context, None)
+            if self.contexts and self.contexts[0].task_index > first_live_index:
+                first_live_index = self.contexts[0].task_index
+                for runnable in [r for r in completed if r.context.task_index < first_live_index]:
+                    del completed[runnable]
+
+        if source is None:
+            resumed = min(self.resume_from, len(self._tasks))
+            # Already run, so placed before the zero origin with the first task to run as the first in the schedule
+            next_origin = -sum(task.origin_advance for task in self._tasks[:resumed])
+            for i in range(len(self._tasks)):
+                task_name = None
+                if self._task_names is not None and i < len(self._task_names):
+                    task_name = self._task_names[i]
+                if i < resumed:
+                    context = self.Context(interface, self, next_origin, i, task_name)
+                    context.task_activated = True
+                    context.task_started = True
+                    context.task_completed = True
+                    self.contexts.append(context)
+                    next_origin += self._tasks[i].origin_advance
+                    next_index += 1
+                    continue
+                add_task(self._tasks[i], task_name)
+        else:
+            materialize(0.0, -math.inf)
 
         self._aborted = False
+        self._abort_requested = None
+        self.abort_latency = None
         self.abort_message = None
-        self.events.clear()
-        zero_real_time = time.time()
-        zero_monotonic_time = time.monotonic()
-
-        async def wait_for_ready(running: Runnable) -> bool:
-            if not math.isfinite(running.origin):
+        self.skipped = list()
+        self._skip_requests.clear()
+        zero_real_time = self.clock.time()
+        zero_monotonic_time = self.clock.monotonic()
+        self._timeline.zero_time = zero_real_time
+        if self.checkpoint is not None:
+            self.checkpoint.start(self, zero_real_time, self.resume_from if source is None else 0)
+        # Monotonic time the last runnable returned for execution was planned for, if it had one
+        planned_time: typing.Optional[float] = None
+
+        async def wait_for_ready(origin: float) -> bool:
+            if not math.isfinite(origin):
                 need_break = self._break_event.is_set()
                 self._break_event.clear()
                 return not need_break
 
-            target_time = running.origin + zero_monotonic_time
-            delay = target_time - time.monotonic()
+            target_time = origin + zero_monotonic_time
+            delay = target_time - self.clock.monotonic()
             if delay <= 0.0:
                 need_break = self._break_event.is_set()
                 self._break_event.clear()
@@ -234,105 +868,264 @@ class Execute:
             self._break_event.clear()
             return False
 
-        def update_future_events():
-            nonlocal zero_real_time
-
-            # Remove all future events so they can be regenerated
-            self.events = {e: d for e, d in self.events.items() if d.occurred}
-            stop_events = set()
-            for future_run in run:
-                expected_time = future_run.origin + zero_real_time
-                if not math.isfinite(expected_time):
-                    continue
-
-                for event in future_run.clear_events:
-                    stop_events.add(event)
-                for event in future_run.set_events:
-                    if event in stop_events:
-                        continue
-                    if event in self.events:
-                        continue
-
-                    self.events[event] = Event(expected_time, False)
-
-        def apply_reschedule(remove: typing.Optional[int], append: typing.Optional[typing.Sequence]):
-            nonlocal run
-
-            modified_contexts = list(self.contexts)
-            modified_tasks = list(self._tasks)
-
-            if remove is not None and remove < len(modified_contexts):
-                remove_contexts = set()
-                for ctx in modified_contexts[remove:]:
-                    if ctx.task_activated:
-                        raise self.RescheduleFailure("task already active")
-                    remove_contexts.add(ctx)
-
-                del modified_tasks[remove:]
-                del modified_contexts[remove:]
-
-                modified_run = [next_run for next_run in run if next_run.context not in remove_contexts]
+        def discard_contexts(contexts: typing.Iterable["Execute.Context"]):
+            removed_runnables = list()
+            for ctx in contexts:
+                removed_runnables.extend(run.remove_context(ctx))
+                leads.pop(ctx, None)
+            if waiting:
+                remove_set = set(contexts)
+                for held in [held for held in waiting if held.context in remove_set]:
+                    del waiting[held]
+                    removed_runnables.append(held)
+            removed_at = self.clock.monotonic() - zero_monotonic_time
+            for removed in removed_runnables:
+                self._timeline.discard(removed)
+                deadlines.pop(removed, None)
+                # Anything left depending on a removed runnable no longer has to wait for it
+                predecessor_completed(removed, removed_at)
+
+        def plan_edit(first: int, entries: typing.Sequence[_TaskEntry],
+                      start: typing.Optional[float] = None) -> _EditPlan:
+            """Plan replacing the tasks from the first index onward, keeping the contexts of the entries that have
+            one.  Kept contexts are shifted to their new origin unless that changes what the task schedules, so
+            only inserted tasks and the ones after a changed gap are built again.  The first entry is placed at
+            the start origin if given, instead of following the task before it."""
+            first = min(first, len(self.contexts))
+            first_possible_origin = self.clock.monotonic() - zero_monotonic_time
+            kept = set(entry.context for entry in entries if entry.context is not None)
+            removed = [ctx for ctx in self.contexts[first:] if ctx not in kept]
+            for ctx in removed:
+                if ctx.task_activated and not ctx.task_skipped:
+                    raise self.RescheduleFailure("task already active")
+
+            if first > 0:
+                prior_origin = self.contexts[first - 1].origin
+                origin = prior_origin + self._tasks[first - 1].origin_advance
             else:
-                modified_run = list(run)
-
-            if append:
-                index = len(modified_contexts)
-                if index > 0:
-                    origin = modified_contexts[-1].origin + modified_tasks[-1].origin_advance
-                else:
-                    origin = 0.0
-                first_possible_origin = time.monotonic() - zero_monotonic_time
-
-                for task in append:
-                    context = self.Context(interface, self, origin, index)
+                prior_origin = None
+                origin = 0.0
+            if start is not None:
+                origin = start
+            contexts = self.contexts[:first]
+            shifts = list()
+            built = list()
+            # Seconds the earliest action is in the past, checked once everything is placed
+            late = 0.0
+            for index in range(first, first + len(entries)):
+                task, context, task_name, requeued = entries[index - first]
+                if context is not None:
+                    # Carried over in case the context has to be built again
+                    requeued = requeued or context.task_requeued
+                    if context.task_activated:
+                        if context.origin != origin or context.task_index != index:
+                            raise self.RescheduleFailure("task already active")
+                    elif ((context.origin > 0.0) == (origin > 0.0) and
+                          (context.prior_origin is None) == (prior_origin is None) and
+                          (prior_origin is None or context.origin - context.prior_origin == origin - prior_origin)):
+                        delta = origin - context.origin
+                        if delta < 0.0:
+                            late = max(late, first_possible_origin - (origin - leads.get(context, 0.0)))
+                        if delta != 0.0 or context.task_index != index:
+                            shifts.append((context, delta, index, prior_origin))
+                    else:
+                        removed.append(context)
+                        context = None
+
+                if context is None:
+                    context = self.Context(interface, self, origin, index, task_name, prior_origin)
+                    context.task_requeued = requeued
                     add = task.schedule(context)
-
                     for check in add:
-                        if check.origin < first_possible_origin:
-                            raise self.RescheduleFailure("task requires action in the past")
-
-                    modified_contexts.append(context)
+                        late = max(late, first_possible_origin - check.origin)
+                    built.append((context, add))
+                contexts.append(context)
+
+                prior_origin = origin
+                origin += task.origin_advance
+
+            if late > 0.0:
+                raise self.RescheduleFailure("task requires action in the past", late=late)
+            return _EditPlan(self._tasks[:first] + [entry.task for entry in entries], contexts,
+                             removed, shifts, built)
+
+        def apply_edit(plan: _EditPlan):
+            discard_contexts(plan.removed)
+
+            held_by_context: typing.Dict["Execute.Context", typing.List[Runnable]] = dict()
+            if waiting and plan.shifts:
+                for held in waiting:
+                    held_by_context.setdefault(held.context, list()).append(held)
+            for context, delta, index, prior_origin in plan.shifts:
+                context.task_index = index
+                context.prior_origin = prior_origin
+                context.origin += delta
+            moved = [(context, delta) for context, delta, _, _ in plan.shifts if delta != 0.0]
+            deltas = dict(moved)
+            for entry in run.shift_contexts(moved):
+                runnable = entry[2]
+                if math.isfinite(runnable.origin):
+                    runnable.origin += deltas[runnable.context]
+                if runnable.set_events or runnable.clear_events:
+                    self._timeline.discard(runnable)
+                    self._timeline.add(entry)
+            for context, delta in moved:
+                for held in held_by_context.get(context, ()):
+                    if math.isfinite(held.origin):
+                        held.origin += delta
+                    self._timeline.discard(held)
+                    self._timeline.add([held.origin, run.next_sequence(), held])
+
+            for context, add in plan.built:
+                set_lead(context, add)
+                schedule_runnables(add)
+            self._tasks = plan.tasks
+            self.contexts = plan.contexts
+            if self.checkpoint is not None:
+                self.checkpoint.plan(self)
+
+        def apply_reschedule(candidates: typing.Callable[[typing.List[Task], typing.List["Execute.Context"]],
+                                                         typing.Iterable[typing.Tuple[typing.Any, int,
+                                                                                      typing.List[_TaskEntry]]]]):
+            if source is not None:
+                raise self.RescheduleFailure("streaming schedules cannot be modified")
+            failure = None
+            for result, first, entries in candidates(self._tasks, self.contexts):
+                try:
+                    plan = plan_edit(first, entries)
+                except self.RescheduleFailure as e:
+                    if failure is None:
+                        failure = e
+                    continue
+                apply_edit(plan)
+                return result
+            if failure is None:
+                failure = self.RescheduleFailure("no feasible placement")
+            raise failure
+
+        async def skip(context: "Execute.Context", message: typing.Optional[str]):
+            """Abandon the rest of a task, along with any later ones already under way, and continue the schedule
+            with the recovery task in its place"""
+            nonlocal source, source_names, next_origin, next_index, prior_origin
+            if context.task_completed or context.task_skipped or not self.contexts:
+                return
+            position = context.task_index - self.contexts[0].task_index
+            if not (0 <= position < len(self.contexts)) or self.contexts[position] is not context:
+                return
+            _LOGGER.warning(f"Skipping task {context.task_index + 1}: {message}")
+            self.skipped.append(Skipped(context.task_index, context.task_name, message))
 
-                    modified_run.extend(add)
-                    origin += task.origin_advance
-                    index += 1
+            following = self.contexts[position + 1:]
+            if streaming:
+                # Streamed again after the recovery, so everything already scheduled is discarded
+                abandoned = [context] + following
+            else:
+                # Tasks already under way rely on the state the recovery resets, so they start over
+                abandoned = [context] + [ctx for ctx in following if ctx.task_activated]
+            for ctx in abandoned:
+                ctx.task_skipped = True
+            cancelled = [background for ctx in abandoned for background in backgrounds.pop(ctx, ())]
+            for background in cancelled:
+                background.cancel()
+            for background in cancelled:
+                try:
+                    await background
+                except:
+                    pass
+                self._background_tasks.discard(background)
+            discard_contexts(abandoned)
+            if context.task_started:
+                abort_cycle(message)
+            if self.checkpoint is not None:
+                self.checkpoint.skipped(context.task_index)
+
+            recovery = self.recovery if self.recovery is not None else Task()
+            requeue = self.requeue_failed and not context.task_requeued
+            # Earlier tasks still running are done by the origin of this one, so the recovery never disturbs them
+            start = max(self.clock.monotonic() - zero_monotonic_time, context.origin)
+
+            if streaming:
+                if following:
+                    start = max(start, self.clock.monotonic() - zero_monotonic_time +
+                                leads.get(following[0], 0.0) - recovery.origin_advance)
+                tasks_again = [streamed.pop(ctx) for ctx in following]
+                names_again = [ctx.task_name for ctx in following]
+                streamed.pop(context, None)
+                del self.contexts[position:]
+                next_origin = start
+                next_index = context.task_index
+                prior_origin = context.prior_origin
+                add_task(recovery, context.task_name)
+                self.contexts[-1].task_skipped = True
+                if tasks_again:
+                    source = itertools.chain(tasks_again, source if source is not None else ())
+                    if source_names is not None:
+                        source_names = itertools.chain(names_again, source_names)
+                # A stream has no end to requeue the task at
+                return
 
-            self._tasks = modified_tasks
-            self.contexts = modified_contexts
-            run = modified_run
-            run.sort(key=lambda runnable: runnable.origin)
+            entries = [_TaskEntry(recovery, None, context.task_name)]
+            for ctx, task in zip(following, self._tasks[position + 1:]):
+                entries.append(_TaskEntry(task, None if ctx.task_skipped else ctx, ctx.task_name, ctx.task_requeued))
+            if requeue:
+                entries.append(_TaskEntry(self._tasks[position], None, context.task_name, True))
+            try:
+                try:
+                    plan = plan_edit(position, entries, start)
+                except self.RescheduleFailure as e:
+                    if not (0.0 < e.late < math.inf):
+                        raise
+                    # Wait until the earliest action of the tasks that follow is no longer in the past
+                    plan = plan_edit(position, entries, start + e.late)
+            except self.RescheduleFailure as e:
+                _LOGGER.warning(f"Unable to continue after skipping task {context.task_index + 1}: {e.message}")
+                await self.abort(message)
+                return
+            apply_edit(plan)
+            self.contexts[position].task_skipped = True
 
         async def get_next_execute() -> typing.Optional[Runnable]:
-            nonlocal run
             nonlocal zero_monotonic_time
             nonlocal zero_real_time
-            while run:
+            nonlocal executing
+            nonlocal planned_time
+            while run or waiting or source is not None:
                 if self._paused is not None:
                     # So that unscheduled events are updated
                     await self.state_update()
 
                     _LOGGER.debug("Schedule processing paused")
-                    pause_begin = time.monotonic()
+                    pause_begin = self.clock.monotonic()
                     await self._paused
-                    pause_consumed = time.monotonic() - pause_begin
+                    pause_consumed = self.clock.monotonic() - pause_begin
                     self._paused = None
                     _LOGGER.debug("Schedule processing resumed")
 
                     # Apply a delay so that the pause "doesn't happen" with respect to time scheduling
                     zero_monotonic_time += pause_consumed
                     zero_real_time += pause_consumed
+                    self._timeline.zero_time = zero_real_time
+                    if self.checkpoint is not None:
+                        self.checkpoint.zero(zero_real_time)
                     continue
 
                 if self._aborted:
                     return None
 
+                if self._skip_requests:
+                    requests = self._skip_requests
+                    self._skip_requests = list()
+                    for request in requests:
+                        await skip(request.context, request.message)
+                    continue
+
                 if self._reschedule_operation is not None:
                     op = self._reschedule_operation
                     self._reschedule_operation = None
                     try:
-                        apply_reschedule(op.remove, op.append)
+                        result = apply_reschedule(op.candidates)
                         if self._reschedule_result:
-                            self._reschedule_result.set_result(True)
+                            self._reschedule_result.set_result(result)
                     except Exception as e:
                         if self._reschedule_result:
                             self._reschedule_result.set_exception(e)
@@ -340,58 +1133,118 @@ class Execute:
                             _LOGGER.warning("Reschedule failure", exc_info=True)
                     continue
 
-                update_future_events()
+                while finishing:
+                    finished, background, finished_at = finishing.pop(0)
+                    executing -= 1
+                    if background_failed(background):
+                        finished.failed = True
+                    predecessor_completed(finished, finished_at - zero_monotonic_time)
 
                 # Call before the wait, so that event times are updated
                 await self.state_update()
 
-                to_run = run[0]
+                origin = run.peek_origin()
+                if source is not None:
+                    now = self.clock.monotonic() - zero_monotonic_time
+                    materialize(max(now, origin if origin is not None else next_origin), now)
+                    origin = run.peek_origin()
+                if origin is None:
+                    if executing <= 0:
+                        _LOGGER.warning(f"Dropping {len(waiting)} runnables with predecessors that never completed")
+                        for held in waiting:
+                            self._timeline.discard(held)
+                        waiting.clear()
+                        continue
+                    await self._break_event.wait()
+                    self._break_event.clear()
+                    continue
 
                 # Wait for ready or something to do
-                if not await wait_for_ready(to_run):
+                if not await wait_for_ready(origin):
                     continue
 
-                run = run[1:]
-                return to_run
+                running = run.pop()
+                deadline = deadlines.pop(running, None)
+                if deadline is not None and self.clock.monotonic() - zero_monotonic_time > deadline:
+                    await self.abort(f"{type(running).__name__} exceeded its maximum lag after a predecessor")
+                    return None
+                planned_time = origin + zero_monotonic_time if math.isfinite(origin) else None
+                return running
 
             return None
 
         async def execute_pending(running: Runnable):
             nonlocal zero_monotonic_time
             nonlocal zero_real_time
+            nonlocal executing
             # Mark as executing
             running.context.task_activated = True
+            was_started = running.context.task_started
+            was_completed = running.context.task_completed
             await self.state_update()
 
-            await self.start_background(running.execute())
-
+            record = self.timing.dispatched(running, planned_time, self.clock.monotonic())
+            # Superseded controllers are cancelled before the claimant starts, so they never act together
+            resources = claim_resources(running)
+            background = await self.start_background(running.execute(), running.context.task_index)
+            for resource in resources:
+                claims[resource] = (running, background)
+            context_backgrounds = backgrounds.setdefault(running.context, set())
+            context_backgrounds.add(background)
+
+            def execute_done(task: asyncio.Task):
+                record.executed = self.clock.monotonic()
+                self.timing.executed(record, task, task in self._preempted)
+                context_backgrounds.discard(task)
+                if not context_backgrounds and backgrounds.get(running.context) is context_backgrounds:
+                    del backgrounds[running.context]
+
+            background.add_done_callback(execute_done)
+
+            delay_begin = self.clock.monotonic()
             delay_schedule = await running.delay()
+            record.delay = self.clock.monotonic() - delay_begin
             if delay_schedule and math.isfinite(running.origin):
                 # Change the zero origin so that time spent delaying is removed and the current time "becomes"
                 # the start of executing the delaying runnable
-                zero_monotonic_time = time.monotonic() - running.origin
-                zero_real_time = time.time() - running.origin
+                zero_monotonic_time = self.clock.monotonic() - running.origin
+                zero_real_time = self.clock.time() - running.origin
+                self._timeline.zero_time = zero_real_time
+                if self.checkpoint is not None:
+                    self.checkpoint.zero(zero_real_time)
 
             # Completed now, so record events that were processed
-            completed_time = time.time()
-            for event in running.clear_events:
-                self.events.pop(event, None)
-            for event in running.set_events:
-                self.events[event] = Event(completed_time, True)
-
-        async def reap_background_tasks():
-            if len(self._background_tasks) == 0:
+            self._timeline.complete(running, self.clock.time())
+
+            if self.checkpoint is not None:
+                context = running.context
+                in_cycle = context.task_started and not context.task_completed
+                if in_cycle and not was_started:
+                    self.checkpoint.cycle_begin(context.task_index, active_cycle())
+                self.checkpoint.completed(running, active_cycle() if in_cycle and was_started else None)
+                if context.task_completed and not was_completed:
+                    self.checkpoint.cycle_end(context.task_index)
+
+            if running.context.task_completed and not was_completed:
+                self.timing.write_cycle(running.context.task_index)
+
+            if running not in dependents:
+                return
+            if background.done():
+                if background_failed(background):
+                    running.failed = True
+                predecessor_completed(running, self.clock.monotonic() - zero_monotonic_time)
                 return
 
-            completed_tasks, _ = await asyncio.wait(self._background_tasks,
-                                                    timeout=0,
-                                                    return_when=asyncio.FIRST_COMPLETED)
-            for task in completed_tasks:
-                try:
-                    await task
-                except:
-                    _LOGGER.warning("Error in background task", exc_info=True)
-                self._background_tasks.discard(task)
+            # Dependents follow the completion of the action itself, not just its dispatch
+            executing += 1
+
+            def background_done(task: asyncio.Task):
+                finishing.append((running, task, self.clock.monotonic()))
+                if self._break_event:
+                    self._break_event.set()
+
+            background.add_done_callback(background_done)
 
         while True:
             to_run = await get_next_execute()
@@ -399,19 +1252,26 @@ class Execute:
                 break
 
             await execute_pending(to_run)
-            await reap_background_tasks()
+            # Background executions begin before the next dispatch, finished ones are reaped by their callbacks
+            await asyncio.sleep(0)
 
         if self._aborted:
-            await self._abort_processing()
+            await self._abort_processing(interface)
             self._break_event = None
+            if self.checkpoint is not None:
+                self.checkpoint.finish(False)
             return False
         else:
             await self._complete_processing()
             self._break_event = None
+            if self.checkpoint is not None:
+                self.checkpoint.finish(True)
             return True
 
     async def abort(self, message: typing.Optional[str] = None):
         """Abort the running schedule."""
+        if not self._aborted:
+            self._abort_requested = self.clock.monotonic()
         self._aborted = True
         if message is not None:
             self.abort_message = message
@@ -419,6 +1279,13 @@ class Execute:
             self._break_event.set()
         _LOGGER.debug("Schedule processing aborting")
 
+    async def skip_task(self, context: "Execute.Context", message: typing.Optional[str] = None):
+        """Abandon the rest of a task and continue the schedule, with the recovery task in its place"""
+        self._skip_requests.append(_Skip(context, message))
+        if self._break_event:
+            self._break_event.set()
+        _LOGGER.debug(f"Skipping task {context.task_index + 1} requested")
+
     async def pause(self):
         """Pause the schedule execution"""
         if self._paused is not None:
@@ -439,33 +1306,134 @@ class Execute:
         """Test if the schedule has currently been paused"""
         return self._paused is not None
 
-    async def reschedule(self, remove: typing.Optional[int] = None,
-                         append: typing.Optional[typing.Sequence[Task]] = None):
-        """Attempt to remove the specified task index and all tasks after it and append the new ones"""
+    async def _modify(self, candidates) -> typing.Any:
         if self._reschedule_result is not None:
             raise self.RescheduleFailure("reschedule currently in progress")
         self._reschedule_result = asyncio.get_running_loop().create_future()
         assert self._reschedule_operation is None
-        self._reschedule_operation = _Reschedule(remove, append)
+        self._reschedule_operation = _Reschedule(candidates)
         if self._break_event:
             self._break_event.set()
-        await self._reschedule_result
-        self._reschedule_result.result()
-        self._reschedule_result = None
+        try:
+            await self._reschedule_result
+            return self._reschedule_result.result()
+        finally:
+            self._reschedule_result = None
+
+    @staticmethod
+    def _current_entries(tasks: typing.List[Task], contexts: typing.List["Execute.Context"],
+                         begin: int, end: typing.Optional[int] = None) -> typing.List[_TaskEntry]:
+        if end is None:
+            end = len(tasks)
+        return [_TaskEntry(tasks[i], contexts[i], contexts[i].task_name, contexts[i].task_requeued)
+                for i in range(begin, end)]
 
-    async def start_background(self, execute: typing.Coroutine) -> asyncio.Task:
+    async def reschedule(self, remove: typing.Optional[int] = None,
+                         append: typing.Optional[typing.Sequence[Task]] = None):
+        """Attempt to remove the specified task index and all tasks after it and append the new ones"""
+        def candidates(tasks, contexts):
+            first = remove if remove is not None else len(tasks)
+            yield True, first, [_TaskEntry(task, None, None) for task in append or ()]
+
+        await self._modify(candidates)
+
+    @classmethod
+    def _replace_entries(cls, tasks: typing.List[Task], contexts: typing.List["Execute.Context"], first: int,
+                         entries: typing.List[_TaskEntry], replace: typing.Optional[typing.Mapping[int, Task]]
+                         ) -> typing.Tuple[int, typing.List[_TaskEntry]]:
+        """Replace the tasks at indices of the edited schedule, extending the edit back to the earliest one"""
+        if not replace:
+            return first, entries
+        begin = min(first, min(replace))
+        entries = cls._current_entries(tasks, contexts, begin, first) + entries
+        for index, task in replace.items():
+            entry = entries[index - begin]
+            if entry.context is not None and entry.context.task_activated:
+                # Already under way, so only a longer advance can still be honoured by starting the next one later
+                if task.origin_advance > entry.task.origin_advance:
+                    entries[index - begin] = entry._replace(task=task)
+                continue
+            entries[index - begin] = _TaskEntry(task, None, entry.task_name, entry.requeued)
+        return begin, entries
+
+    async def insert_task(self, index: int, task: Task, task_name: typing.Optional[str] = None,
+                          replace: typing.Optional[typing.Mapping[int, Task]] = None):
+        """Attempt to insert a task before the specified task index, shifting the ones after it.  Tasks at the
+        indices of the replacements (after the insert) are changed too, e.g. to ones compacted for their new
+        neighbours."""
+        def candidates(tasks, contexts):
+            entries = [_TaskEntry(task, None, task_name)] + self._current_entries(tasks, contexts, index)
+            yield (index,) + self._replace_entries(tasks, contexts, index, entries, replace)
+
+        await self._modify(candidates)
+
+    async def delete_task(self, index: int, replace: typing.Optional[typing.Mapping[int, Task]] = None):
+        """Attempt to remove the task at the specified index, shifting the ones after it and changing the tasks
+        at the indices of the replacements (after the removal)"""
+        def candidates(tasks, contexts):
+            entries = self._current_entries(tasks, contexts, index + 1)
+            yield (index,) + self._replace_entries(tasks, contexts, index, entries, replace)
+
+        await self._modify(candidates)
+
+    async def move_task(self, index: int, to: int, task: typing.Optional[Task] = None,
+                        replace: typing.Optional[typing.Mapping[int, Task]] = None):
+        """Attempt to move the task at an index so it is at another one, optionally replacing it with another
+        task (e.g. one compacted for its new neighbours) along with the tasks at the indices of the
+        replacements (after the move)"""
+        def candidates(tasks, contexts):
+            first = min(index, to)
+            entries = self._current_entries(tasks, contexts, first, max(index, to) + 1)
+            moved = entries.pop(index - first)
+            if task is not None:
+                moved = _TaskEntry(task, None, moved.task_name, moved.requeued)
+            entries.insert(to - first, moved)
+            entries += self._current_entries(tasks, contexts, max(index, to) + 1)
+            yield (to,) + self._replace_entries(tasks, contexts, first, entries, replace)
+
+        await self._modify(candidates)
+
+    async def insert_task_earliest(self, task: Task, first_index: int = 0,
+                                   task_name: typing.Optional[str] = None) -> int:
+        """Insert a task at the earliest index (no earlier than the first one) where it and the tasks after it
+        can all still be executed, returning the index used"""
+        def candidates(tasks, contexts):
+            begin = first_index
+            for i in range(len(contexts)):
+                if contexts[i].task_activated:
+                    begin = max(begin, i + 1)
+            for index in range(begin, len(tasks) + 1):
+                yield index, index, [_TaskEntry(task, None, task_name)] + self._current_entries(tasks, contexts, index)
+
+        return await self._modify(candidates)
+
+    async def start_background(self, execute: typing.Coroutine,
+                               task_index: typing.Optional[int] = None) -> asyncio.Task:
         """Start a task in the background, which will be waited for and aborted with the schedule"""
         task = asyncio.create_task(execute)
         self._background_tasks.add(task)
+        if task_index is not None:
+            self._background_index[task] = task_index
+        task.add_done_callback(self._background_finished)
         return task
 
-    async def complete_background(self):
-        """Wait for completion of all background tasks"""
-        while len(self._background_tasks) != 0:
-            to_wait = list(self._background_tasks)
-            self._background_tasks.clear()
-            for task in to_wait:
-                try:
-                    await task
-                except:
-                    _LOGGER.warning("Error in background task", exc_info=True)
+    def _background_finished(self, task: asyncio.Task) -> None:
+        """Remove a finished background task from the registry, reporting it if it failed"""
+        self._background_tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is None or task in self._preempted or self._aborted:
+            return
+        _LOGGER.warning("Error in background task", exc_info=(type(error), error, error.__traceback__))
+
+    async def complete_background(self, through: typing.Optional[int] = None):
+        """Wait for completion of all background tasks, or only the ones of tasks up to an index so a task
+        ending does not wait for a later one that started early"""
+        while True:
+            to_wait = [task for task in self._background_tasks
+                       if through is None or self._background_index.get(task, through) <= through]
+            if not to_wait:
+                break
+            # Failures are reported as the tasks finish, so this only waits for them
+            await asyncio.wait(to_wait)
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import typing
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Seconds between acquisitions of a signal while it has subscribers
+DEFAULT_PERIOD = 1.0
+
+
+def _retrieve_result(read: asyncio.Task) -> None:
+    # A failed read nobody waited for any more is not reported when it is collected
+    if not read.cancelled():
+        read.exception()
+
+
+class Signal:
+    """A signal read through the hub, with the latest reading cached and concurrent reads merged into one"""
+
+    def __init__(self, name: str, read: typing.Callable[[], typing.Awaitable[typing.Any]],
+                 period: float = DEFAULT_PERIOD):
+        self.name = name
+        self.period = period
+        self._read = read
+        self._pending: typing.Optional[asyncio.Task] = None
+        self._subscribers: typing.List[typing.Callable[[typing.Any], None]] = list()
+        self._acquisition: typing.Optional[asyncio.Task] = None
+        # The latest reading and the loop time it was read at, None until read
+        self.value: typing.Any = None
+        self.time: typing.Optional[float] = None
+        # Reads of the signal made, and the requests for it answered without one
+        self.reads = 0
+        self.served = 0
+
+    async def _read_once(self) -> typing.Any:
+        self.reads += 1
+        try:
+            value = await self._read()
+        finally:
+            self._pending = None
+        self.publish(value)
+        return value
+
+    def publish(self, value: typing.Any) -> None:
+        """Use a reading of the signal made elsewhere as the latest one, passing it on to the subscribers"""
+        self.value = value
+        self.time = asyncio.get_running_loop().time()
+        if value is not None:
+            for subscriber in list(self._subscribers):
+                subscriber(value)
+
+    async def _acquire(self) -> typing.Any:
+        pending = self._pending
+        if pending is None:
+            # A task of its own, so a reader cancelled part way does not cancel the read for the others
+            pending = asyncio.get_running_loop().create_task(self._read_once())
+            pending.add_done_callback(_retrieve_result)
+            self._pending = pending
+        else:
+            self.served += 1
+        return await asyncio.shield(pending)
+
+    async def get(self, max_age: typing.Optional[float] = None) -> typing.Any:
+        """Get the signal, from the cache when the latest reading is younger than the maximum age (seconds,
+        the acquisition period if not given), otherwise joining or starting a read"""
+        if max_age is None:
+            max_age = self.period
+        if self.time is not None and asyncio.get_running_loop().time() - self.time < max_age:
+            self.served += 1
+            return self.value
+        return await self._acquire()
+
+    def invalidate(self) -> None:
+        """Discard the cached reading, so the next request reads the signal again"""
+        self.time = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._subscribers:
+            latest = self.time
+            if latest is not None:
+                wait = latest + self.period - loop.time()
+                if wait > 0.0:
+                    await asyncio.sleep(wait)
+                    if self.time != latest:
+                        # Read for another consumer meanwhile, which the subscribers were given
+                        continue
+                    if not self._subscribers:
+                        break
+            try:
+                await self._acquire()
+            except Exception:
+                _LOGGER.warning(f"Reading {self.name} failed", exc_info=True)
+                await asyncio.sleep(self.period)
+        self._acquisition = None
+
+    def subscribe(self, update: typing.Callable[[typing.Any], None]) -> typing.Callable[[], None]:
+        """Call an update with every reading of the signal, acquiring it each period while subscribed.  This
+        must be called on the event loop, and returns a call that ends the subscription."""
+        self._subscribers.append(update)
+        if self._acquisition is None:
+            self._acquisition = asyncio.get_running_loop().create_task(self._run())
+
+        def unsubscribe():
+            if update in self._subscribers:
+                self._subscribers.remove(update)
+
+        return unsubscribe
+
+
+class SensorHub:
+    """The signals of an interface, so the consumers of one share its readings instead of each reading the
+    hardware"""
+
+    def __init__(self):
+        self._signals: typing.Dict[str, Signal] = dict()
+
+    def signal(self, name: str, read: typing.Optional[typing.Callable[[], typing.Awaitable[typing.Any]]] = None,
+               period: float = DEFAULT_PERIOD) -> Signal:
+        """Get a signal, adding it with its read call and acquisition period if it is not known yet"""
+        signal = self._signals.get(name)
+        if signal is None:
+            if read is None:
+                raise KeyError(name)
+            signal = Signal(name, read, period)
+            self._signals[name] = signal
+        return signal
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._signals
+
+    def __iter__(self) -> typing.Iterator[Signal]:
+        return iter(self._signals.values())
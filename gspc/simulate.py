@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import math
+import random
+import typing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from gspc.clock import VirtualClock
+from gspc.hw.interface import Interface
+from gspc.hw.stub import Stub
+from gspc.schedule import Execute, known_tasks
+from gspc.timing import TimingMonitor
+
+_LOGGER = logging.getLogger(__name__)
+
+
+Distribution = namedtuple("Distribution", ["kind", "parameters"])
+RunResult = namedtuple("RunResult", ["completed", "runtime", "starts", "ends", "abort_message", "skipped"])
+
+# Seconds for an interface call, roughly a LabJack round trip
+DEFAULT_LATENCY = Distribution("exponential", (0.005,))
+# Seconds from the cryogen being enabled until the oven signal shows it cooled
+DEFAULT_COOLING = Distribution("normal", (380.0, 30.0))
+
+_DISTRIBUTION_PARAMETERS = {
+    "constant": 1,
+    "uniform": 2,
+    "normal": 2,
+    "exponential": 1,
+}
+
+
+def parse_distribution(text: str) -> Distribution:
+    """Parse a distribution like "normal:380:30", with the parameters after the kind"""
+    parts = text.split(':')
+    kind = parts[0].strip().lower()
+    count = _DISTRIBUTION_PARAMETERS.get(kind)
+    if count is None:
+        raise ValueError(f"Unknown distribution {kind}")
+    if len(parts) - 1 != count:
+        raise ValueError(f"Distribution {kind} requires {count} parameters")
+    return Distribution(kind, tuple(float(p) for p in parts[1:]))
+
+
+def sample_distribution(distribution: Distribution, rng: random.Random) -> float:
+    """Draw a value from a distribution, never less than zero"""
+    kind, parameters = distribution
+    if kind == "constant":
+        value = parameters[0]
+    elif kind == "uniform":
+        value = rng.uniform(parameters[0], parameters[1])
+    elif kind == "normal":
+        value = rng.gauss(parameters[0], parameters[1])
+    elif kind == "exponential":
+        value = rng.expovariate(1.0 / parameters[0]) if parameters[0] > 0.0 else 0.0
+    else:
+        raise ValueError(f"Unknown distribution {kind}")
+    return max(value, 0.0)
+
+
+class RandomizedStub(Stub):
+    """A stub interface where every call takes a random time and the oven takes a random time to cool once the
+    cryogen is enabled.  The oven signal approaches the cooled level exponentially, crossing the level the tasks
+    wait for at the sampled time."""
+
+    COOLED_SIGNAL = 4.0
+    WARM_SIGNAL = 2.0
+    CROSSING_SIGNAL = 2.5
+
+    def __init__(self, clock: VirtualClock, rng: random.Random,
+                 latency: Distribution = DEFAULT_LATENCY, cooling: Distribution = DEFAULT_COOLING):
+        Stub.__init__(self, clock.loop)
+        self._clock = clock
+        self._rng = rng
+        self._latency = latency
+        self._cooling = cooling
+        self._cooled_at = -math.inf
+        self._cooling_seconds = 0.0
+
+        for name in Interface.__abstractmethods__:
+            setattr(self, name, self._with_latency(getattr(self, name)))
+
+    def _with_latency(self, call: typing.Callable[..., typing.Awaitable]) -> typing.Callable[..., typing.Awaitable]:
+        async def delayed(*args, **kwargs):
+            await self._clock.sleep(sample_distribution(self._latency, self._rng))
+            return await call(*args, **kwargs)
+        return delayed
+
+    async def get_oven_temperature_signal(self) -> float:
+        now = self._clock.monotonic()
+        if self._cooled_at == math.inf:
+            return self.WARM_SIGNAL
+        if self._cooled_at == -math.inf or self._cooling_seconds <= 0.0:
+            return self.COOLED_SIGNAL
+        span = self.COOLED_SIGNAL - self.WARM_SIGNAL
+        remaining = (self.COOLED_SIGNAL - self.CROSSING_SIGNAL) / span
+        elapsed = now - (self._cooled_at - self._cooling_seconds)
+        signal = self.COOLED_SIGNAL - span * remaining ** (elapsed / self._cooling_seconds)
+        if now >= self._cooled_at:
+            return max(signal, self.CROSSING_SIGNAL)
+        return min(signal, self.CROSSING_SIGNAL)
+
+    async def set_cryogen(self, enable: bool):
+        if enable and not self.cryogen and self._clock.monotonic() < self._cooled_at:
+            self._cooling_seconds = sample_distribution(self._cooling, self._rng)
+            self._cooled_at = self._clock.monotonic() + self._cooling_seconds
+        self.cryogen = enable
+
+    async def set_cryo_heater(self, enable: bool):
+        self.cryo_heater = enable
+        if enable:
+            self._cooled_at = math.inf
+
+
+def simulate_run(names: typing.Sequence[str], seed: int,
+                 latency: Distribution = DEFAULT_LATENCY, cooling: Distribution = DEFAULT_COOLING,
+                 advances: typing.Optional[typing.Sequence[float]] = None,
+                 dependency_mode: bool = False, requeue: bool = False) -> RunResult:
+    """Execute the named tasks once in virtual time, with the start and end of each task in seconds from the
+    start of the run (None if it never got there).  Requeued tasks follow the named ones."""
+    import gspc.tasks
+    from gspc.optimize import _with_advance
+    from gspc.tasks.recovery import SafeState
+
+    tasks = [known_tasks[name] for name in names]
+    if advances is not None:
+        tasks = [_with_advance(task, advance) for task, advance in zip(tasks, advances)]
+
+    clock = VirtualClock()
+    asyncio.set_event_loop(clock.loop)
+    try:
+        interface = RandomizedStub(clock, random.Random(seed), latency, cooling)
+        exe = Execute(tasks, task_names=names, clock=clock, dependency_mode=dependency_mode,
+                      recovery=SafeState(), requeue_failed=requeue)
+        # Enough history to keep the start and end of every task
+        exe.timing = TimingMonitor(history=max(len(names) * 200, 4096), critical=())
+        start = clock.monotonic()
+        completed = clock.run(exe.execute(interface))
+        runtime = clock.monotonic() - start
+    finally:
+        asyncio.set_event_loop(None)
+        clock.loop.close()
+
+    starts: typing.List[typing.Optional[float]] = [None] * len(exe.contexts)
+    ends: typing.List[typing.Optional[float]] = [None] * len(exe.contexts)
+    for record in exe.timing.records:
+        if record.name == "CycleBegin" and starts[record.task_index] is None:
+            starts[record.task_index] = record.dispatched - start
+        elif record.name == "CycleEnd" and record.delay is not None and exe.contexts[record.task_index].task_completed:
+            ends[record.task_index] = record.dispatched + record.delay - start
+    return RunResult(completed, runtime, starts, ends, None if completed else exe.abort_message, len(exe.skipped))
+
+
+def _simulate_run(arguments: tuple) -> RunResult:
+    return simulate_run(*arguments)
+
+
+def _quiet_worker():
+    # Every run logs a full day of activity, so only report problems with the simulation itself
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+
+def simulate(names: typing.Sequence[str], runs: int, seed: int = 0,
+             latency: Distribution = DEFAULT_LATENCY, cooling: Distribution = DEFAULT_COOLING,
+             advances: typing.Optional[typing.Sequence[float]] = None, dependency_mode: bool = False,
+             workers: typing.Optional[int] = None, requeue: bool = False) -> typing.List[RunResult]:
+    """Execute the named tasks repeatedly across a process pool, with each run seeded from the base seed"""
+    arguments = [(list(names), seed + i, latency, cooling, advances, dependency_mode, requeue)
+                 for i in range(runs)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_quiet_worker) as executor:
+        return list(executor.map(_simulate_run, arguments))
+
+
+def percentile(values: typing.Sequence[float], fraction: float) -> typing.Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def samples_in_shift(result: RunResult, shift: float) -> int:
+    """Get the number of tasks a run completed within the shift (seconds)"""
+    return sum(1 for end in result.ends if end is not None and end <= shift)
+
+
+if __name__ == '__main__':
+    import argparse
+    import gspc.tasks
+    from gspc.compiler import parse_task_file
+    from gspc.optimize import Compactor
+
+    opt = argparse.ArgumentParser(
+        description='Simulate a task file many times with randomized hardware timing'
+    )
+    opt.add_argument('file', help='Task file to simulate.')
+    opt.add_argument('--runs', type=int, default=100,
+                     help='Number of simulated runs.')
+    opt.add_argument('--workers', type=int,
+                     help='Number of worker processes, defaulting to the processor count.')
+    opt.add_argument('--seed', type=int, default=0,
+                     help='Seed of the first run.')
+    opt.add_argument('--latency', type=parse_distribution, default=DEFAULT_LATENCY, metavar='DISTRIBUTION',
+                     help='Seconds each hardware call takes, e.g. "exponential:0.005".')
+    opt.add_argument('--cooling', type=parse_distribution, default=DEFAULT_COOLING, metavar='DISTRIBUTION',
+                     help='Seconds for the oven to cool after the cryogen is enabled, e.g. "normal:380:30".')
+    opt.add_argument('--shift', type=float, default=8.0,
+                     help='Shift length in hours, to report how many samples fit in it.')
+    opt.add_argument('--compact', action='store_true',
+                     help='Simulate with the compacted cycle advances.')
+    opt.add_argument('--dependencies', action='store_true',
+                     help='Simulate in dependency execution mode.')
+    opt.add_argument('--requeue', action='store_true',
+                     help='Run skipped tasks again at the end of the schedule.')
+
+    options = opt.parse_args()
+
+    with open(options.file, "r") as input_file:
+        names = [name for name, _ in parse_task_file(input_file.read())]
+    advances = None
+    if options.compact:
+        advances = [task.origin_advance for task in Compactor().compact([known_tasks[name] for name in names])]
+
+    results = simulate(names, options.runs, options.seed, options.latency, options.cooling,
+                       advances, options.dependencies, options.workers, options.requeue)
+
+    completed = [result for result in results if result.completed]
+    aborted = len(results) - len(completed)
+    print(f"{len(results)} runs, {aborted} aborted ({aborted / len(results):.1%})")
+    messages: typing.Dict[str, int] = dict()
+    for result in results:
+        if result.abort_message is not None:
+            messages[result.abort_message] = messages.get(result.abort_message, 0) + 1
+    for message, count in sorted(messages.items(), key=lambda item: -item[1]):
+        print(f"    {count:>6} {message}")
+    skipped = [result.skipped for result in results]
+    print(f"Skipped tasks per run: mean {sum(skipped) / len(skipped):.2f}, max {max(skipped)}")
+
+    runtimes = [result.runtime / 3600.0 for result in completed]
+    if runtimes:
+        print(f"Runtime (hours): min {min(runtimes):.3f}, median {percentile(runtimes, 0.5):.3f}, "
+              f"p95 {percentile(runtimes, 0.95):.3f}, max {max(runtimes):.3f}")
+
+    shift = options.shift * 3600.0
+    fit = sorted(samples_in_shift(result, shift) for result in results)
+    print(f"Samples completed in {options.shift:g} hours: min {fit[0]}, median {percentile(fit, 0.5)}, "
+          f"p5 {percentile(fit, 0.05)}")
+
+    print(f"{'#':>4} {'task':<16} {'median start':>14} {'p95 start':>12} {'slip':>8} {'reached':>8}")
+    nominal = 0.0
+    for i in range(len(names)):
+        starts = [result.starts[i] for result in results if result.starts[i] is not None]
+        median = percentile(starts, 0.5)
+        p95 = percentile(starts, 0.95)
+        if median is None:
+            print(f"{i + 1:>4} {names[i]:<16} {'NONE':>14} {'NONE':>12} {'':>8} {0.0:>8.1%}")
+        else:
+            print(f"{i + 1:>4} {names[i]:<16} {median:>14.0f} {p95:>12.0f} {p95 - nominal:>8.0f} "
+                  f"{len(starts) / len(results):>8.1%}")
+        nominal += advances[i] if advances is not None else known_tasks[names[i]].origin_advance
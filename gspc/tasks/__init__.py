@@ -3,6 +3,7 @@ from .flask import Flask
 from .pfpflask import PFPFlask
 from .tank import Tank
 from .zero import Zero
+from .recovery import SafeState
 
 register_task("Flask 1", Flask(1))
 register_task("Flask 3", Flask(3))
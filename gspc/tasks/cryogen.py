@@ -1,57 +1,141 @@
 import logging
+import typing
 from gspc.hw.interface import Interface
 from gspc.schedule import Runnable, Execute
+from gspc.cooling import oven_cooling
+from .temperature import WaitForOvenCool
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class EnableCryogen(Runnable):
-    def __init__(self, context: Execute.Context, origin: float):
-        Runnable.__init__(self, context, origin)
-        self.set_events.add("cryogen")
+    __slots__ = ()
+    set_events = frozenset({"cryogen"})
 
     async def execute(self):
         await self.context.interface.set_cryogen(True)
         _LOGGER.info("Activated cryogen")
 
+    def actuators(self):
+        return {"ln2": True}
 
-class DisableCryogen(Runnable):
-    def __init__(self, context: Execute.Context, origin: float):
+
+class AdaptiveEnableCryogen(Runnable):
+    """Enable the cryogen as late as the predicted oven cooling allows for it to be cool when required, but no
+    earlier than the origin, then follow the cooling for the next prediction.  Without a prediction it is
+    enabled at the default time."""
+
+    __slots__ = ("_default_in", "_cooled_in", "_record")
+    set_events = frozenset({"cryogen"})
+    # Seconds between oven readings while it cools
+    FOLLOW_INTERVAL = 2.0
+
+    def __init__(self, context: Execute.Context, origin: float, default: float, cooled_by: float,
+                 record: typing.Optional[
+                     typing.Callable[[typing.Optional[float], typing.Optional[float]], None]] = None):
         Runnable.__init__(self, context, origin)
-        self.clear_events.add("cryogen")
+        self._default_in = default - origin
+        self._cooled_in = cooled_by - origin
+        self._record = record
+
+    async def execute(self):
+        interface = self.context.interface
+        clock = self.context.clock
+        threshold = WaitForOvenCool.REQUIRED_TEMPERATURE_SIGNAL
+        model = oven_cooling(interface, threshold)
+        enable_at = clock.monotonic() + self._default_in
+        cooled_by = clock.monotonic() + self._cooled_in
+        predicted = model.predict()
+        lead = model.lead()
+        if lead is not None:
+            enable_at = cooled_by - lead
+        if enable_at > clock.monotonic():
+            _LOGGER.debug(f"Delaying the cryogen by {enable_at - clock.monotonic():.0f} seconds")
+            await clock.sleep(enable_at - clock.monotonic())
+
+        await interface.set_cryogen(True)
+        _LOGGER.info("Activated cryogen")
+
+        enabled = clock.monotonic()
+        samples = list()
+        actual = None
+        oven = interface.sensors.signal("oven_temperature")
+        while clock.monotonic() <= cooled_by + WaitForOvenCool.MAXIMUM_WAIT_SECONDS:
+            signal = await oven.get(self.FOLLOW_INTERVAL)
+            if signal is not None:
+                samples.append((clock.monotonic() - enabled, signal))
+                if signal >= threshold:
+                    actual = clock.monotonic() - enabled
+                    break
+            await clock.sleep(self.FOLLOW_INTERVAL)
+        if len(samples) > 1:
+            # An oven already cool when the cryogen was enabled says nothing about how it cools
+            model.add_cycle(samples, actual)
+
+        def seconds(value: typing.Optional[float]) -> str:
+            return value is not None and f"{value:.0f}" or "NONE"
+
+        _LOGGER.info(f"Oven cooling took {seconds(actual)} seconds, predicted {seconds(predicted)}")
+        if self._record is not None:
+            self._record(predicted, actual)
+
+    def actuators(self):
+        return {"ln2": True}
+
+
+class DisableCryogen(Runnable):
+    __slots__ = ()
+    clear_events = frozenset({"cryogen"})
 
     async def execute(self):
         await self.context.interface.set_cryogen(False)
         _LOGGER.info("Deactivated cryogen")
 
+    def actuators(self):
+        return {"ln2": False}
+
 
 class EnableGCCryogen(Runnable):
-    def __init__(self, context: Execute.Context, origin: float):
-        Runnable.__init__(self, context, origin)
-        self.set_events.add("gc_cryogen")
+    __slots__ = ()
+    set_events = frozenset({"gc_cryogen"})
 
     async def execute(self):
         await self.context.interface.set_gc_cryogen(True)
         _LOGGER.info("Activated GC cryogen")
 
+    def actuators(self):
+        return {"gc_ln2": True}
+
 
 class DisableGCCryogen(Runnable):
-    def __init__(self, context: Execute.Context, origin: float):
-        Runnable.__init__(self, context, origin)
-        self.clear_events.add("gc_cryogen")
+    __slots__ = ()
+    clear_events = frozenset({"gc_cryogen"})
 
     async def execute(self):
         await self.context.interface.set_gc_cryogen(False)
         _LOGGER.info("Deactivated GC cryogen")
 
+    def actuators(self):
+        return {"gc_ln2": False}
+
 
 class CryogenTrapHeaterOn(Runnable):
+    __slots__ = ()
+
     async def execute(self):
         _LOGGER.debug("Cryogen trap heater ON")
         await self.context.interface.set_cryo_heater(True)
 
+    def actuators(self):
+        return {"cryo_heater": True}
+
 
 class CryogenTrapHeaterOff(Runnable):
+    __slots__ = ()
+
     async def execute(self):
         _LOGGER.debug("Cryogen heater OFF")
         await self.context.interface.set_cryo_heater(False)
+
+    def actuators(self):
+        return {"cryo_heater": False}
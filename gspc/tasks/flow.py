@@ -1,47 +1,59 @@
 import logging
-import asyncio
-import time
 import math
 import typing
 from gspc.hw.interface import Interface
-from gspc.schedule import Runnable, Execute, AbortPoint
+from gspc.schedule import Runnable, Execute, AbortPoint, SignalGate
 
 _LOGGER = logging.getLogger(__name__)
 
+# Seconds a shared flow reading is used for, shorter than the one second loops that read it
+FLOW_MAX_AGE = 0.5
+
 
 class ZeroFlow(Runnable):
+    __slots__ = ("duration",)
+
     def __init__(self, context: Execute.Context, origin: float, duration: float = 20.0):
         Runnable.__init__(self, context, origin)
-        self._duration = duration
+        self.duration = duration
 
     async def execute(self):
         self.context.interface.sample_flow_zero_offset = 0.0
-        end_time = time.time() + self._duration
+        signal = self.context.interface.sensors.signal("flow")
+        # Readings cached before the offset was cleared include it
+        signal.invalidate()
+        clock = self.context.clock
+        end_time = clock.monotonic() + self.duration
         flow_sum = 0.0
         flow_count = 0
-        while time.time() <= end_time:
-            flow = await self.context.interface.get_flow_signal()
+        while clock.monotonic() <= end_time:
+            flow = await signal.get(0.0)
             if flow is not None:
                 flow_sum += flow
                 flow_count += 1
-            await asyncio.sleep(1)
+            await clock.sleep(1)
         if flow_sum <= 0:
             return
         zero_flow = flow_sum / flow_count
         self.context.interface.sample_flow_zero_offset = -zero_flow
+        signal.invalidate()
         _LOGGER.info(f"Measured zero flow as {zero_flow:.2f}")
 
 
 class FullFlow(Runnable):
-    def __init__(self, context: Execute.Context, origin: float):
-        Runnable.__init__(self, context, origin)
+    __slots__ = ()
 
     async def execute(self):
         await self.context.interface.set_flow(math.inf)
         _LOGGER.info(f"Set flow to fully open")
 
+    def actuators(self):
+        return {"flow_dac": math.inf}
+
 
 class StaticFlow(Runnable):
+    __slots__ = ("_flow",)
+
     def __init__(self, context: Execute.Context, origin: float, flow: float):
         Runnable.__init__(self, context, origin)
         self._flow = flow
@@ -50,15 +62,20 @@ class StaticFlow(Runnable):
         await self.context.interface.set_flow(self._flow)
         #_LOGGER.info(f"Set flow to {self._flow:.2f}")
 
+    def actuators(self):
+        return {"flow_dac": self._flow}
+
 
 class CheckNegativeFlow(Runnable):
+    __slots__ = ("_abort_point",)
+
     def __init__(self, context: Execute.Context, origin: float,
                  abort_point: typing.Optional[AbortPoint] = None):
         Runnable.__init__(self, context, origin)
         self._abort_point = abort_point
 
     async def execute(self):
-        measured_flow = await self.context.interface.get_flow_signal()
+        measured_flow = await self.context.interface.sensors.signal("flow").get(FLOW_MAX_AGE)
         if measured_flow >= -0.05:      # changed tolerance from 0.0 to -0.05
             return
         await self.context.interface.set_overflow(False)
@@ -69,6 +86,11 @@ class CheckNegativeFlow(Runnable):
             await self.context.schedule.abort("Negative sample flow")
 
 class FeedbackFlow(Runnable):
+    # The flow adjustment makes up to 15 one second iterations
+    __slots__ = ("_flow",)
+    duration = 15.0
+    preemptible = True
+
     def __init__(self, context: Execute.Context, origin: float, flow: float):
         Runnable.__init__(self, context, origin)
         self._flow = flow
@@ -76,11 +98,15 @@ class FeedbackFlow(Runnable):
     async def execute(self):
         await self.context.interface.adjust_flow(self._flow)
 
+    def actuators(self):
+        return {"flow_dac": self._flow}
+
 
 # this routine call adjust_flow up to 15 times. However, adjust_flow runs for 15 seconds.
 # Simplified (see above)
 class FeedbackFlow_OLD(Runnable):
     #Changed deadband from .15 to .1 11/18/25 to help with high pressure flask sampling flows. 
+    __slots__ = ("_flow",)
     DEADBAND = 0.1
     SETTLING_TIME = 0.3
 
@@ -95,37 +121,46 @@ class FeedbackFlow_OLD(Runnable):
             if abs(await self.context.interface.get_flow_signal() - self._flow) <= self.DEADBAND:
                 return
             await self.context.interface.adjust_flow(self._flow)
-            await asyncio.sleep(self.SETTLING_TIME)
+            await self.context.clock.sleep(self.SETTLING_TIME)
         _LOGGER.warning(f"Flow control feedback failed")
 
 
 class MaintainFlow(Runnable):
+    __slots__ = ("duration", "_flow", "_lower", "_upper", "_stopped")
+    preemptible = True
+
     def __init__(self, context: Execute.Context, origin: float, end: float, flow: float,
                  lower: typing.Optional[float] = None, upper: typing.Optional[float] = None):
         Runnable.__init__(self, context, origin)
-        self._duration = end - origin
+        self.duration = end - origin
         self._flow = flow
         self._lower = lower
         self._upper = upper
         self._stopped = False
 
     async def execute(self):
-        end_time = time.time() + self._duration
-        while time.time() <= end_time and not self._stopped:
-            measured_flow = await self.context.interface.get_flow_signal()
+        clock = self.context.clock
+        end_time = clock.monotonic() + self.duration
+        flow = self.context.interface.sensors.signal("flow")
+        while clock.monotonic() <= end_time and not self._stopped:
+            measured_flow = await flow.get(FLOW_MAX_AGE)
             if self._lower is not None and measured_flow < self._lower:
                 await self.context.interface.increment_flow(self._flow, 1.0)
                 _LOGGER.info(f"Increased flow {measured_flow:0.3f}")
             elif self._upper is not None and measured_flow > self._upper:
                 await self.context.interface.increment_flow(self._flow, -1.0)
                 _LOGGER.info(f"Decreased flow {measured_flow:0.3f}")
-            await asyncio.sleep(1)
+            await clock.sleep(1)
 
     async def stop(self):
         self._stopped = True
 
+    def actuators(self):
+        return {"flow_dac": self._flow}
+
 
 class DetectLowFlow(Runnable):
+    __slots__ = ("duration", "_flow", "_threshold", "_increment", "_low_flow_detected", "_low_flow_mode")
     TRIGGER_SECONDS = 2
 
     def __init__(self, context: Execute.Context, origin: float, end: float,
@@ -134,7 +169,7 @@ class DetectLowFlow(Runnable):
                  low_flow_detected: typing.Optional[typing.Callable[[], typing.Awaitable[None]]] = None,
                  low_flow_mode: typing.Optional[typing.Callable[[], typing.Awaitable[None]]] = None):
         Runnable.__init__(self, context, origin)
-        self._duration = end - origin
+        self.duration = end - origin
         self._flow = flow
         self._threshold = threshold
         self._increment = increment
@@ -142,43 +177,48 @@ class DetectLowFlow(Runnable):
         self._low_flow_mode = low_flow_mode
 
     async def execute(self):
-        end_time = time.time() + self._duration
-        low_begin_time = None
-        while time.time() <= end_time:
-            measured_flow = await self.context.interface.get_flow_signal()
-            if measured_flow < self._threshold:
-                # tries to adjust flow if that doesn't work runs the self._low_flow_mode method.
-                if low_begin_time is None:
-                    low_begin_time = time.time()
-                    if self._increment is not None:
-                        await self.context.interface.increment_flow(self._flow, self._increment)
-                    if self._low_flow_detected is not None:
-                        await self._low_flow_detected()
-                    _LOGGER.info(f"Low flow detected. Flow = {measured_flow:.3f}")
-                elif time.time() - low_begin_time >= self.TRIGGER_SECONDS:
-                    if self._low_flow_mode is not None:
-                        await self._low_flow_mode()
-                    _LOGGER.info(f"Extended low flow detected. Flow = {measured_flow:.3f}")
-                    return
-            else:
-                low_begin_time = None
-            await asyncio.sleep(1)
+        async def low_flow(measured_flow: float):
+            # Tries to adjust the flow, and if it stays low the low flow mode is run
+            if self._increment is not None:
+                await self.context.interface.increment_flow(self._flow, self._increment)
+            if self._low_flow_detected is not None:
+                await self._low_flow_detected()
+            _LOGGER.info(f"Low flow detected. Flow = {measured_flow:.3f}")
+
+        flow = self.context.interface.sensors.signal("flow")
+        gate = SignalGate(lambda: flow.get(FLOW_MAX_AGE), self._threshold, above=False,
+                          debounce=self.TRIGGER_SECONDS, entered=low_flow)
+        if not await gate.wait(self.context.clock, self.duration):
+            return
+        if self._low_flow_mode is not None:
+            await self._low_flow_mode()
+        _LOGGER.info(f"Extended low flow detected. Flow = {gate.value:.3f}")
+
+    def actuators(self):
+        if self._increment is None:
+            return dict()
+        return {"flow_dac": self._flow}
+
+    def resources(self):
+        # Only nudges the flow once, so it never takes over from a control loop
+        return ()
 
 
 class RecordLastFlow(Runnable):
+    __slots__ = ("_record",)
+
     def __init__(self, context: Execute.Context, origin: float,
                  record: typing.Callable[[float, float], None]):
         Runnable.__init__(self, context, origin)
         self._record = record
 
     async def execute(self):
-        self._record(await self.context.interface.get_flow_signal(),
-                     await self.context.interface.get_flow_control_output())
+        snapshot = await self.context.interface.read_snapshot(("flow", "flow_control_output"))
+        self._record(snapshot["flow"], snapshot["flow_control_output"])
 
 
 class LogFlow(Runnable):
-    def __init__(self, context: Execute.Context, origin: float):
-        Runnable.__init__(self, context, origin)
+    __slots__ = ()
 
     async def execute(self):
         await self.context.interface.log_flow()
\ No newline at end of file
@@ -6,15 +6,22 @@ _LOGGER = logging.getLogger(__name__)
 
 
 class GCReady(Runnable):
+    __slots__ = ()
+
     async def execute(self):
         await self.context.interface.ready_gcms()
 
+    def actuators(self):
+        return {"gc_start": True}
+
 
 class GCSample(Runnable):
-    def __init__(self, context: Execute.Context, origin: float):
-        Runnable.__init__(self, context, origin)
-        self.set_events.add("gc_trigger")
+    __slots__ = ()
+    set_events = frozenset({"gc_trigger"})
 
     async def execute(self):
         await self.context.interface.trigger_gcms()
         _LOGGER.info("GC started")
+
+    def actuators(self):
+        return {"gc_start": False}
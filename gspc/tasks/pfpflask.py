@@ -62,14 +62,17 @@ class PFPFlask(Sample):
     def schedule(self, context: Execute.Context, data: typing.Optional[Data] = None) -> typing.List[Runnable]:
         sample_origin = context.origin + SAMPLE_OPEN_AT
         sample_post_origin = context.origin + SAMPLE_OPEN_AT + SAMPLE_SECONDS
-        prior_post_origin = context.origin - CYCLE_SECONDS + SAMPLE_OPEN_AT + SAMPLE_SECONDS
+        prior_origin = context.prior_origin
+        if prior_origin is None:
+            prior_origin = context.origin - CYCLE_SECONDS
+        prior_post_origin = prior_origin + SAMPLE_OPEN_AT + SAMPLE_SECONDS
 
         if data is None:
             data = PFPData()
         data.sample_type = "flask"
         data.ssv_pos = self._ssv
         data.pfp_index = self._pfp
-        data.sample_number = int(context.origin / CYCLE_SECONDS) + 1
+        data.sample_number = context.task_index + 1
 
         maintain_sample_flow = MaintainFlow(context, sample_origin + 2, sample_post_origin,
                                             SAMPLE_FLOW, LOWER_SAMPLE_FLOW, UPPER_SAMPLE_FLOW)
@@ -90,6 +93,13 @@ class PFPFlask(Sample):
         abort_after_injection = AbortPoint(context, sample_post_origin + 8)
         abort_flow_invalid = AbortPoint(context, sample_post_origin + 160)
 
+        # Injection follows the sample close and a cooled oven; used when executing in dependency mode
+        sample_close = SampleClose(context, sample_post_origin)
+        oven_cool = WaitForOvenCool(context, sample_post_origin - 15,
+                                    data.cryo_extended, abort_after_injection)
+        inject = InjectSwitch(context, sample_post_origin + 1).after(sample_close, 1.0).after(oven_cool)
+        gc_ready = GCReady(context, sample_post_origin + 1).after(sample_close, 1.0).after(oven_cool)
+
         result = [
             CycleBegin(context, context.origin, data),
 
@@ -97,11 +107,10 @@ class PFPFlask(Sample):
             MeasurePFPPressure(context, context.origin + 3, self._ssv, None),
             MeasurePFPPressure(context, context.origin + 30, self._ssv, None),
 
-            EnableCryogen(context, context.origin + 1),
             DisableCryogen(context, sample_post_origin - 5),
 
             SampleOpen(context, context.origin + SAMPLE_OPEN_AT),
-            SampleClose(context, sample_post_origin),
+            sample_close,
 
             StaticFlow(context, context.origin + 3, INITIAL_FLOW),
 
@@ -136,14 +145,13 @@ class PFPFlask(Sample):
 
             PFPValveClose(context, sample_post_origin + 30, self._ssv, self._pfp, data.record_pfp_close),
 
-            WaitForOvenCool(context, sample_post_origin - 15,
-                            data.cryo_extended, abort_after_injection),
+            oven_cool,
             RecordLastFlow(context, sample_post_origin - 2, data.record_last_flow),
 
-            GCReady(context, sample_post_origin + 1),
-            InjectSwitch(context, sample_post_origin + 1),
-            GCSample(context, sample_post_origin + 2),
-            CryogenTrapHeaterOn(context, sample_post_origin + 2),
+            gc_ready,
+            inject,
+            GCSample(context, sample_post_origin + 2).after(gc_ready, 1.0),
+            CryogenTrapHeaterOn(context, sample_post_origin + 2).after(inject, 1.0),
             OverflowOff(context, sample_post_origin + 3),
 
             LoadSwitch(context, sample_post_origin + 57),
@@ -156,7 +164,7 @@ class PFPFlask(Sample):
 
             abort_flow_invalid,
             abort_after_injection,
-            CycleEnd(context, context.origin + CYCLE_SECONDS),
+            CycleEnd(context, context.origin + self.origin_advance),
         ]
         if prior_post_origin > 0.0:
             result += [
@@ -165,13 +173,8 @@ class PFPFlask(Sample):
 
                 SetSSV(context, prior_post_origin + 182, self._evac_ssv),
                 EvacuateOn(context, prior_post_origin + 198),
-                MeasurePFPPressure(context, prior_post_origin + 200, self._ssv, None),
-                MeasurePFPPressure(context, prior_post_origin + 230, self._ssv, None),
-                MeasurePFPPressure(context, prior_post_origin + 260, self._ssv, None),
-                MeasurePFPPressure(context, prior_post_origin + 290, self._ssv, None),
-                MeasurePFPPressure(context, prior_post_origin + 350, self._ssv, None),
-                MeasurePFPPressure(context, prior_post_origin + 410, self._ssv, None),
-                MeasurePFPPressure(context, prior_post_origin + 470, self._ssv, None),
+                # Reads the pressure only as often as its decay needs, until it is down or the evacuation ends
+                MonitorPFPEvacuation(context, prior_post_origin + 200, self._ssv, context.origin - 240),
             ]
 
         if context.origin > 0.0:
@@ -185,6 +188,9 @@ class PFPFlask(Sample):
                 ZeroFlow(context, context.origin - 230),
 
                 CryogenTrapHeaterOff(context, context.origin - 150),
+                # Once the trap heater is off, as late as the oven is expected to cool in
+                AdaptiveEnableCryogen(context, context.origin - 140, context.origin + 1, sample_post_origin - 15,
+                                      data.record_cooling),
 
                 MeasurePFPPressure(context, context.origin - 123, self._ssv, data.record_pfp_pressure1),
                 MeasurePFPPressure(context, context.origin - 98, self._ssv, data.record_pfp_pressure2),
@@ -194,6 +200,8 @@ class PFPFlask(Sample):
             ]
         else:
             result += [
+                AdaptiveEnableCryogen(context, context.origin + 1, context.origin + 1, sample_post_origin - 15,
+                                      data.record_cooling),
                 HighPressureOff(context, context.origin),
                 # Some failsafes to make sure the initial state on the first sample is sane
                 SetSSV(context, context.origin, self._ssv),
@@ -1,30 +1,34 @@
 import logging
-import time
-import asyncio
 import statistics
 import typing
 from gspc.hw.interface import Interface
-from gspc.schedule import Runnable, Execute
+from gspc.schedule import Runnable, Execute, SignalGate
+from gspc.cooling import fit_exponential
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class MeasurePressure(Runnable):
+    __slots__ = ("duration", "_record")
+
     def __init__(self, context: Execute.Context, origin: float, duration: float,
                  record: typing.Callable[[float, float, typing.List[float]], None]):
         Runnable.__init__(self, context, origin)
-        self._duration = duration
+        self.duration = duration
         self._record = record
 
     async def execute(self):
         _LOGGER.info("Collecting pressure data")
-        end_time = time.time() + self._duration
+        clock = self.context.clock
+        end_time = clock.monotonic() + self.duration
         pressure_readings = list()
-        while time.time() <= end_time:
-            pressure = await self.context.interface.get_pressure()
+        # Every sample is a fresh reading, shared only with readers at the same time
+        signal = self.context.interface.sensors.signal("pressure")
+        while clock.monotonic() <= end_time:
+            pressure = await signal.get(0.0)
             if pressure is not None:
                 pressure_readings.append(pressure)
-            await asyncio.sleep(1)
+            await clock.sleep(1)
         pressure_mean = statistics.mean(pressure_readings)
         pressure_stddev = statistics.stdev(pressure_readings)
         _LOGGER.info(f"Measured pressure {pressure_mean:.2f} with stddev {pressure_stddev:.2f}")
@@ -32,6 +36,8 @@ class MeasurePressure(Runnable):
 
 
 class MeasurePFPPressure(Runnable):
+    __slots__ = ("_record", "_ssv")
+
     def __init__(self, context: Execute.Context, origin: float,
                  ssv: int, record: typing.Callable[[float], None]):
         Runnable.__init__(self, context, origin)
@@ -39,7 +45,7 @@ class MeasurePFPPressure(Runnable):
         self._ssv = ssv
 
     async def execute(self):
-        pressure = await self.context.interface.get_pfp_pressure(self._ssv)
+        pressure = await self.context.interface.pfp_pressure_signal(self._ssv).get()
         if pressure is None:
             _LOGGER.info(f"Measured PFP ssv={self._ssv} pressure not read properly.")
         else:
@@ -49,21 +55,82 @@ class MeasurePFPPressure(Runnable):
 
 
 class CheckPFPEvacuated(Runnable):
+    __slots__ = ("_ssv",)
     REQUIRED_PRESSURE_SIGNAL = 2.5
+    # Seconds the pressure has to come down in, before the PFP valve opens
+    MAXIMUM_WAIT_SECONDS = 8
+    # Reading the PFP pressure too often interferes with other PFP communications
+    READ_INTERVAL = 2.0
 
     def __init__(self, context: Execute.Context, origin: float, ssv: int):
         Runnable.__init__(self, context, origin)
         self._ssv = ssv
 
     async def execute(self):
-        sig = await self.context.interface.get_pfp_pressure(self._ssv)
-        if sig is not None and sig < self.REQUIRED_PRESSURE_SIGNAL:
+        signal = self.context.interface.pfp_pressure_signal(self._ssv)
+        gate = SignalGate(signal.get, self.REQUIRED_PRESSURE_SIGNAL, above=False, interval=self.READ_INTERVAL)
+        if await gate.wait(self.context.clock, self.MAXIMUM_WAIT_SECONDS):
             _LOGGER.info(f"PFP inlet evacuated ok")
-            return
-        elif sig is not None and sig > self.REQUIRED_PRESSURE_SIGNAL:
-            _LOGGER.info(f"PFP inlet pressure too high ({sig:.2f} > {self.REQUIRED_PRESSURE_SIGNAL}), aborting")
-            await self.context.schedule.abort("Inlet pressure too high")
+        elif gate.value is not None:
+            _LOGGER.info(f"PFP inlet pressure too high ({gate.value:.2f} > {self.REQUIRED_PRESSURE_SIGNAL}), "
+                         f"skipping task")
+            await self.context.schedule.skip_task(self.context, "Inlet pressure too high")
         else:
             _LOGGER.info(f"PFP manifold pressure is NONE ?")
-            return
 
+
+class MonitorPFPEvacuation(Runnable):
+    """Follow the PFP manifold pressure while it is evacuated, reading it only as often as the fitted decay
+    needs.  It stops as soon as the pressure is down, and skips the task once the decay shows the pressure
+    cannot get down before the evacuation ends, rather than leaving it to the check before the valve opens."""
+
+    __slots__ = ("_ssv", "_evacuated_by")
+    # Seconds between the readings needed for the first fit of the decay
+    READ_INTERVAL = 30.0
+    # Readings before the decay is fitted
+    FIT_READINGS = 3
+    # Seconds the next reading is put off until at most, when the pressure is predicted to be down later
+    MAXIMUM_INTERVAL = 120.0
+
+    def __init__(self, context: Execute.Context, origin: float, ssv: int, evacuated_by: float):
+        Runnable.__init__(self, context, origin)
+        self._ssv = ssv
+        self._evacuated_by = evacuated_by - origin
+
+    async def execute(self):
+        interface = self.context.interface
+        clock = self.context.clock
+        threshold = CheckPFPEvacuated.REQUIRED_PRESSURE_SIGNAL
+        signal = interface.pfp_pressure_signal(self._ssv)
+        gate = SignalGate(signal.get, threshold, above=False)
+        begin = clock.monotonic()
+        deadline = begin + self._evacuated_by
+        # Pressure as a rising signal, so the decay is the same approach to a plateau as the oven cooling
+        samples: typing.List[typing.Tuple[float, float]] = list()
+        while True:
+            now = clock.monotonic()
+            pressure = await signal.get()
+            if await gate.update(pressure, now):
+                _LOGGER.info(f"PFP ssv={self._ssv} evacuated to {pressure:.2f} after {now - begin:.0f} seconds "
+                             f"with {gate.readings} readings")
+                return
+            if pressure is not None:
+                samples.append((now - begin, -pressure))
+
+            wait = self.READ_INTERVAL
+            if len(samples) >= self.FIT_READINGS:
+                fit = fit_exponential(samples)
+                predicted = fit.time_to(-threshold) if fit is not None else None
+                if fit is not None and (predicted is None or begin + predicted > deadline):
+                    _LOGGER.warning(f"PFP ssv={self._ssv} pressure {gate.value:.2f} is not falling fast enough to "
+                                    f"reach {threshold} during evacuation, skipping task")
+                    await self.context.schedule.skip_task(self.context, "PFP evacuation leak")
+                    return
+                if predicted is not None:
+                    wait = min(max(begin + predicted - now, self.READ_INTERVAL), self.MAXIMUM_INTERVAL)
+
+            if now >= deadline:
+                _LOGGER.info(f"PFP ssv={self._ssv} pressure not down by the end of evacuation, "
+                             f"leaving it to the check")
+                return
+            await clock.sleep(min(wait, deadline - now))
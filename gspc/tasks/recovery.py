@@ -0,0 +1,28 @@
+import typing
+from gspc.schedule import Task, Runnable, Execute
+
+from .sample import SampleClose
+from .cryogen import DisableCryogen
+from .vacuum import VacuumOff
+from .valve import EvacuateOff, OverflowOn
+
+# Seconds from the start of the recovery until the next task origin
+RECOVERY_SECONDS = 60
+
+
+class SafeState(Task):
+    """Return the instrument to an idle state after a task is skipped, before the schedule continues.  A skip
+    can follow the injection, so the GC valves and the cryogen trap heater are left for the next task to set."""
+
+    def __init__(self, origin_advance: float = RECOVERY_SECONDS):
+        Task.__init__(self, origin_advance)
+
+    def schedule(self, context: Execute.Context) -> typing.List[Runnable]:
+        return [
+            SampleClose(context, context.origin),
+            DisableCryogen(context, context.origin),
+            EvacuateOff(context, context.origin),
+            VacuumOff(context, context.origin + 1),
+            # Keep the lines flushed until the next task takes over
+            OverflowOn(context, context.origin + 1),
+        ]
@@ -19,24 +19,28 @@ _LOGGER = logging.getLogger(__name__)
 
 
 class SampleOpen(Runnable):
-    def __init__(self, context: Execute.Context, origin: float):
-        Runnable.__init__(self, context, origin)
-        self.set_events.add("sample_open")
+    __slots__ = ()
+    set_events = frozenset({"sample_open"})
 
     async def execute(self):
         await self.context.interface.set_sample(True)
         _LOGGER.info("Sample valve open")
 
+    def actuators(self):
+        return {"sample": True}
+
 
 class SampleClose(Runnable):
-    def __init__(self, context: Execute.Context, origin: float):
-        Runnable.__init__(self, context, origin)
-        self.set_events.add("sample_close")
+    __slots__ = ()
+    set_events = frozenset({"sample_close"})
 
     async def execute(self):
         await self.context.interface.set_sample(False)
         _LOGGER.info("Sample valve closed")
 
+    def actuators(self):
+        return {"sample": False}
+
 
 class Data(CycleData):
     def __init__(self):
@@ -58,6 +62,9 @@ class Data(CycleData):
         self.last_flow_control: typing.Optional[float] = None
 
         self.cryo_extra_count: typing.Optional[int] = 0
+        # Seconds the oven took to cool after the cryogen was enabled, and the prediction the enable followed
+        self.cool_predicted: typing.Optional[float] = None
+        self.cool_actual: typing.Optional[float] = None
 
         # Not sure this is actually useful: it would only be non-zero if not in low flow mode and the low flow
         # condition occured 1-s before the end of the cycle (i.e. the last reading was low flow)
@@ -153,6 +160,12 @@ class Data(CycleData):
                           net_pressure and f"{net_pressure:.3f}" or "NONE"])
         log_message("")
 
+        self._log_fields(["cooling (s)", "predicted", "actual"])
+        self._log_fields(["XXXXXXXXX",
+                          self.cool_predicted is not None and f"{self.cool_predicted:.0f}" or "NONE",
+                          self.cool_actual is not None and f"{self.cool_actual:.0f}" or "NONE"])
+        log_message("")
+
     def abort(self, message: typing.Optional[str] = None):
         self.finish()
         if message is not None:
@@ -177,32 +190,34 @@ class Data(CycleData):
     def cryo_extended(self):
         self.cryo_extra_count = (self.cryo_extra_count or 0) + 1
 
+    def record_cooling(self, predicted: typing.Optional[float], actual: typing.Optional[float]):
+        self.cool_predicted = predicted
+        self.cool_actual = actual
+
 
 class CycleBegin(Runnable):
+    __slots__ = ("data",)
+    clear_events = frozenset({"sample_open", "sample_close", "gc_trigger", "cycle_end"})
+
     def __init__(self, context: Execute.Context, origin: float, data: Data):
         Runnable.__init__(self, context, origin)
-        self.clear_events.add("sample_open")
-        self.clear_events.add("sample_close")
-        self.clear_events.add("gc_trigger")
-        self.clear_events.add("cycle_end")
         self.data = data
 
     async def delay(self):
         self.context.task_started = True
+        # Tasks inserted or removed before this one since it was scheduled change its number
+        self.data.sample_number = self.context.task_index + 1
         begin_cycle(self.data)
         return False
 
 
 class CycleEnd(Runnable):
-    def __init__(self, context: Execute.Context, origin: float):
-        Runnable.__init__(self, context, origin)
-        self.clear_events.add("sample_open")
-        self.clear_events.add("sample_close")
-        self.clear_events.add("gc_trigger")
-        self.set_events.add("cycle_end")
+    __slots__ = ()
+    set_events = frozenset({"cycle_end"})
+    clear_events = frozenset({"sample_open", "sample_close", "gc_trigger"})
 
     async def delay(self) -> bool:
-        await self.context.schedule.complete_background()
+        await self.context.schedule.complete_background(self.context.task_index)
         self.context.task_completed = True
         complete_cycle()
         return True
@@ -219,15 +234,21 @@ class Sample(Task):
         if data is None:
             data = Data()
 
-        data.sample_number = int(context.origin / CYCLE_SECONDS) + 1
+        data.sample_number = context.task_index + 1
 
         #abort_after_cycle = AbortPoint(context, context.origin + CYCLE_SECONDS)
         abort_after_injection = AbortPoint(context, sample_post_origin + 8)
 
+        # Injection follows the sample close and a cooled oven; used when executing in dependency mode
+        sample_close = SampleClose(context, sample_post_origin)
+        oven_cool = WaitForOvenCool(context, sample_post_origin - 15,
+                                    data.cryo_extended, abort_after_injection)
+        inject = InjectSwitch(context, sample_post_origin + 1).after(sample_close, 1.0).after(oven_cool)
+        gc_ready = GCReady(context, sample_post_origin + 1).after(sample_close, 1.0).after(oven_cool)
+
         result = [
             CycleBegin(context, context.origin, data),
 
-            EnableCryogen(context, context.origin + 1),
             DisableCryogen(context, sample_post_origin - 5),
 
             #CycleVacuum(context, context.origin + 36),
@@ -237,7 +258,7 @@ class Sample(Task):
 
             LogFlow(context, context.origin + SAMPLE_OPEN_AT - 1),       # added 240201
             SampleOpen(context, context.origin + SAMPLE_OPEN_AT),
-            SampleClose(context, sample_post_origin),
+            sample_close,
 
             StaticFlow(context, sample_post_origin + 2, 3), # added 240201 to set the valve to a well defined value.
 
@@ -249,14 +270,13 @@ class Sample(Task):
 
             MeasurePressure(context, context.origin + SAMPLE_OPEN_AT - 8, 7, data.record_pressure_start),
 
-            WaitForOvenCool(context, sample_post_origin - 15,
-                            data.cryo_extended, abort_after_injection),
+            oven_cool,
             RecordLastFlow(context, sample_post_origin - 2, data.record_last_flow),
 
-            GCReady(context, sample_post_origin + 1),
-            InjectSwitch(context, sample_post_origin + 1),
-            GCSample(context, sample_post_origin + 2),
-            CryogenTrapHeaterOn(context, sample_post_origin + 2),
+            gc_ready,
+            inject,
+            GCSample(context, sample_post_origin + 2).after(gc_ready, 1.0),
+            CryogenTrapHeaterOn(context, sample_post_origin + 2).after(inject, 1.0),
             HighPressureOff(context, sample_post_origin + 3),
             OverflowOff(context, sample_post_origin + 3),
 
@@ -265,7 +285,7 @@ class Sample(Task):
             CheckSampleTemperature(context, sample_post_origin + 69),
 
             #abort_after_cycle,
-            CycleEnd(context, context.origin + CYCLE_SECONDS),
+            CycleEnd(context, context.origin + self.origin_advance),
         ]
         if context.origin > 0.0:
             result += [
@@ -274,7 +294,14 @@ class Sample(Task):
 
                 ZeroFlow(context, context.origin - 230),
 
-                EnableCryogen(context, context.origin - 100),
+                # Once the trap heater is off, as late as the oven is expected to cool in
+                AdaptiveEnableCryogen(context, context.origin - 290, context.origin - 100, sample_post_origin - 15,
+                                      data.record_cooling),
                 OverflowOn(context, context.origin - 50),
             ]
+        else:
+            result += [
+                AdaptiveEnableCryogen(context, context.origin + 1, context.origin + 1, sample_post_origin - 15,
+                                      data.record_cooling),
+            ]
         return result
@@ -1,15 +1,18 @@
 import logging
-import time
+import math
 import typing
-import asyncio
 from gspc.hw.interface import Interface
-from gspc.schedule import Runnable, Execute, AbortPoint
+from gspc.schedule import Runnable, Execute, AbortPoint, SignalGate
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class WaitForOvenCool(Runnable):
+    __slots__ = ("_cooling_failed", "_abort_point")
     REQUIRED_TEMPERATURE_SIGNAL = 2.5
+    # Each period waited for the oven counts as one cryogen extension
+    EXTENSION_SECONDS = 15
+    MAXIMUM_WAIT_SECONDS = 60
 
     def __init__(self, context: Execute.Context, origin: float,
                  cooling_failed: typing.Optional[typing.Callable[[], None]] = None,
@@ -19,32 +22,36 @@ class WaitForOvenCool(Runnable):
         self._abort_point = abort_point
 
     async def delay(self):
-        for i in range(4):
-            sig = await self.context.interface.get_oven_temperature_signal()
-            if sig is not None and sig >= self.REQUIRED_TEMPERATURE_SIGNAL:
-                _LOGGER.info("Oven cooled")
-                if i == 0:
-                    return False
-                return True
-            if self._cooling_failed:
+        oven = self.context.interface.sensors.signal("oven_temperature")
+        gate = SignalGate(lambda: oven.get(SignalGate.DEFAULT_INTERVAL), self.REQUIRED_TEMPERATURE_SIGNAL)
+        cooled = await gate.wait(self.context.clock, self.MAXIMUM_WAIT_SECONDS)
+        if cooled and gate.readings <= 1:
+            _LOGGER.info("Oven cooled")
+            return False
+        if self._cooling_failed:
+            for _ in range(max(1, math.ceil(gate.waited / self.EXTENSION_SECONDS))):
                 self._cooling_failed()
-            _LOGGER.info(f"Oven temperature too high ({sig:.3f} < {self.REQUIRED_TEMPERATURE_SIGNAL}), waiting for 15 seconds")
-            await asyncio.sleep(15)
+        if cooled:
+            _LOGGER.info(f"Oven cooled after waiting {gate.waited:.1f} seconds")
+            return True
 
-        _LOGGER.info(f"Oven failed to reach {self.REQUIRED_TEMPERATURE_SIGNAL}, cycle will abort")
+        _LOGGER.info(f"Oven failed to reach {self.REQUIRED_TEMPERATURE_SIGNAL}, task will be skipped")
+        self.failed = True
         if self._abort_point:
-            await self._abort_point.abort("Oven failed to cool")
+            await self._abort_point.abort("Oven failed to cool", skip_task=True)
         else:
-            await self.context.schedule.abort("Oven failed to cool")
+            await self.context.schedule.skip_task(self.context, "Oven failed to cool")
         return True
 
 
 class CheckSampleTemperature(Runnable):
+    __slots__ = ()
     REQUIRED_TEMPERATURE_SIGNAL = 2.5
 
     async def execute(self):
-        sig = await self.context.interface.get_oven_temperature_signal()
+        sig = await self.context.interface.sensors.signal("oven_temperature").get(0.0)
         if sig is not None and sig < self.REQUIRED_TEMPERATURE_SIGNAL:
             return
         _LOGGER.info(f"GC temperature too low (f{sig:.3f} > {self.REQUIRED_TEMPERATURE_SIGNAL}), aborting")
+        # The GC run is already under way, so the whole schedule stops rather than recovering around it
         await self.context.schedule.abort("Oven failed to heat")
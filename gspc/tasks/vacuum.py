@@ -1,26 +1,40 @@
 import logging
-import asyncio
 from gspc.schedule import Runnable
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class CycleVacuum(Runnable):
+    __slots__ = ()
+
     async def execute(self):
         _LOGGER.debug("Cycling vacuum valve")
         await self.context.interface.set_vacuum(True)
-        await asyncio.sleep(2)
+        await self.context.clock.sleep(2)
         await self.context.interface.set_vacuum(False)
         _LOGGER.info("Cycled vacuum valve")
 
+    def actuators(self):
+        return {"vacuum": False}
+
 
 class VacuumOn(Runnable):
+    __slots__ = ()
+
     async def execute(self):
         await self.context.interface.set_vacuum(True)
         _LOGGER.info("Vacuum valve ON")
 
+    def actuators(self):
+        return {"vacuum": True}
+
 
 class VacuumOff(Runnable):
+    __slots__ = ()
+
     async def execute(self):
         await self.context.interface.set_vacuum(False)
         _LOGGER.debug("Vacuum valve OFF")
+
+    def actuators(self):
+        return {"vacuum": False}
@@ -8,14 +8,21 @@ _LOGGER = logging.getLogger(__name__)
 
 
 class OverflowOn(Runnable):
+    __slots__ = ()
+
     async def execute(self):
         await self.context.interface.set_overflow(True)
         #_LOGGER.info("Overflow valve ON")
 
+    def actuators(self):
+        return {"overflow": True}
+
 
 class OverflowOn_pcheck(Runnable):
     """ Checks to see if the pfp_pressure is greater than LOW_MANIFOLD_PRESS if so
         the overflow valve is opened. Otherwise leave closed. """
+    __slots__ = ("_pfp_pressure",)
+
     LOW_MANIFOLD_PRESS = 15.0
 
     def __init__(self, context: Execute.Context, origin: float, pfp_pressure: typing.Callable[[], float]):
@@ -29,62 +36,116 @@ class OverflowOn_pcheck(Runnable):
             await self.context.interface.set_overflow(False)
             _LOGGER.info("Low Manifold Pressure - Leaving Overflow OFF")
 
+    def actuators(self):
+        return {"overflow": None}
+
 
 class OverflowOff(Runnable):
+    __slots__ = ()
+
     async def execute(self):
         await self.context.interface.set_overflow(False)
         #_LOGGER.info("Overflow valve OFF")
 
+    def actuators(self):
+        return {"overflow": False}
+
 
 class HighPressureOn(Runnable):
+    __slots__ = ()
+
     async def execute(self):
         await self.context.interface.set_high_pressure_valve(True)
         _LOGGER.info("High pressure valve ON")
 
+    def actuators(self):
+        return {"high_pressure": True}
+
 
 class HighPressureOff(Runnable):
+    __slots__ = ()
+
     async def execute(self):
         await self.context.interface.set_high_pressure_valve(False)
         _LOGGER.info("High pressure valve OFF")
 
+    def actuators(self):
+        return {"high_pressure": False}
+
 
 class EvacuateOn(Runnable):
+    __slots__ = ()
+
     async def execute(self):
         await self.context.interface.set_evacuation_valve(True)
         _LOGGER.info("Evacuation valve ON")
 
+    def actuators(self):
+        return {"evacuation": True}
+
 
 class EvacuateOff(Runnable):
+    __slots__ = ()
+
     async def execute(self):
         await self.context.interface.set_evacuation_valve(False)
         _LOGGER.info("Evacuation valve OFF")
 
+    def actuators(self):
+        return {"evacuation": False}
+
 
 class LoadSwitch(Runnable):
+    __slots__ = ()
+    duration = 1.0
+
     async def execute(self):
         await self.context.interface.valve_load()
         _LOGGER.info("Valve set to LOAD")
 
+    def actuators(self):
+        return {"gc_valve": "load"}
+
 
 class InjectSwitch(Runnable):
+    __slots__ = ()
+    duration = 2.0
+
     async def execute(self):
         await self.context.interface.valve_inject()
         _LOGGER.info("Valve set to INJECT")
 
+    def actuators(self):
+        return {"gc_valve": "inject"}
+
 
 class PreColumnIn(Runnable):
+    __slots__ = ()
+    duration = 2.0
+
     async def execute(self):
         await self.context.interface.precolumn_in()
         _LOGGER.info("Precolumn IN line")
 
+    def actuators(self):
+        return {"precolumn": "in"}
+
 
 class PreColumnOut(Runnable):
+    __slots__ = ()
+    duration = 2.0
+
     async def execute(self):
         await self.context.interface.precolumn_out()
         _LOGGER.info("Precolumn OUT of line")
 
+    def actuators(self):
+        return {"precolumn": "out"}
+
 
 class SetSSV(Runnable):
+    __slots__ = ("_source",)
+
     def __init__(self, context: Execute.Context, origin: float, source: int):
         Runnable.__init__(self, context, origin)
         self._source = source
@@ -93,8 +154,15 @@ class SetSSV(Runnable):
         await self.context.interface.set_ssv(self._source)
         _LOGGER.info(f"SSV set to {self._source}")
 
+    def actuators(self):
+        # The overflow is opened while the valve moves, then closed again
+        return {"ssv": self._source, "overflow": False}
+
 
 class PFPValveOpen(Runnable):
+    __slots__ = ("_ssv", "_pfp_index", "_record")
+    duration = 5.5
+
     def __init__(self, context: Execute.Context, origin: float, ssv: int, pfp_index: int,
                  record: typing.Optional[typing.Callable[[str], None]] = None):
         Runnable.__init__(self, context, origin)
@@ -109,8 +177,14 @@ class PFPValveOpen(Runnable):
         if self._record:
             self._record(response)
 
+    def actuators(self):
+        return {f"pfp{self._ssv}_valve": (self._pfp_index, True)}
+
 
 class PFPValveClose(Runnable):
+    __slots__ = ("_ssv", "_pfp_index", "_record")
+    duration = 5.5
+
     def __init__(self, context: Execute.Context, origin: float, ssv: int, pfp_index: int,
                  record: typing.Optional[typing.Callable[[str], None]] = None):
         Runnable.__init__(self, context, origin)
@@ -124,3 +198,6 @@ class PFPValveClose(Runnable):
         _LOGGER.info(f"PFP{self._ssv} valve {self._pfp_index} CLOSED: {response}")
         if self._record:
             self._record(response)
+
+    def actuators(self):
+        return {f"pfp{self._ssv}_valve": (self._pfp_index, False)}
@@ -0,0 +1,187 @@
+import asyncio
+import bisect
+import collections
+import time
+import typing
+from gspc.output import write_timing
+
+if typing.TYPE_CHECKING:
+    from gspc.schedule import Runnable
+
+
+# Upper bounds (seconds) of the dispatch latency bins, with a final bin for anything later
+LATENCY_BOUNDS: typing.Tuple[float, ...] = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+DEFAULT_HISTORY = 4096
+# Runnables whose lateness is reported individually in the cycle summary
+CRITICAL_RUNNABLES: typing.Tuple[str, ...] = ("SampleOpen", "SampleClose", "InjectSwitch")
+
+
+class DispatchRecord:
+    """The timing of a single runnable dispatch, in monotonic seconds"""
+
+    __slots__ = ("name", "task_index", "planned", "dispatched", "executed", "delay")
+
+    def __init__(self, name: str, task_index: int, planned: typing.Optional[float], dispatched: float):
+        self.name = name
+        self.task_index = task_index
+        # None for runnables without a fixed origin
+        self.planned = planned
+        self.dispatched = dispatched
+        # Completion of execute(), which runs in the background
+        self.executed: typing.Optional[float] = None
+        # Seconds spent in delay()
+        self.delay: typing.Optional[float] = None
+
+    @property
+    def lateness(self) -> typing.Optional[float]:
+        """Seconds the dispatch was after the planned time"""
+        if self.planned is None:
+            return None
+        return self.dispatched - self.planned
+
+    @property
+    def execute_seconds(self) -> typing.Optional[float]:
+        """Seconds from the dispatch until execute() completed"""
+        if self.executed is None:
+            return None
+        return self.executed - self.dispatched
+
+
+class LatencyHistogram:
+    """Dispatch latency counts in logarithmic bins"""
+
+    def __init__(self, bounds: typing.Sequence[float] = LATENCY_BOUNDS):
+        self.bounds = tuple(bounds)
+        self.counts: typing.List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds: float) -> None:
+        # Early dispatches only happen from rounding, so count them as on time
+        seconds = max(seconds, 0.0)
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    @property
+    def mean(self) -> typing.Optional[float]:
+        if self.count == 0:
+            return None
+        return self.total / self.count
+
+    def quantile(self, q: float) -> typing.Optional[float]:
+        """Get the upper bound of the bin containing a quantile, or the maximum if it is in the last bin"""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        accumulated = 0
+        for i in range(len(self.bounds)):
+            accumulated += self.counts[i]
+            if accumulated >= target:
+                return min(self.bounds[i], self.maximum)
+        return self.maximum
+
+
+class ExecuteStats:
+    """Outcomes and run times of the background executions of a runnable class"""
+
+    def __init__(self):
+        self.completed = 0
+        self.failed = 0
+        # Cancelled by the schedule, including controllers preempted by a newer one
+        self.cancelled = 0
+        self.preempted = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds: float, task: asyncio.Task, preempted: bool = False) -> None:
+        if task.cancelled():
+            self.cancelled += 1
+            if preempted:
+                self.preempted += 1
+        elif task.exception() is not None:
+            self.failed += 1
+        else:
+            self.completed += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    @property
+    def count(self) -> int:
+        return self.completed + self.failed + self.cancelled
+
+    @property
+    def mean(self) -> typing.Optional[float]:
+        if self.count == 0:
+            return None
+        return self.total / self.count
+
+
+class TimingMonitor:
+    """Records the timing of runnable dispatches in a bounded history, with latency histograms by class"""
+
+    def __init__(self, history: int = DEFAULT_HISTORY, critical: typing.Sequence[str] = CRITICAL_RUNNABLES):
+        self.records: typing.Deque[DispatchRecord] = collections.deque(maxlen=history)
+        self.histograms: typing.Dict[str, LatencyHistogram] = dict()
+        self.executions: typing.Dict[str, ExecuteStats] = dict()
+        self.critical = tuple(critical)
+
+    def dispatched(self, runnable: 'Runnable', planned: typing.Optional[float], dispatched: float) -> DispatchRecord:
+        """Record the dispatch of a runnable"""
+        name = type(runnable).__name__
+        record = DispatchRecord(name, runnable.context.task_index, planned, dispatched)
+        self.records.append(record)
+        if planned is not None:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = LatencyHistogram()
+                self.histograms[name] = histogram
+            histogram.add(dispatched - planned)
+        return record
+
+    def executed(self, record: DispatchRecord, task: asyncio.Task, preempted: bool = False) -> None:
+        """Record the outcome of the background execution of a dispatched runnable, once it has finished"""
+        stats = self.executions.get(record.name)
+        if stats is None:
+            stats = ExecuteStats()
+            self.executions[record.name] = stats
+        stats.add(record.execute_seconds, task, preempted)
+
+    def cycle_records(self, task_index: int) -> typing.List[DispatchRecord]:
+        """Get the retained records of a task"""
+        return [record for record in self.records if record.task_index == task_index]
+
+    def cycle_fields(self, task_index: int) -> typing.List[str]:
+        """Get the summary fields of a task, matching the summary header"""
+        records = self.cycle_records(task_index)
+        late = [record for record in records if record.planned is not None]
+        latest = max(late, key=lambda record: record.lateness, default=None)
+
+        def seconds(value: typing.Optional[float]) -> str:
+            return value is not None and f"{value:.3f}" or "NONE"
+
+        fields = [
+            f"{len(records)}",
+            seconds(sum(record.lateness for record in late) / len(late) if late else None),
+            seconds(latest.lateness if latest is not None else None),
+            latest.name if latest is not None else "NONE",
+        ]
+        for name in self.critical:
+            fields.append(seconds(max((record.lateness for record in late if record.name == name), default=None)))
+        fields.append(seconds(max((record.delay for record in records if record.delay is not None), default=None)))
+        fields.append(seconds(max((record.execute_seconds for record in records
+                                   if record.execute_seconds is not None), default=None)))
+        return fields
+
+    def summary_header(self) -> typing.List[str]:
+        return (["Date", "Time", "Task#", "Runnables", "Mean late", "Max late", "Max late runnable"] +
+                [f"{name} late" for name in self.critical] +
+                ["Max delay", "Max execute"])
+
+    def write_cycle(self, task_index: int) -> None:
+        """Write the summary of a completed task next to the data output"""
+        now = time.localtime()
+        fields = [time.strftime("%Y-%m-%d", now), time.strftime("%H:%M:%S", now), f"{task_index + 1}"]
+        write_timing("\t".join(self.summary_header()), "\t".join(fields + self.cycle_fields(task_index)))
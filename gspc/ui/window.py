@@ -4,6 +4,7 @@ import logging
 import time
 import typing
 from gspc.const import CYCLE_SECONDS
+from gspc.compiler import parse_task_file
 from PyQt5 import QtCore, QtGui, QtWidgets
 from pathlib import Path
 from collections import namedtuple
@@ -538,6 +539,15 @@ class Main(QtWidgets.QMainWindow):
     def modify_active_list(self, modified_index: int) -> bool:
         return True
 
+    def insert_active_task(self, index: int) -> bool:
+        return self.modify_active_list(index)
+
+    def remove_active_task(self, index: int) -> bool:
+        return self.modify_active_list(index)
+
+    def move_active_task(self, index: int, to: int) -> bool:
+        return self.modify_active_list(min(index, to))
+
     def add_open_file(self, filename: str):
         tabname = Path(filename).stem
 
@@ -545,24 +555,11 @@ class Main(QtWidgets.QMainWindow):
         FileTask = namedtuple('FileTask', ['task', 'name', 'data'])
         try:
             with open(filename, "rt") as input_file:
-                line_number = 0
-                for line in input_file:
-                    line_number += 1
-                    parts = line.split(',', 2)
-                    if len(parts) <= 0:
-                        continue
-                    task_name = parts[0].strip()
-                    if len(task_name) <= 0:
-                        continue
-
-                    if task_name not in self.loadable_tasks:
-                        QtWidgets.QMessageBox.critical(self, "Error Loading File", f"Unknown task {task_name} at line {line_number} in {filename}")
-                        return
-
-                    task_data = None
-                    if len(parts) > 1:
-                        task_data = parts[1]
+                for task_name, task_data in parse_task_file(input_file, self.loadable_tasks):
                     file_tasks.append(FileTask(self.loadable_tasks[task_name], task_name, task_data))
+        except ValueError as e:
+            QtWidgets.QMessageBox.critical(self, "Error Loading File", f"{e} in {filename}")
+            return
         except IOError as e:
             QtWidgets.QMessageBox.critical(self, "Error Loading File", f"Cannot open file {filename}: {e}")
             return
@@ -668,7 +665,7 @@ class Main(QtWidgets.QMainWindow):
             task_list.addItem(item)
 
             index = task_list.count()-1
-            if task_list == self.current_task_list and not self.modify_active_list(index):
+            if task_list == self.current_task_list and not self.insert_active_task(index):
                 task_list.takeItem(index)
                 return
 
@@ -681,7 +678,7 @@ class Main(QtWidgets.QMainWindow):
                 return
 
             item = task_list.takeItem(index)
-            if task_list == self.current_task_list and not self.modify_active_list(index):
+            if task_list == self.current_task_list and not self.remove_active_task(index):
                 task_list.insertItem(index, item)
                 task_list.setCurrentRow(index)
                 return
@@ -696,7 +693,7 @@ class Main(QtWidgets.QMainWindow):
 
             item = task_list.takeItem(index)
             task_list.insertItem(index-1, item)
-            if task_list == self.current_task_list and not self.modify_active_list(index-1):
+            if task_list == self.current_task_list and not self.move_active_task(index, index-1):
                 item = task_list.takeItem(index-1)
                 task_list.insertItem(index, item)
                 task_list.setCurrentRow(index)
@@ -712,7 +709,7 @@ class Main(QtWidgets.QMainWindow):
 
             item = task_list.takeItem(index)
             task_list.insertItem(index + 1, item)
-            if task_list == self.current_task_list and not self.modify_active_list(index):
+            if task_list == self.current_task_list and not self.move_active_task(index, index + 1):
                 item = task_list.takeItem(index + 1)
                 task_list.insertItem(index, item)
                 task_list.setCurrentRow(index)
@@ -0,0 +1,339 @@
+#! /usr/bin/env python
+""" Benchmarks for the schedule engine.
+
+    Run directly with the package installed (pip3 install -e .), e.g.
+    "python3 tests/bench_schedule.py".  Each case reports operations per
+    second and the p99 latency of a single operation, and is compared with
+    the baseline in bench_baseline.json next to this file, keeping the
+    fastest of several rounds.  Cases that take only a few milliseconds in
+    total here or in the baseline are too noisy to gate on, so they are
+    reported but not compared.  The run queue is also compared with the
+    previous sort-and-slice dispatch from 10 to 10,000 tasks, which is only
+    a reference and is run once.  After an
+    intentional change to the engine's performance, rewrite the baseline
+    with "--write-baseline" on the reference machine.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import tempfile
+import time
+import typing
+import gspc.schedule
+import gspc.clock
+from gspc.const import CYCLE_SECONDS
+from gspc.hw.stub import Stub
+from gspc.checkpoint import CheckpointJournal
+from gspc.tasks.flow import MaintainFlow
+
+RUNNABLES_PER_TASK = 30
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+# Fraction of the baseline throughput below which a case is reported as a regression
+REGRESSION_THRESHOLD = 0.7
+# Total seconds below which a case is not compared with the baseline
+MINIMUM_GATE_SECONDS = 5E-3
+# Reference cases that are reported but never compared with the baseline
+REFERENCE_CASES = ("dispatch_sorted_list/",)
+
+
+class Result(typing.NamedTuple):
+    operations: int
+    seconds: float
+    p99: float
+
+    @property
+    def ops_per_second(self) -> float:
+        if self.seconds <= 0.0:
+            return 0.0
+        return self.operations / self.seconds
+
+
+def _p99(samples: typing.List[float]) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def _offset(j: int) -> float:
+    # Spread offsets into the prior cycle like the sample tasks do
+    return (j * 97.0) % (2 * CYCLE_SECONDS) - CYCLE_SECONDS
+
+
+def _build(tasks: int):
+    run = list()
+    for i in range(tasks):
+        context = gspc.schedule.Execute.Context(None, None, i * CYCLE_SECONDS, i)
+        for j in range(RUNNABLES_PER_TASK):
+            run.append(gspc.schedule.Runnable(context, context.origin + _offset(j)))
+    return run
+
+
+class _StampRunnable(gspc.schedule.Runnable):
+    __slots__ = ("_stamps",)
+
+    def __init__(self, context: gspc.schedule.Execute.Context, origin: float, stamps: typing.List[float]):
+        gspc.schedule.Runnable.__init__(self, context, origin)
+        self._stamps = stamps
+
+    async def delay(self):
+        self._stamps.append(time.perf_counter())
+        return False
+
+
+class _StampTask(gspc.schedule.Task):
+    def __init__(self, stamps: typing.List[float]):
+        gspc.schedule.Task.__init__(self, CYCLE_SECONDS)
+        self._stamps = stamps
+
+    def schedule(self, context: gspc.schedule.Execute.Context):
+        return [_StampRunnable(context, context.origin + _offset(j), self._stamps)
+                for j in range(RUNNABLES_PER_TASK)]
+
+
+def _run(exe: gspc.schedule.Execute, clock: gspc.clock.VirtualClock,
+         interface: typing.Optional[Stub] = None, concurrent: typing.Optional[typing.Awaitable] = None) -> bool:
+    asyncio.set_event_loop(clock.loop)
+    if concurrent is not None:
+        other = clock.loop.create_task(concurrent)
+    result = clock.run(exe.execute(interface))
+    if concurrent is not None:
+        clock.run(other)
+    return result
+
+
+def dispatch_queue(tasks: int, dispatches: int) -> Result:
+    """Pop the next runnable from the run queue"""
+    queue = gspc.schedule._RunQueue()
+    queue.extend(_build(tasks))
+    dispatches = min(dispatches, len(queue))
+    samples = list()
+    begin = time.perf_counter()
+    for _ in range(dispatches):
+        start = time.perf_counter()
+        queue.peek()
+        queue.pop()
+        samples.append(time.perf_counter() - start)
+    return Result(dispatches, time.perf_counter() - begin, _p99(samples))
+
+
+def dispatch_sorted_list(tasks: int, dispatches: int) -> Result:
+    """Take the next runnable with the sort and slice the run queue replaced"""
+    run = sorted(_build(tasks), key=lambda runnable: runnable.origin)
+    dispatches = min(dispatches, len(run))
+    samples = list()
+    begin = time.perf_counter()
+    for _ in range(dispatches):
+        start = time.perf_counter()
+        run[0]
+        run = run[1:]
+        samples.append(time.perf_counter() - start)
+    return Result(dispatches, time.perf_counter() - begin, _p99(samples))
+
+
+def dispatch_execute(tasks: int, checkpoint: typing.Optional[str] = None) -> Result:
+    """Dispatch no-op runnables through the full execution loop, in virtual time, optionally writing a
+    checkpoint journal"""
+    clock = gspc.clock.VirtualClock()
+    stamps: typing.List[float] = list()
+    exe = gspc.schedule.Execute([_StampTask(stamps) for _ in range(tasks)], clock=clock,
+                                checkpoint=CheckpointJournal(checkpoint) if checkpoint is not None else None)
+    begin = time.perf_counter()
+    _run(exe, clock, Stub())
+    end = time.perf_counter()
+    samples = [stamps[i] - stamps[i - 1] for i in range(1, len(stamps))]
+    return Result(len(stamps), end - begin, _p99(samples))
+
+
+def reschedule(tasks: int, index: int, repeats: int, edit: bool = False) -> Result:
+    """Remove everything from an index onward and append the same number of tasks again, or when editing
+    insert a task at the index and then delete it again"""
+    clock = gspc.clock.VirtualClock()
+    asyncio.set_event_loop(clock.loop)
+    stamps: typing.List[float] = list()
+    reached = clock.loop.create_future()
+
+    class Reached(gspc.schedule.Runnable):
+        async def delay(self):
+            reached.set_result(True)
+            return False
+
+    class ReachedTask(gspc.schedule.Task):
+        def schedule(self, context: gspc.schedule.Execute.Context):
+            return [Reached(context, context.origin)]
+
+    # Leave room for the following task to reach into the prior cycle without being in the past
+    exe = gspc.schedule.Execute([ReachedTask(2 * CYCLE_SECONDS)] + [_StampTask(stamps) for _ in range(tasks - 1)],
+                                clock=clock)
+    samples = list()
+
+    async def modify():
+        await reached
+        for _ in range(repeats):
+            start = time.perf_counter()
+            if edit:
+                await exe.insert_task(index, _StampTask(stamps))
+                await exe.delete_task(index)
+            else:
+                await exe.reschedule(remove=index, append=[_StampTask(stamps) for _ in range(tasks - index)])
+            samples.append(time.perf_counter() - start)
+        await exe.abort("benchmark complete")
+
+    _run(exe, clock, Stub(), modify())
+    return Result(len(samples), sum(samples), _p99(samples))
+
+
+def state_update(tasks: int, calls: int) -> Result:
+    """Gather the schedule state the control window displays, as its state_update does"""
+    clock = gspc.clock.VirtualClock()
+    asyncio.set_event_loop(clock.loop)
+    samples = list()
+
+    class Gather(gspc.schedule.Execute):
+        async def state_update(self):
+            start = time.perf_counter()
+            events = dict(self.events.items())
+            task_state = dict()
+            for context in self.contexts:
+                if context.task_completed:
+                    task_state[context.task_index] = 0
+                elif context.task_started:
+                    task_state[context.task_index] = 1
+                elif context.task_activated:
+                    task_state[context.task_index] = 2
+            samples.append(time.perf_counter() - start)
+            if len(samples) >= calls:
+                await self.abort("benchmark complete")
+
+    exe = Gather([_StampTask(list()) for _ in range(tasks)], clock=clock)
+    _run(exe, clock, Stub())
+    return Result(len(samples), sum(samples), _p99(samples))
+
+
+class _FlowLoop(MaintainFlow):
+    # Otherwise each loop would supersede the one before it on the flow DAC
+    __slots__ = ()
+    preemptible = False
+
+
+def reap_flow_loops(loops: int, seconds: float) -> Result:
+    """Run concurrent flow control loops in the background, counting each loop iteration as an operation"""
+    clock = gspc.clock.VirtualClock()
+    interface = Stub()
+
+    class FlowTask(gspc.schedule.Task):
+        def schedule(self, context: gspc.schedule.Execute.Context):
+            return [_FlowLoop(context, context.origin + i * 0.01, context.origin + seconds, 1.0, 0.5, 1.5)
+                    for i in range(loops)]
+
+    exe = gspc.schedule.Execute([FlowTask(seconds + 1.0)], clock=clock)
+    stamps: typing.List[float] = list()
+
+    async def tick():
+        # Every loop iterates once per virtual second, so the real time between ticks is one round of them
+        for _ in range(int(seconds)):
+            stamps.append(time.perf_counter())
+            await clock.sleep(1.0)
+
+    begin = time.perf_counter()
+    _run(exe, clock, interface, tick())
+    elapsed = time.perf_counter() - begin
+    samples = [(stamps[i] - stamps[i - 1]) / loops for i in range(1, len(stamps))]
+    return Result(int(loops * seconds), elapsed, _p99(samples))
+
+
+def _round(case: typing.Callable[[], Result]) -> Result:
+    # Collections scanning the large schedules are the bulk of the noise, so leave them out like timeit does
+    gc.collect()
+    gc.disable()
+    try:
+        return case()
+    finally:
+        gc.enable()
+
+
+def _best(rounds: int, case: typing.Callable[[], Result]) -> Result:
+    """Run a case several times and keep the fastest, so scheduling noise does not read as a regression"""
+    return max((_round(case) for _ in range(max(1, rounds))), key=lambda result: result.ops_per_second)
+
+
+def run_cases(sizes: typing.Sequence[int], queue_sizes: typing.Sequence[int], dispatches: int, repeats: int,
+              rounds: int) -> typing.Dict[str, Result]:
+    results = dict()
+    for size in queue_sizes:
+        results[f"dispatch_queue/{size}"] = _best(rounds, lambda: dispatch_queue(size, dispatches))
+        results[f"dispatch_sorted_list/{size}"] = _round(lambda: dispatch_sorted_list(size, dispatches))
+    for size in sizes:
+        results[f"dispatch_execute/{size}"] = _best(rounds, lambda: dispatch_execute(size))
+        with tempfile.TemporaryDirectory() as directory:
+            journal = os.path.join(directory, "bench.checkpoint")
+            results[f"dispatch_checkpoint/{size}"] = _best(rounds, lambda: dispatch_execute(size, journal))
+        results[f"state_update/{size}"] = _best(rounds, lambda: state_update(size, dispatches))
+        for index in sorted({1, size // 2, size - 1}):
+            if index < 1:
+                continue
+            results[f"reschedule/{size}/{index}"] = _best(rounds, lambda: reschedule(size, index, repeats))
+            results[f"insert_delete/{size}/{index}"] = _best(rounds,
+                                                             lambda: reschedule(size, index, repeats, edit=True))
+    for loops in (10, 100, 1000):
+        results[f"reap_flow_loops/{loops}"] = _best(rounds, lambda: reap_flow_loops(loops, 60.0))
+    return results
+
+
+if __name__ == '__main__':
+    opt = argparse.ArgumentParser(
+        description='Schedule engine benchmarks'
+    )
+    opt.add_argument('--dispatches', type=int, default=1000,
+                     help='Number of operations to time for the queue and state update cases.')
+    opt.add_argument('--repeats', type=int, default=20,
+                     help='Number of reschedules to time for each index.')
+    opt.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000],
+                     help='Schedule sizes in tasks.')
+    opt.add_argument('--queue-sizes', dest='queue_sizes', type=int, nargs='+', default=[10, 100, 1000, 10000],
+                     help='Schedule sizes in tasks for the run queue dispatch comparison.')
+    opt.add_argument('--rounds', type=int, default=5,
+                     help='Number of times to run each case, keeping the fastest.')
+    opt.add_argument('--baseline', default=BASELINE_FILE,
+                     help='Baseline JSON to compare with.')
+    opt.add_argument('--write-baseline', dest='write_baseline', action='store_true',
+                     help='Write the results as the new baseline.')
+    options = opt.parse_args()
+
+    results = run_cases(options.sizes, options.queue_sizes, options.dispatches, options.repeats, options.rounds)
+
+    baseline = dict()
+    if not options.write_baseline and os.path.exists(options.baseline):
+        with open(options.baseline, "r") as input_file:
+            baseline = json.load(input_file)
+
+    regressions = 0
+    print(f"{'case':<28} {'ops/s':>12} {'p99 (us)':>12} {'baseline':>10}")
+    for name, result in results.items():
+        compare = ""
+        reference = baseline.get(name)
+        if name.startswith(REFERENCE_CASES):
+            compare = "ref"
+        elif (result.seconds < MINIMUM_GATE_SECONDS or
+              (reference is not None and reference.get("seconds", 0.0) < MINIMUM_GATE_SECONDS)):
+            compare = "-"
+        elif reference is not None and reference["ops_per_second"] > 0.0:
+            ratio = result.ops_per_second / reference["ops_per_second"]
+            compare = f"{ratio:.2f}x"
+            if ratio < REGRESSION_THRESHOLD:
+                compare += " SLOWER"
+                regressions += 1
+        print(f"{name:<28} {result.ops_per_second:>12.0f} {result.p99 * 1E6:>12.1f} {compare:>10}")
+
+    if options.write_baseline:
+        with open(options.baseline, "w") as output_file:
+            json.dump({name: {"ops_per_second": round(result.ops_per_second, 1),
+                              "seconds": round(result.seconds, 6),
+                              "p99_us": round(result.p99 * 1E6, 1)}
+                       for name, result in results.items()}, output_file, indent=2, sort_keys=True)
+            output_file.write("\n")
+    elif regressions:
+        print(f"{regressions} cases below {REGRESSION_THRESHOLD:.0%} of the baseline throughput")
+        raise SystemExit(1)
@@ -2,6 +2,8 @@ import pytest
 import asyncio
 import math
 import gspc.schedule
+import gspc.clock
+import gspc.output
 
 
 class BasicRunnable(gspc.schedule.Runnable):
@@ -35,7 +37,8 @@ class BasicTask(gspc.schedule.Task):
 def test_schedule_basic():
     ran = dict()
 
-    loop = asyncio.new_event_loop()
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
     asyncio.set_event_loop(loop)
 
     exe = gspc.schedule.Execute([
@@ -43,7 +46,7 @@ def test_schedule_basic():
         BasicTask(ran, 2),
         BasicTask(ran, 3),
         BasicTask(ran, 4),
-    ])
+    ], clock=clock)
 
     result = loop.run_until_complete(exe.execute(None))
 
@@ -88,12 +91,13 @@ class GateTask(gspc.schedule.Task):
 def test_schedule_gate():
     ran = dict()
 
-    loop = asyncio.new_event_loop()
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
     asyncio.set_event_loop(loop)
 
     exe = gspc.schedule.Execute([
         GateTask(ran),
-    ])
+    ], clock=clock)
 
     result = loop.run_until_complete(exe.execute(None))
 
@@ -131,7 +135,8 @@ class EventTask(gspc.schedule.Task):
 def test_schedule_events():
     ran = dict()
 
-    loop = asyncio.new_event_loop()
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
     asyncio.set_event_loop(loop)
 
     exe = gspc.schedule.Execute([
@@ -145,7 +150,7 @@ def test_schedule_events():
         EventTask('e1', True),
         EventTask('e2', None),
         BasicTask(ran, 4),
-    ])
+    ], clock=clock)
 
     result = loop.run_until_complete(exe.execute(None))
 
@@ -189,7 +194,8 @@ class AbortTask(gspc.schedule.Task):
 def test_schedule_abort():
     ran = dict()
 
-    loop = asyncio.new_event_loop()
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
     asyncio.set_event_loop(loop)
 
     exe = gspc.schedule.Execute([
@@ -198,7 +204,7 @@ def test_schedule_abort():
         BasicTask(ran, 3),
         BasicTask(ran, 4),
         AbortTask(ran, 5, "missed"),
-    ])
+    ], clock=clock)
 
     should_not_set = False
 
@@ -221,6 +227,50 @@ def test_schedule_abort():
     assert exe.abort_message == "message"
 
 
+class StubbornRunnable(gspc.schedule.Runnable):
+    async def execute(self):
+        # Ignores the first cancellation, like a device call that cannot be interrupted
+        try:
+            await asyncio.sleep(1000)
+        except asyncio.CancelledError:
+            await asyncio.sleep(1000)
+
+
+class AbortNowRunnable(gspc.schedule.Runnable):
+    async def delay(self):
+        await self.context.schedule.abort("stop")
+        return False
+
+
+class StubbornTask(gspc.schedule.Task):
+    def __init__(self):
+        gspc.schedule.Task.__init__(self, 100.0)
+
+    def schedule(self, context: gspc.schedule.Execute.Context):
+        return [StubbornRunnable(context, context.origin), StubbornRunnable(context, context.origin),
+                AbortNowRunnable(context, context.origin + 10.0)]
+
+
+def test_schedule_abort_latency():
+    from gspc.hw.stub import Stub
+
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
+    asyncio.set_event_loop(loop)
+
+    interface = Stub(loop)
+    interface.cryogen = True
+    interface.sample_open = True
+    exe = gspc.schedule.Execute([StubbornTask()], clock=clock)
+    start = clock.monotonic()
+    assert clock.run(exe.execute(interface)) == False
+    # The background tasks share one cancellation budget before the outputs are made safe
+    assert exe.abort_latency == pytest.approx(exe.ABORT_CANCEL_SECONDS, abs=0.1)
+    assert clock.monotonic() - start == pytest.approx(10.0 + exe.ABORT_CANCEL_SECONDS, abs=0.1)
+    assert not interface.cryogen
+    assert not interface.sample_open
+
+
 class BreakTask(gspc.schedule.Task):
     def __init__(self):
         gspc.schedule.Task.__init__(self, 1.0)
@@ -255,7 +305,8 @@ class BreakTask(gspc.schedule.Task):
 def test_reschedule():
     ran = dict()
 
-    loop = asyncio.new_event_loop()
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
     asyncio.set_event_loop(loop)
 
     mid = BreakTask()
@@ -266,7 +317,7 @@ def test_reschedule():
         BasicTask(ran, 3),
         BasicTask(ran, 98),
         BasicTask(ran, 99),
-    ])
+    ], clock=clock)
 
     async def reschedule_execute():
         await mid.reached
@@ -296,7 +347,8 @@ def test_reschedule():
 def test_reschedule_fail_modify_past():
     ran = dict()
 
-    loop = asyncio.new_event_loop()
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
     asyncio.set_event_loop(loop)
 
     mid = BreakTask()
@@ -305,7 +357,7 @@ def test_reschedule_fail_modify_past():
         BasicTask(ran, 2),
         mid,
         BasicTask(ran, 3),
-    ])
+    ], clock=clock)
 
     reschedule_exception = False
 
@@ -333,7 +385,8 @@ def test_reschedule_fail_modify_past():
 def test_reschedule_fail_add_passed():
     ran = dict()
 
-    loop = asyncio.new_event_loop()
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
     asyncio.set_event_loop(loop)
 
     mid = BreakTask()
@@ -342,7 +395,7 @@ def test_reschedule_fail_add_passed():
         BasicTask(ran, 2),
         mid,
         BasicTask(ran, 3),
-    ])
+    ], clock=clock)
 
     reschedule_exception = False
 
@@ -366,4 +419,607 @@ def test_reschedule_fail_add_passed():
     assert ran[1] == True
     assert ran[2] == True
     assert ran[3] == True
-    assert reschedule_exception
\ No newline at end of file
+    assert reschedule_exception
+
+def test_run_queue_order():
+    ran = dict()
+    first = gspc.schedule.Execute.Context(None, None, 0.0, 0)
+    second = gspc.schedule.Execute.Context(None, None, 1.0, 1)
+
+    queue = gspc.schedule._RunQueue()
+    queue.extend([
+        BasicRunnable(first, 2.0, ran, 1),
+        BasicRunnable(first, 1.0, ran, 2),
+        BasicRunnable(second, 1.0, ran, 3),
+        BasicRunnable(second, -math.inf, ran, 4),
+        BasicRunnable(first, 1.0, ran, 5),
+    ])
+    assert len(queue) == 5
+
+    assert queue.pop()._key == 4
+    queue.remove_context(second)
+    assert len(queue) == 3
+    queue.push(BasicRunnable(second, 1.5, ran, 6))
+
+    assert [queue.pop()._key for _ in range(len(queue))] == [2, 5, 6, 1]
+    assert not queue
+    assert queue.peek() is None
+
+    # Both a small shift (queued again) and a large one (reordered in place)
+    contexts = [gspc.schedule.Execute.Context(None, None, i * 10.0, i) for i in range(20)]
+    queue.extend([BasicRunnable(context, context.origin + 5.0, ran, context.task_index) for context in contexts])
+    queue.shift_contexts([(contexts[3], 100.0)])
+    queue.shift_contexts([(context, -9.0) for context in contexts[10:]])
+    order = [queue.pop()._key for _ in range(len(queue))]
+    assert order == [0, 1, 2, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 3, 14, 15, 16, 17, 18, 19]
+
+
+def test_event_timeline():
+    ran = dict()
+    context = gspc.schedule.Execute.Context(None, None, 0.0, 0)
+    queue = gspc.schedule._RunQueue()
+    events = gspc.schedule._EventTimeline()
+
+    set_early = BasicRunnable(context, 1.0, ran, 1, {'e1': True})
+    clear = BasicRunnable(context, 2.0, ran, 2, {'e1': False, 'e2': False})
+    set_late = BasicRunnable(context, 3.0, ran, 3, {'e1': True, 'e2': True})
+    for runnable in (set_late, clear, set_early):
+        events.add(queue.push(runnable))
+
+    assert events['e1'] == gspc.schedule.Event(1.0, False)
+    assert 'e2' not in events
+    events.zero_time = 100.0
+    assert events['e1'] == gspc.schedule.Event(101.0, False)
+
+    events.complete(queue.pop(), 50.0)
+    assert events['e1'] == gspc.schedule.Event(50.0, True)
+    events.complete(queue.pop(), 51.0)
+    assert events['e1'] == gspc.schedule.Event(103.0, False)
+    assert events['e2'] == gspc.schedule.Event(103.0, False)
+
+    events.discard(set_late)
+    assert len(events) == 0
+
+
+class TimedRunnable(gspc.schedule.Runnable):
+    def __init__(self, context: gspc.schedule.Execute.Context, origin: float, target, key,
+                 execute_seconds: float = 0.0, fail: bool = False):
+        gspc.schedule.Runnable.__init__(self, context, origin)
+        self._target = target
+        self._key = key
+        self._execute_seconds = execute_seconds
+        self._fail = fail
+
+    async def execute(self):
+        await self.context.clock.sleep(self._execute_seconds)
+        if self._fail:
+            raise RuntimeError
+
+    async def delay(self):
+        self._target[self._key] = self.context.clock.monotonic()
+        return False
+
+
+class DependencyTask(gspc.schedule.Task):
+    def __init__(self, target, max_lag: float = math.inf):
+        gspc.schedule.Task.__init__(self, 200.0)
+        self._target = target
+        self._max_lag = max_lag
+
+    def schedule(self, context: gspc.schedule.Execute.Context):
+        first = TimedRunnable(context, context.origin + 10.0, self._target, "first", 5.0)
+        failing = TimedRunnable(context, context.origin + 20.0, self._target, "failing", 1.0, fail=True)
+        slow = TimedRunnable(context, context.origin + 50.0, self._target, "slow")
+        return [
+            first, failing, slow,
+            TimedRunnable(context, context.origin + 100.0, self._target, "after").after(first, 2.0),
+            TimedRunnable(context, context.origin + 100.0, self._target, "skipped").after(failing),
+            TimedRunnable(context, context.origin + 110.0, self._target, "both").after(
+                first, 0.0, self._max_lag).after(slow, 1.0),
+        ]
+
+
+def test_schedule_dependencies():
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
+    asyncio.set_event_loop(loop)
+
+    ran = dict()
+    exe = gspc.schedule.Execute([DependencyTask(ran)], clock=clock)
+    assert loop.run_until_complete(exe.execute(None)) == True
+    assert ran["after"] == pytest.approx(100.0, abs=0.1)
+    assert ran["skipped"] == pytest.approx(100.0, abs=0.1)
+
+    ran = dict()
+    exe = gspc.schedule.Execute([DependencyTask(ran)], clock=clock, dependency_mode=True)
+    start = clock.monotonic()
+    assert loop.run_until_complete(exe.execute(None)) == True
+    assert ran["first"] - start == pytest.approx(10.0, abs=0.1)
+    assert ran["after"] - start == pytest.approx(17.0, abs=0.1)
+    assert ran["both"] - start == pytest.approx(51.0, abs=0.1)
+    assert "skipped" not in ran
+
+    ran = dict()
+    exe = gspc.schedule.Execute([DependencyTask(ran, max_lag=10.0)], clock=clock, dependency_mode=True)
+    assert loop.run_until_complete(exe.execute(None)) == False
+    assert "both" not in ran
+
+
+class LeadRunnable(gspc.schedule.Runnable):
+    def __init__(self, context: gspc.schedule.Execute.Context, origin: float, target):
+        gspc.schedule.Runnable.__init__(self, context, origin)
+        self._target = target
+
+    async def delay(self):
+        self._target.append((self.origin, self.context.clock.monotonic(), len(self.context.schedule.contexts)))
+        return False
+
+
+class LeadTask(gspc.schedule.Task):
+    def __init__(self, target):
+        gspc.schedule.Task.__init__(self, 100.0)
+        self._target = target
+
+    def schedule(self, context: gspc.schedule.Execute.Context):
+        return [
+            LeadRunnable(context, context.origin - 814.0, self._target),
+            LeadRunnable(context, context.origin, self._target),
+        ]
+
+
+def test_schedule_streaming():
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
+    asyncio.set_event_loop(loop)
+
+    ran = list()
+    task = LeadTask(ran)
+
+    def source():
+        for _ in range(500):
+            yield task
+
+    exe = gspc.schedule.Execute(source(), clock=clock, lookahead=100.0)
+    start = clock.monotonic()
+    assert loop.run_until_complete(exe.execute(None)) == True
+    assert len(ran) == 1000
+    for origin, executed, _ in ran:
+        assert executed - start == pytest.approx(max(origin, 0.0), abs=0.1)
+    assert max(live for _, _, live in ran) < 20
+    assert exe.lookahead >= 814.0
+
+
+class CompletingRunnable(gspc.schedule.Runnable):
+    async def delay(self):
+        await self.context.clock.sleep(3.0)
+        self.context.task_completed = True
+        return True
+
+
+class TimingTask(gspc.schedule.Task):
+    def __init__(self):
+        gspc.schedule.Task.__init__(self, 100.0)
+
+    def schedule(self, context: gspc.schedule.Execute.Context):
+        return [
+            TimedRunnable(context, context.origin + 10.0, dict(), "execute", 2.0),
+            CompletingRunnable(context, context.origin + 50.0),
+        ]
+
+
+def test_schedule_timing(tmp_path):
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
+    asyncio.set_event_loop(loop)
+
+    gspc.output.set_output_name(str(tmp_path / "timing"))
+    try:
+        exe = gspc.schedule.Execute([TimingTask(), TimingTask()], clock=clock)
+        assert loop.run_until_complete(exe.execute(None)) == True
+    finally:
+        gspc.output.set_output_name("")
+
+    assert len(exe.timing.records) == 4
+    executed = exe.timing.cycle_records(0)[0]
+    assert executed.lateness == pytest.approx(0.0, abs=0.1)
+    assert executed.execute_seconds == pytest.approx(2.0, abs=0.1)
+    completing = exe.timing.cycle_records(1)[1]
+    assert completing.delay == pytest.approx(3.0, abs=0.1)
+    assert exe.timing.histograms["TimedRunnable"].count == 2
+    assert exe.timing.histograms["CompletingRunnable"].quantile(0.99) <= 0.001
+    assert exe.timing.executions["TimedRunnable"].completed == 2
+    assert exe.timing.executions["TimedRunnable"].mean == pytest.approx(2.0, abs=0.1)
+
+    lines = (tmp_path / "timing.timing.xl").read_text().splitlines()
+    assert len(lines) == 3
+    header = lines[0].split("\t")
+    assert header[:3] == ["Date", "Time", "Task#"]
+    assert lines[1].split("\t")[2:4] == ["1", "2"]
+    assert lines[2].split("\t")[header.index("Max delay")] == "3.000"
+
+
+class ControlRunnable(gspc.schedule.Runnable):
+    preemptible = True
+
+    def __init__(self, context: gspc.schedule.Execute.Context, origin: float, target, key,
+                 resource: str = "flow_dac", preemptible: bool = True):
+        gspc.schedule.Runnable.__init__(self, context, origin)
+        self._target = target
+        self._key = key
+        self._resource = resource
+        self.preemptible = preemptible
+
+    async def execute(self):
+        for _ in range(100):
+            self._target[self._key] = self.context.clock.monotonic()
+            await self.context.clock.sleep(1.0)
+
+    def actuators(self):
+        return {self._resource: None}
+
+
+class ArbitrationTask(gspc.schedule.Task):
+    def __init__(self, target):
+        gspc.schedule.Task.__init__(self, 200.0)
+        self._target = target
+
+    def schedule(self, context: gspc.schedule.Execute.Context):
+        superseded = ControlRunnable(context, context.origin + 10.0, self._target, "superseded")
+        return [
+            superseded,
+            ControlRunnable(context, context.origin + 10.0, self._target, "other", "ssv"),
+            ControlRunnable(context, context.origin + 15.0, self._target, "fixed", preemptible=False),
+            ControlRunnable(context, context.origin + 20.0, self._target, "newer", preemptible=False),
+            TimedRunnable(context, context.origin + 50.0, self._target, "after").after(superseded),
+        ]
+
+
+def test_schedule_arbitration():
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
+    asyncio.set_event_loop(loop)
+
+    ran = dict()
+    exe = gspc.schedule.Execute([ArbitrationTask(ran)], clock=clock, dependency_mode=True)
+    start = clock.monotonic()
+    assert loop.run_until_complete(exe.execute(None)) == True
+    assert ran["superseded"] - start == pytest.approx(15.0, abs=0.1)
+    assert ran["other"] - start == pytest.approx(109.0, abs=0.1)
+    assert ran["fixed"] - start == pytest.approx(114.0, abs=0.1)
+    assert ran["newer"] - start == pytest.approx(119.0, abs=0.1)
+    # Preemption is not a failure, so dependents still run once it is cancelled
+    assert ran["after"] - start == pytest.approx(15.0, abs=0.1)
+    stats = exe.timing.executions["ControlRunnable"]
+    assert (stats.completed, stats.cancelled, stats.preempted) == (3, 1, 1)
+    assert stats.maximum == pytest.approx(100.0, abs=0.1)
+
+
+class CountedTask(gspc.schedule.Task):
+    def __init__(self, target, key, origin_advance: float = 100.0, lead: float = 5.0):
+        gspc.schedule.Task.__init__(self, origin_advance)
+        self._target = target
+        self._key = key
+        self._lead = lead
+        self.scheduled = 0
+
+    def schedule(self, context: gspc.schedule.Execute.Context):
+        self.scheduled += 1
+        return [
+            TimedRunnable(context, context.origin - self._lead, self._target, f"{self._key} lead"),
+            TimedRunnable(context, context.origin + 10.0, self._target, self._key),
+        ]
+
+
+def test_reschedule_edit():
+    ran = dict()
+
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
+    asyncio.set_event_loop(loop)
+
+    mid = BreakTask()
+    mid.origin_advance = 100.0
+    tasks = {key: CountedTask(ran, key) for key in (1, 2, 3, 4)}
+    tasks[9] = CountedTask(ran, 9, 150.0)
+    tasks[7] = CountedTask(ran, 7, lead=150.0)
+    exe = gspc.schedule.Execute([mid, tasks[1], tasks[2], tasks[3], tasks[4]], clock=clock)
+    start = clock.monotonic()
+
+    async def edit_execute():
+        await mid.reached
+        await exe.insert_task(2, tasks[9])
+        await exe.delete_task(4)
+        await exe.move_task(4, 1)
+        with pytest.raises(gspc.schedule.Execute.RescheduleFailure):
+            await exe.delete_task(0)
+        # Too far ahead of its origin to be first, so it goes after the next task
+        assert await exe.insert_task_earliest(tasks[7]) == 2
+        mid.resume.set_result(True)
+
+    op = loop.create_task(edit_execute())
+    result = loop.run_until_complete(exe.execute(None))
+    loop.run_until_complete(op)
+
+    assert result == True
+    assert [context.task_index for context in exe.contexts] == list(range(6))
+    assert ran[4] - start == pytest.approx(110.0, abs=0.1)
+    assert ran[7] - start == pytest.approx(210.0, abs=0.1)
+    assert ran["7 lead"] - start == pytest.approx(50.0, abs=0.1)
+    assert ran[1] - start == pytest.approx(310.0, abs=0.1)
+    assert ran[9] - start == pytest.approx(410.0, abs=0.1)
+    assert ran[2] - start == pytest.approx(560.0, abs=0.1)
+    assert ran["2 lead"] - start == pytest.approx(545.0, abs=0.1)
+    assert 3 not in ran
+    # Only the tasks after a changed gap are scheduled again, the rest are shifted
+    assert tasks[1].scheduled == 1
+    assert tasks[4].scheduled == 1
+    assert tasks[2].scheduled == 2
+
+
+
+def test_reschedule_edit_replace():
+    ran = dict()
+
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
+    asyncio.set_event_loop(loop)
+
+    mid = BreakTask()
+    mid.origin_advance = 100.0
+    tasks = {key: CountedTask(ran, key) for key in (1, 2, 3)}
+    # Compacted again for new neighbours, as done by the UI for the tasks before an edit
+    tasks[5] = CountedTask(ran, 5, 50.0)
+    tasks[6] = CountedTask(ran, 6, 80.0)
+    exe = gspc.schedule.Execute([mid, tasks[1], tasks[2], tasks[3]], clock=clock)
+    start = clock.monotonic()
+
+    async def edit_execute():
+        await mid.reached
+        await exe.delete_task(3, {1: tasks[5]})
+        await exe.insert_task(3, tasks[3], None, {2: tasks[6]})
+        await exe.move_task(1, 2, None, {1: tasks[6], 2: tasks[5]})
+        mid.resume.set_result(True)
+
+    op = loop.create_task(edit_execute())
+    result = loop.run_until_complete(exe.execute(None))
+    loop.run_until_complete(op)
+
+    assert result == True
+    assert [context.task_index for context in exe.contexts] == list(range(4))
+    assert 1 not in ran
+    assert 2 not in ran
+    assert ran[6] - start == pytest.approx(110.0, abs=0.1)
+    assert ran[5] - start == pytest.approx(190.0, abs=0.1)
+    assert ran[3] - start == pytest.approx(240.0, abs=0.1)
+
+
+
+def test_signal_gate():
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
+    asyncio.set_event_loop(loop)
+    start = clock.monotonic()
+
+    def signal(levels):
+        async def read():
+            elapsed = clock.monotonic() - start
+            value = None
+            for begin, level in levels:
+                if elapsed >= begin:
+                    value = level
+            return value
+        return read
+
+    # Completes on the reading at the crossing instead of a later poll
+    gate = gspc.schedule.SignalGate(signal([(0.0, 1.0), (7.2, 3.0)]), 2.5)
+    assert loop.run_until_complete(gate.wait(clock, 60.0)) == True
+    assert gate.waited == pytest.approx(7.5, abs=0.01)
+
+    # A dip back within the hysteresis does not restart the debounce, one past it does
+    start = clock.monotonic()
+    entered = list()
+
+    async def on_enter(value):
+        entered.append(clock.monotonic() - start)
+
+    gate = gspc.schedule.SignalGate(signal([(0.0, 3.0), (1.0, 0.8), (2.0, 2.5), (3.0, 0.9), (4.0, 1.8), (5.0, 0.5)]), 1.0,
+                                    above=False, hysteresis=1.0, debounce=2.0, interval=1.0, entered=on_enter)
+    assert loop.run_until_complete(gate.wait(clock, 60.0)) == True
+    assert entered == [pytest.approx(1.0), pytest.approx(3.0)]
+    assert gate.waited == pytest.approx(5.0, abs=0.01)
+
+    # Fails at the deadline, ignoring missing readings
+    start = clock.monotonic()
+    gate = gspc.schedule.SignalGate(signal([(0.0, None), (2.0, 1.0)]), 2.5)
+    assert loop.run_until_complete(gate.wait(clock, 10.0)) == False
+    assert gate.waited == pytest.approx(10.0, abs=0.01)
+    assert gate.value == 1.0
+    assert gate.readings == 17
+
+class SkipRunnable(gspc.schedule.Runnable):
+    def __init__(self, context: gspc.schedule.Execute.Context, origin: float, target):
+        gspc.schedule.Runnable.__init__(self, context, origin)
+        self._target = target
+
+    async def execute(self):
+        try:
+            await self.context.clock.sleep(1000.0)
+        except asyncio.CancelledError:
+            self._target["cancelled"] = self._target.get("cancelled", 0) + 1
+            raise
+
+    async def delay(self):
+        await self.context.schedule.skip_task(self.context, "failed")
+        return False
+
+
+class SkipTask(gspc.schedule.Task):
+    def __init__(self, target):
+        gspc.schedule.Task.__init__(self, 100.0)
+        self._target = target
+
+    def schedule(self, context: gspc.schedule.Execute.Context):
+        return [
+            TimedRunnable(context, context.origin + 10.0, self._target, "skip"),
+            SkipRunnable(context, context.origin + 20.0, self._target),
+            TimedRunnable(context, context.origin + 50.0, self._target, "after"),
+        ]
+
+
+class RecoveryTask(gspc.schedule.Task):
+    def __init__(self, target):
+        gspc.schedule.Task.__init__(self, 30.0)
+        self._target = target
+
+    class _Recover(gspc.schedule.Runnable):
+        def __init__(self, context: gspc.schedule.Execute.Context, origin: float, target):
+            gspc.schedule.Runnable.__init__(self, context, origin)
+            self._target = target
+
+        async def delay(self):
+            self._target.setdefault("recovery", list()).append(self.context.clock.monotonic())
+            return False
+
+    def schedule(self, context: gspc.schedule.Execute.Context):
+        return [self._Recover(context, context.origin, self._target)]
+
+
+def test_schedule_skip():
+    ran = dict()
+
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
+    asyncio.set_event_loop(loop)
+
+    tasks = [CountedTask(ran, 1, lead=0.0), SkipTask(ran), CountedTask(ran, 3), CountedTask(ran, 4)]
+    exe = gspc.schedule.Execute(tasks, clock=clock, recovery=RecoveryTask(ran), requeue_failed=True)
+    start = clock.monotonic()
+    result = loop.run_until_complete(exe.execute(None))
+
+    assert result == True
+    assert [skipped.task_index for skipped in exe.skipped] == [1, 4]
+    assert [context.task_skipped for context in exe.contexts] == [False, True, False, False, True]
+    assert "after" not in ran
+    assert ran["cancelled"] == 2
+    # The recovery starts when the task fails and the rest of the schedule follows it
+    assert [seconds - start for seconds in ran["recovery"]] == pytest.approx([120.0, 370.0], abs=0.1)
+    assert ran[3] - start == pytest.approx(160.0, abs=0.1)
+    assert ran[4] - start == pytest.approx(260.0, abs=0.1)
+    # Requeued once at the end, and not again after failing a second time
+    assert ran["skip"] - start == pytest.approx(360.0, abs=0.1)
+    assert clock.monotonic() - start == pytest.approx(370.0, abs=0.1)
+    # Only the task after the recovery is scheduled again, the one after it keeps its gap and is shifted
+    assert tasks[2].scheduled == 2
+    assert tasks[3].scheduled == 1
+
+    ran.clear()
+    exe = gspc.schedule.Execute(iter([CountedTask(ran, 1, lead=0.0), SkipTask(ran), CountedTask(ran, 3),
+                                      CountedTask(ran, 4)]),
+                                clock=clock, lookahead=300.0, recovery=RecoveryTask(ran))
+    start = clock.monotonic()
+    result = loop.run_until_complete(exe.execute(None))
+
+    assert result == True
+    assert ran["cancelled"] == 1
+    assert [seconds - start for seconds in ran["recovery"]] == pytest.approx([120.0], abs=0.1)
+    assert ran[3] - start == pytest.approx(160.0, abs=0.1)
+    assert ran[4] - start == pytest.approx(260.0, abs=0.1)
+
+    # A requeued task built again after the task before it is skipped is still only requeued once
+    ran.clear()
+    exe = gspc.schedule.Execute([CountedTask(ran, 1, lead=0.0), SkipTask(ran), SkipTask(ran)],
+                                clock=clock, recovery=RecoveryTask(ran), requeue_failed=True)
+    result = loop.run_until_complete(exe.execute(None))
+
+    assert result == True
+    assert [skipped.task_index for skipped in exe.skipped] == [1, 2, 3, 4]
+    assert len(exe.contexts) == 5
+    assert all(context.task_skipped for context in exe.contexts[1:])
+
+
+class CycleRunnable(gspc.schedule.Runnable):
+    def __init__(self, context: gspc.schedule.Execute.Context, origin: float, ran, stage: str):
+        gspc.schedule.Runnable.__init__(self, context, origin)
+        self._ran = ran
+        self._stage = stage
+
+    async def delay(self):
+        self._ran.append((self.context.task_index, self._stage, self.context.clock.monotonic()))
+        if self._stage == "begin":
+            self.context.task_started = True
+            data = gspc.output.CycleData()
+            data.sample_number = self.context.task_index + 1
+            gspc.output.begin_cycle(data)
+        elif self._stage == "measure":
+            gspc.output.active_cycle().mean1 = 10.0 * (self.context.task_index + 1)
+        elif self._stage == "end":
+            self.context.task_completed = True
+            gspc.output.complete_cycle()
+        return False
+
+
+class CycleTask(gspc.schedule.Task):
+    def __init__(self, ran):
+        gspc.schedule.Task.__init__(self, 10.0)
+        self._ran = ran
+
+    def schedule(self, context: gspc.schedule.Execute.Context):
+        return [
+            CycleRunnable(context, context.origin, self._ran, "begin"),
+            CycleRunnable(context, context.origin + 1.0, self._ran, "measure"),
+            CycleRunnable(context, context.origin + 2.0, self._ran, "end"),
+        ]
+
+
+def test_schedule_checkpoint(tmp_path, monkeypatch):
+    from gspc.checkpoint import CheckpointJournal, load_checkpoint
+
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
+    asyncio.set_event_loop(loop)
+    journal_file = str(tmp_path / "run.checkpoint")
+
+    ran = list()
+    tasks = [CycleTask(ran) for _ in range(3)]
+    names = ["A", "B", "C"]
+    exe = gspc.schedule.Execute(tasks, task_names=names, clock=clock,
+                                checkpoint=CheckpointJournal(journal_file, batch=4))
+    assert loop.run_until_complete(exe.execute(None)) == True
+    assert len(ran) == 9
+    checkpoint = load_checkpoint(journal_file)
+    assert checkpoint.finished
+    assert checkpoint.task_names == names
+    assert checkpoint.completed == {0, 1, 2}
+
+    # Cut the journal off after the second task measured, as if the process died there mid-write
+    with open(journal_file, "r") as input_file:
+        lines = input_file.readlines()
+    cut = next(i for i, line in enumerate(lines) if '"i":1' in line and '"mean1":20.0' in line)
+    with open(journal_file, "w") as output_file:
+        output_file.writelines(lines[:cut + 1])
+        output_file.write('{"e":"run","i":1,"r":"Cyc')
+    checkpoint = load_checkpoint(journal_file)
+    assert not checkpoint.finished
+    assert checkpoint.completed == {0}
+    assert checkpoint.interrupted == [1]
+    assert checkpoint.resume_index == 2
+
+    aborted = list()
+    monkeypatch.setattr(gspc.output.CycleData, "abort",
+                        lambda data, message=None: aborted.append((data.sample_number, data.mean1, message)))
+    checkpoint.abort_interrupted("interrupted")
+    assert aborted == [(2, 20.0, "interrupted")]
+
+    ran.clear()
+    start = clock.monotonic()
+    exe = gspc.schedule.Execute(tasks, task_names=names, clock=clock, resume_from=checkpoint.resume_index,
+                                checkpoint=CheckpointJournal(journal_file, append=True))
+    assert loop.run_until_complete(exe.execute(None)) == True
+    # Only the task after the interrupted one runs, starting straight away with its original number
+    assert [(index, stage) for index, stage, _ in ran] == [(2, "begin"), (2, "measure"), (2, "end")]
+    assert ran[0][2] - start == pytest.approx(0.0, abs=0.1)
+    assert [context.task_index for context in exe.contexts] == [0, 1, 2]
+    checkpoint = load_checkpoint(journal_file)
+    assert checkpoint.finished
+    assert checkpoint.completed == {0, 1, 2}
+    assert checkpoint.interrupted == []
@@ -0,0 +1,310 @@
+import pytest
+import asyncio
+import gspc.schedule
+import gspc.clock
+import gspc.tasks
+import gspc.compiler
+import gspc.optimize
+import gspc.simulate
+from gspc.hw.stub import Stub
+from gspc.const import CYCLE_SECONDS, SAMPLE_OPEN_AT, SAMPLE_SECONDS
+
+
+def test_virtual_day():
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
+    asyncio.set_event_loop(loop)
+
+    names = ["Tank 2"] + [f"Flask {i}" for i in (1, 3, 4, 5)] + [f"PFP1 Flask {i}" for i in range(1, 13)]
+    names = (names * 4)[:64]
+    exe = gspc.schedule.Execute([gspc.schedule.known_tasks[name] for name in names], task_names=names, clock=clock)
+
+    result = clock.run(exe.execute(Stub(loop)))
+
+    assert result == True
+    assert all(context.task_completed for context in exe.contexts)
+    assert clock.monotonic() == pytest.approx(len(names) * CYCLE_SECONDS, abs=60.0)
+
+
+class _OverflowTask(gspc.schedule.Task):
+    def __init__(self, offset: float, enable: bool):
+        gspc.schedule.Task.__init__(self, 100.0)
+        self._offset = offset
+        self._enable = enable
+
+    def schedule(self, context):
+        runnable = gspc.tasks.sample.OverflowOn if self._enable else gspc.tasks.sample.OverflowOff
+        return [runnable(context, context.origin + self._offset)]
+
+
+def test_compile_conflicts(tmp_path):
+    task_file = tmp_path / "tasks.txt"
+    task_file.write_text("Tank 2\nFlask 1\nPFP1 Flask 1\nPFP1 Flask 2\nFlask 3\n")
+    compiled = gspc.compiler.compile_task_file(str(task_file))
+    assert compiled.conflicts() == []
+    assert gspc.compiler.compile_task_file(str(task_file)) is compiled
+    assert compiled.actuator_timeline("ssv")[0].value == 2
+
+    compiled = gspc.compiler.CompiledSchedule([
+        _OverflowTask(50.0, True),
+        _OverflowTask(-48.0, False),
+        _OverflowTask(0.0, True),
+    ])
+    conflicts = compiled.conflicts(window=5.0)
+    assert len(conflicts) == 1
+    assert conflicts[0].actuator == "overflow"
+    assert conflicts[0].first.task_index == 0
+    assert conflicts[0].second.task_index == 1
+    assert len(compiled.conflicts(window=200.0)) == 2
+
+
+
+def test_parse_task_file():
+    assert gspc.compiler.parse_task_file("Tank 2\n\n  Flask 1 ,data\n") == [("Tank 2", None), ("Flask 1", "data")]
+    assert gspc.compiler.parse_task_file(["A,1\n", "B\n"], {"A": None, "B": None}) == [("A", "1\n"), ("B", None)]
+    with pytest.raises(ValueError, match="line 2"):
+        gspc.compiler.parse_task_file("Tank 2\nNot A Task\n")
+
+def test_compact_schedule():
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
+    asyncio.set_event_loop(loop)
+
+    names = ["Tank 2", "Flask 1", "PFP1 Flask 1", "PFP1 Flask 2", "Flask 3", "Flask 3"]
+    tasks = [gspc.schedule.known_tasks[name] for name in names]
+    compactor = gspc.optimize.Compactor()
+    compacted = compactor.compact(tasks)
+
+    assert all(task.origin_advance == CYCLE_SECONDS for task in tasks)
+    assert all(task.origin_advance < CYCLE_SECONDS for task in compacted)
+    assert compactor.violations(compacted, tasks) == []
+    assert compactor.violations([gspc.optimize._with_advance(task, 600.0) for task in tasks], tasks) != []
+    assert gspc.optimize.samples_per_day(compacted) > gspc.optimize.samples_per_day(tasks) + 2.0
+
+    exe = gspc.schedule.Execute(compacted, task_names=names, clock=clock)
+    result = clock.run(exe.execute(Stub(loop)))
+
+    assert result == True
+    assert all(context.task_completed for context in exe.contexts)
+    assert clock.monotonic() == pytest.approx(sum(task.origin_advance for task in compacted), abs=60.0)
+
+
+def test_task_template():
+    task = gspc.schedule.known_tasks["Flask 1"]
+    template = gspc.compiler.task_template(task, prior_offset=-CYCLE_SECONDS)
+    assert gspc.compiler.task_template(task, prior_offset=-CYCLE_SECONDS) is template
+    assert gspc.compiler.task_template(task, first=True) is not template
+    assert template.offsets.readonly
+
+    schedule = gspc.schedule.Execute([task])
+    context = gspc.schedule.Execute.Context(None, schedule, 5000.0, 0, None, 5000.0 - CYCLE_SECONDS)
+    runnables = task.schedule(context)
+    assert list(template.origins(5000.0)) == [runnable.origin for runnable in runnables]
+    assert [gspc.compiler.actions[i] for i in template.actions] == [type(runnable) for runnable in runnables]
+    assert all(not hasattr(runnable, "__dict__") for runnable in runnables)
+
+    compiled = gspc.compiler.compile_tasks(["Tank 2", "Flask 1", "Flask 3"])
+    assert list(compiled.event_origins("sample_close")) == [
+        origin + SAMPLE_OPEN_AT + SAMPLE_SECONDS for origin in (0.0, CYCLE_SECONDS, 2 * CYCLE_SECONDS)]
+
+
+def test_simulate_run():
+    names = ["Tank 2", "Flask 1", "Flask 3"]
+
+    result = gspc.simulate.simulate_run(names, 1, gspc.simulate.parse_distribution("uniform:0:0.01"),
+                                        gspc.simulate.parse_distribution("constant:0"))
+    assert result.completed
+    assert result.abort_message is None
+    for i in range(len(names)):
+        assert result.starts[i] == pytest.approx(i * CYCLE_SECONDS, abs=5.0)
+        assert result.ends[i] == pytest.approx((i + 1) * CYCLE_SECONDS, abs=5.0)
+    assert gspc.simulate.samples_in_shift(result, 2 * CYCLE_SECONDS + 10.0) == 2
+
+    # PFP flasks only start cooling at the beginning of their cycle, so cooling later than the first check shifts
+    # every task after it
+    result = gspc.simulate.simulate_run(["Tank 2", "PFP1 Flask 1", "PFP1 Flask 2"], 1,
+                                        gspc.simulate.parse_distribution("constant:0"),
+                                        gspc.simulate.parse_distribution("constant:420"))
+    assert result.completed
+    assert result.starts[2] - result.starts[1] == pytest.approx(CYCLE_SECONDS + 15.0, abs=1.0)
+
+    # Once the cooling is learned, the cryogen is enabled early enough that nothing waits for the oven
+    result = gspc.simulate.simulate_run(["Tank 2", "PFP1 Flask 1", "PFP1 Flask 2", "PFP1 Flask 3"], 1,
+                                        gspc.simulate.parse_distribution("constant:0"),
+                                        gspc.simulate.parse_distribution("constant:420"))
+    assert result.completed
+    assert result.starts[3] - result.starts[2] == pytest.approx(CYCLE_SECONDS, abs=1.0)
+
+    # Tasks the oven fails to cool for are skipped, and the schedule continues after recovering
+    result = gspc.simulate.simulate_run(names, 1, gspc.simulate.parse_distribution("constant:0"),
+                                        gspc.simulate.parse_distribution("constant:10000"))
+    assert result.completed
+    assert result.abort_message is None
+    assert result.skipped == 2
+    assert result.ends[0] is not None
+    assert result.ends[1] is None
+    assert result.ends[2] is None
+    assert result.starts[2] < 2 * CYCLE_SECONDS
+
+    result = gspc.simulate.simulate_run(names, 1, gspc.simulate.parse_distribution("constant:0"),
+                                        gspc.simulate.parse_distribution("constant:10000"), requeue=True)
+    assert result.completed
+    assert result.skipped == 4
+    assert len(result.starts) == len(names) + 2
+
+    with pytest.raises(ValueError):
+        gspc.simulate.parse_distribution("normal:1")
+
+
+def test_cooling_model():
+    import math
+    from gspc.cooling import CoolingModel, fit_exponential
+
+    def curve(seconds, tau):
+        return [(t, 4.0 - 2.0 * math.exp(-t / tau)) for t in range(0, seconds, 2)]
+
+    fit = fit_exponential(curve(300, 200.0))
+    assert fit.tau == pytest.approx(200.0, rel=0.05)
+    assert fit.time_to(2.5) == pytest.approx(200.0 * math.log(4.0 / 3.0), rel=0.05)
+    assert fit_exponential([(0.0, 2.0), (2.0, 2.0), (4.0, 2.0)]) is None
+
+    model = CoolingModel(2.5, history=3, margin=10.0)
+    assert model.predict() is None
+    assert model.lead() is None
+    for tau in (1300.0, 1400.0, 1500.0, 1400.0):
+        model.add_cycle(curve(500, tau), tau * math.log(4.0 / 3.0))
+    assert len(model.cycles) == 3
+    assert model.predict() == pytest.approx(1433.0 * math.log(4.0 / 3.0), rel=0.05)
+    assert model.lead() > model.predict() + 10.0
+
+
+def test_pfp_evacuation_monitor():
+    import math
+
+    class DecayStub(Stub):
+        def __init__(self, loop, clock, floor):
+            Stub.__init__(self, loop)
+            self.clock = clock
+            self.floor = floor
+            self.evacuated_at = None
+            self.reads = 0
+
+        def _evacuated(self):
+            elapsed = self.clock.monotonic() - self.evacuated_at
+            return self.floor + (20.0 - self.floor) * math.exp(-elapsed / 60.0)
+
+        async def get_pfp_pressure(self, ssv_index=None):
+            if self.evacuated_at is None:
+                return self.pfp_pressure
+            self.reads += 1
+            return self._evacuated()
+
+        async def set_evacuation_valve(self, enable: bool):
+            if enable:
+                self.evacuated_at = self.clock.monotonic()
+            elif self.evacuated_at is not None:
+                # The manifold holds the pressure it was evacuated to
+                self.pfp_pressure = self._evacuated()
+                self.evacuated_at = None
+
+    def run(floor):
+        clock = gspc.clock.VirtualClock()
+        asyncio.set_event_loop(clock.loop)
+        interface = DecayStub(clock.loop, clock, floor)
+        names = ["PFP1 Flask 1", "PFP1 Flask 2"]
+        exe = gspc.schedule.Execute([gspc.schedule.known_tasks[name] for name in names], task_names=names,
+                                    clock=clock)
+        assert clock.run(exe.execute(interface))
+        return exe, interface
+
+    # Down after a few reads, instead of reading on to the end of the evacuation
+    exe, interface = run(0.5)
+    assert not exe.skipped
+    assert interface.reads < 7
+
+    # A leak that levels off above the required pressure skips the task during the evacuation
+    exe, interface = run(5.0)
+    assert len(exe.skipped) == 1
+    assert interface.reads <= gspc.tasks.pressure.MonitorPFPEvacuation.FIT_READINGS
+
+
+def test_sensor_hub():
+    from gspc.sensors import SensorHub
+
+    clock = gspc.clock.VirtualClock()
+    asyncio.set_event_loop(clock.loop)
+    hub = SensorHub()
+    reads = list()
+
+    async def read():
+        reads.append(clock.monotonic())
+        await clock.sleep(0.1)
+        return float(len(reads))
+
+    signal = hub.signal("flow", read, 1.0)
+    assert hub.signal("flow") is signal
+    assert "flow" in hub
+    with pytest.raises(KeyError):
+        hub.signal("unknown")
+
+    async def run():
+        # Concurrent requests share one read, and a recent reading is served from the cache
+        assert await asyncio.gather(signal.get(), signal.get(), signal.get()) == [1.0, 1.0, 1.0]
+        assert await signal.get(0.5) == 1.0
+        await clock.sleep(0.5)
+        assert await signal.get(0.5) == 2.0
+        signal.invalidate()
+        assert await signal.get() == 3.0
+        assert signal.reads == 3
+
+        # Subscribers get every reading, acquired once each period however many there are
+        seen = list()
+        unsubscribe = signal.subscribe(seen.append)
+        other = signal.subscribe(lambda value: None)
+        await clock.sleep(4.5)
+        unsubscribe()
+        other()
+        await clock.sleep(3.0)
+        return seen
+
+    seen = clock.run(run())
+    assert seen == [4.0, 5.0, 6.0, 7.0]
+    assert len(reads) == 7
+
+
+def test_read_snapshot():
+    clock = gspc.clock.VirtualClock()
+    asyncio.set_event_loop(clock.loop)
+    interface = Stub(clock.loop)
+    names = ("flow", "pressure", "thermocouple_0", "thermocouple_1", "ssv_position")
+
+    async def run():
+        snapshot = await interface.read_snapshot(names)
+        expected = [await getattr(interface, interface.SNAPSHOT_SIGNALS[name])() for name in names]
+        return snapshot, expected
+
+    snapshot, expected = clock.run(run())
+    assert list(snapshot.readings) == list(names)
+    assert [snapshot[name] for name in names] == expected
+    # The readings are shared with the other consumers of the signals
+    assert interface.sensors.signal("thermocouple_1").time is not None
+    assert interface.sensors.signal("flow").value == snapshot["flow"]
+    with pytest.raises(KeyError):
+        clock.run(interface.read_snapshot(("flow", "unknown")))
+
+
+def test_flow_loops_not_preempted(caplog):
+    import logging
+    from gspc.tasks.zero import Zero
+
+    clock = gspc.clock.VirtualClock()
+    loop = clock.loop
+    asyncio.set_event_loop(loop)
+
+    names = ["Flask 1", "PFP1 Flask 1"]
+    tasks = [Zero()] + [gspc.schedule.known_tasks[name] for name in names]
+    exe = gspc.schedule.Execute(tasks, clock=clock)
+    with caplog.at_level(logging.DEBUG, logger="gspc.schedule"):
+        assert clock.run(exe.execute(Stub(loop))) == True
+    # The low flow detection and one-shot adjustments run alongside the sample flow loops
+    assert not [record for record in caplog.records if "preempted" in record.getMessage()]